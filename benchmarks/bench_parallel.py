@@ -0,0 +1,111 @@
+"""
+多进程分析的吞吐量随进程数的变化
+
+    python benchmarks/bench_parallel.py --pairs 5000 --workers 0 2 4 8 --patterns pinbar engulfing inside_bar breakout
+
+K线写入共享内存的环形缓冲区 (与引擎启用 analysis_workers 时相同)，0 表示在当前进程分析。
+输出每秒分析的交易对数量和相对单进程的加速比；另外在当前进程中单独计时 worker 承担的部分
+(取窗口、特征、检测、生成信号)，给出可并行部分的比例和按 Amdahl 定律估计的加速上限，
+CPU 核数少于进程数时实测加速比会低于估计值
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from loguru import logger
+
+from binance_monitor.core.buffer import RingStore
+from binance_monitor.core.engine import KLINE_LIMIT
+from binance_monitor.core.parallel import ParallelAnalyzer, gather_windows
+from binance_monitor.core.strategy import StrategyAnalyzer
+
+def make_items(store: RingStore, pairs: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000_000 + np.arange(KLINE_LIMIT) * 3_600_000
+    items = []
+    for n in range(pairs):
+        close = 100 + np.cumsum(rng.normal(0, 1, KLINE_LIMIT))
+        open_p = close + rng.normal(0, 1, KLINE_LIMIT)
+        high = np.maximum(open_p, close) + np.abs(rng.normal(0, 2, KLINE_LIMIT))
+        low = np.minimum(open_p, close) - np.abs(rng.normal(0, 2, KLINE_LIMIT))
+        ring = store.get(f"SYM{n}/USDT", "1h", KLINE_LIMIT)
+        ring.extend(np.column_stack([timestamps, open_p, high, low, close, np.ones(KLINE_LIMIT)]))
+        items.append((f"SYM{n}/USDT", "1h", ring))
+    return items
+
+def median_seconds(run, repeats: int) -> float:
+    # 第一次运行启动进程池，不计入结果
+    run()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def worker_seconds(analyzer: StrategyAnalyzer, items, repeats: int, closed_index: int = 1) -> float:
+    """worker 进程承担的部分在当前进程中的耗时"""
+    rings = [ring for _, _, ring in items]
+    keys = [(symbol, timeframe) for symbol, timeframe, _ in items]
+    arena = rings[0].arena
+
+    def run():
+        slots = np.fromiter((ring.slot for ring in rings), dtype=np.int64, count=len(rings))
+        ends = np.fromiter((ring.end for ring in rings), dtype=np.int64, count=len(rings))
+        records = gather_windows(arena._arrays, arena.chunk_slots, slots, ends, closed_index + analyzer.window)
+        analyzer.analyze_records(keys, records, closed_index)
+
+    return median_seconds(run, repeats)
+
+def main():
+    parser = argparse.ArgumentParser(description="Binance Monitor 多进程分析基准")
+    parser.add_argument("--pairs", type=int, default=5000, help="每批交易对数量")
+    parser.add_argument("--workers", type=int, nargs="*", default=[0, 2, 4], help="进程数，0 表示当前进程")
+    parser.add_argument("--patterns", nargs="*", default=["pinbar", "engulfing", "inside_bar", "breakout"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    logger.remove()
+    store = RingStore(shared=True)
+    items = make_items(store, args.pairs)
+    results = {"params": vars(args), "cpu_count": os.cpu_count(), "runs": []}
+    try:
+        baseline = median_seconds(lambda: StrategyAnalyzer(args.patterns).analyze_many(items), args.repeats)
+        share = min(worker_seconds(StrategyAnalyzer(args.patterns), items, args.repeats) / baseline, 1.0)
+        results["parallel_fraction"] = share
+        print(f"parallel fraction={share:.2f}  (cpu_count={os.cpu_count()})")
+
+        for workers in args.workers:
+            if workers:
+                parallel = ParallelAnalyzer(workers, min_pairs=1)
+                analyzer = StrategyAnalyzer(args.patterns, parallel=parallel)
+                try:
+                    seconds = median_seconds(lambda: analyzer.analyze_many(items), args.repeats)
+                finally:
+                    parallel.close()
+            else:
+                seconds = baseline
+            projected = 1 / ((1 - share) + share / max(workers, 1))
+            run = {
+                "workers": workers, "seconds": seconds, "pairs_per_sec": args.pairs / seconds,
+                "speedup": baseline / seconds, "projected_speedup": projected,
+            }
+            results["runs"].append(run)
+            print(f"workers={workers:3d}  {run['pairs_per_sec']:10.0f} pairs/s  "
+                  f"speedup={run['speedup']:.2f}x  projected={projected:.2f}x")
+    finally:
+        store.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+fetch -> parse -> analyze -> report 全流程基准测试
+
+    python benchmarks/bench_pipeline.py --universe 10 100 500 2000 --latency 0.02 --output bench.json
+
+结果 (candles/sec, pairs/sec, 扫描耗时 p50/p99, 峰值内存) 以 JSON 保存，便于在不同提交之间比较
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loguru import logger
+
+from fake_exchange import FakeExchange
+from binance_monitor.config import AppConfig
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.engine import MonitorEngine, KLINE_LIMIT
+from binance_monitor.core.signals import SignalIndex
+from binance_monitor.core.strategy import StrategyAnalyzer
+from binance_monitor.notification import BaseNotifier, NotificationManager, NotificationMessage
+
+class NullNotifier(BaseNotifier):
+    """只计数不发送"""
+
+    def __init__(self):
+        self.sent = 0
+
+    @property
+    def name(self) -> str:
+        return "NullNotifier"
+
+    def send(self, message: NotificationMessage) -> bool:
+        self.sent += 1
+        return True
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def bench_parse(exchange: FakeExchange, repeats: int) -> Dict[str, Any]:
+    """get_klines 的解析/排序部分: ccxt 列表 -> CandleSeries"""
+    payloads = [exchange.fetch_ohlcv(s, '4h', limit=KLINE_LIMIT) for s in exchange.symbols]
+    candles = sum(len(p) for p in payloads)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for payload in payloads:
+            CandleSeries.from_ohlcv(payload)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"candles": candles, "seconds_p50": percentile(timings, 50), "candles_per_sec": candles / best}
+
+def bench_analyze(exchange: FakeExchange, repeats: int) -> Dict[str, Any]:
+    """StrategyAnalyzer: 逐个 analyze 与批量 analyze_many"""
+    analyzer = StrategyAnalyzer()
+    items = [(s, '4h', CandleSeries.from_ohlcv(exchange.fetch_ohlcv(s, '4h', limit=KLINE_LIMIT))) for s in exchange.symbols]
+    scalar, batch = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            analyzer.analyze(*item)
+        scalar.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        analyzer.analyze_many(items)
+        batch.append(time.perf_counter() - start)
+    return {
+        "pairs": len(items),
+        "scalar_pairs_per_sec": len(items) / min(scalar),
+        "batch_pairs_per_sec": len(items) / min(batch),
+    }
+
+def bench_scan(exchange: FakeExchange, timeframes: List[str], concurrency: int, repeats: int) -> Dict[str, Any]:
+    """MonitorEngine.run_job 端到端"""
+    config = AppConfig(
+        monitor={"symbols": exchange.symbols, "timeframes": timeframes, "concurrency": concurrency},
+        email={
+            "smtp_server": "localhost", "username": "bench", "password": "bench",
+            "sender_email": "bench@example.com", "receiver_email": "bench@example.com",
+        },
+        # 基准测试不受权重调度器限制
+        binance={"weight_limit_per_minute": 0},
+    )
+    notifier = NullNotifier()
+    manager = NotificationManager()
+    manager.add_notifier(notifier)
+    engine = MonitorEngine(config, manager)
+    engine.client.exchange = exchange
+
+    pairs = len(exchange.symbols) * len(timeframes)
+    timings = []
+    tracemalloc.start()
+    for _ in range(repeats):
+        # 每轮使用新的信号索引，保证每次都完整分析
+        engine.signal_index = SignalIndex()
+        start = time.perf_counter()
+        engine.run_job()
+        timings.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pairs": pairs,
+        "scan_p50": percentile(timings, 50),
+        "scan_p99": percentile(timings, 99),
+        "pairs_per_sec": pairs / percentile(timings, 50),
+        "candles_per_sec": pairs * KLINE_LIMIT / percentile(timings, 50),
+        "peak_memory_mb": peak / 1024 / 1024,
+        "reports": notifier.sent,
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, cwd=os.path.dirname(__file__)).strip()
+    except Exception:
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description="Binance Monitor 流水线基准测试")
+    parser.add_argument("--universe", nargs="*", type=int, default=[10, 100, 500, 2000], help="交易对数量")
+    parser.add_argument("--timeframes", nargs="*", default=["4h", "1d"])
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟的单次请求延迟(秒)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "runs": [],
+    }
+    for size in args.universe:
+        exchange = FakeExchange(universe_size=size, latency=args.latency)
+        run = {
+            "universe": size,
+            "parse": bench_parse(exchange, args.repeats),
+            "analyze": bench_analyze(exchange, args.repeats),
+            "scan": bench_scan(exchange, args.timeframes, args.concurrency, args.repeats),
+        }
+        results["runs"].append(run)
+        scan = run["scan"]
+        print(
+            f"universe={size:5d}  parse={run['parse']['candles_per_sec']:,.0f} candles/s  "
+            f"analyze={run['analyze']['batch_pairs_per_sec']:,.0f} pairs/s  "
+            f"scan p50={scan['scan_p50'] * 1000:.1f}ms p99={scan['scan_p99'] * 1000:.1f}ms  "
+            f"peak={scan['peak_memory_mb']:.1f}MB"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
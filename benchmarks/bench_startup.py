@@ -0,0 +1,118 @@
+"""
+启动耗时基准: 冷启动 vs 启动快照 (binance.warm_start_path)
+
+    python benchmarks/bench_startup.py --universe 500 --latency 0.02 --repeats 3
+
+每次测量都在新的子进程中进行，统计从解释器启动到第一次 run_job 完成的各阶段耗时:
+import (导入 binance_monitor.main)、init (构建 MonitorEngine)、first_scan (第一次 run_job)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def child(args):
+    """子进程: 按真实启动顺序导入和构建，输出一行 JSON"""
+    started = time.perf_counter()
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+    sys.path.insert(0, os.path.dirname(__file__))
+    import binance_monitor.main  # noqa: F401
+    imported = time.perf_counter()
+
+    from loguru import logger
+    from fake_exchange import FakeExchange
+    from binance_monitor.config import AppConfig
+    from binance_monitor.core.engine import MonitorEngine
+    from binance_monitor.notification import NotificationManager
+
+    logger.remove()
+    exchange = FakeExchange(universe_size=args.universe, latency=args.latency, end_ms=args.end_ms)
+    config = AppConfig(
+        monitor={"symbols": exchange.symbols, "timeframes": args.timeframes, "concurrency": args.concurrency},
+        email={
+            "smtp_server": "localhost", "username": "bench", "password": "bench",
+            "sender_email": "bench@example.com", "receiver_email": "bench@example.com",
+        },
+        binance={"weight_limit_per_minute": 0, "warm_start_path": args.warm_start_path},
+    )
+    engine = MonitorEngine(config, NotificationManager())
+    # 与 BinanceClient.__init__ 一致: 快照中的 markets 直接注入交易所
+    markets = engine.client.market_cache.get()
+    engine.client.exchange = exchange
+    if markets is not None:
+        exchange.set_markets(markets)
+    initialized = time.perf_counter()
+
+    engine.run_job()
+    scanned = time.perf_counter()
+    engine.close()
+
+    print(json.dumps({
+        "import": imported - started,
+        "init": initialized - imported,
+        "first_scan": scanned - initialized,
+        "total": scanned - started,
+        "requests": exchange.requests,
+    }))
+
+def run_child(args, warm_start_path=None):
+    command = [
+        sys.executable, "-W", "ignore", __file__, "--child",
+        "--universe", str(args.universe), "--latency", str(args.latency),
+        "--concurrency", str(args.concurrency), "--end-ms", str(args.end_ms),
+        "--timeframes", *args.timeframes,
+    ]
+    if warm_start_path:
+        command += ["--warm-start-path", warm_start_path]
+    output = subprocess.check_output(command, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(runs):
+    return {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Binance Monitor 启动耗时基准")
+    parser.add_argument("--universe", type=int, default=500, help="交易对数量")
+    parser.add_argument("--timeframes", nargs="*", default=["4h", "1d"])
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟的单次请求延迟(秒)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm-start-path", help=argparse.SUPPRESS)
+    # 增量拉取按当前时间计算缺失的K线，模拟交易所的最新K线也取当前时间
+    parser.add_argument("--end-ms", type=int, default=int(time.time() * 1000), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    cold = [run_child(args) for _ in range(args.repeats)]
+    warm = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        warm_path = os.path.join(tmpdir, "warm")
+        # 第一次运行生成快照，不计入结果
+        run_child(args, warm_path)
+        for _ in range(args.repeats):
+            warm.append(run_child(args, warm_path))
+
+    results = {"params": vars(args), "cold": summarize(cold), "warm": summarize(warm)}
+    for name in ("cold", "warm"):
+        r = results[name]
+        print(
+            f"{name:5s} import={r['import'] * 1000:6.0f} ms  init={r['init'] * 1000:6.0f} ms  "
+            f"first_scan={r['first_scan'] * 1000:7.0f} ms  total={r['total'] * 1000:7.0f} ms  "
+            f"requests={r['requests']:.0f}"
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+class KlineCache:
+    """
+    本地 K 线存储 (SQLite)，按 (symbol, timeframe) 保存 OHLCV，进程重启后仍然有效
+    每个交易对只保留最新的 max_candles 根
+    """
+
+    def __init__(self, path: str, max_candles: int = 1000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.max_candles = max_candles
+        # 扫描是多线程的，共享一个连接并用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS klines (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume REAL NOT NULL,
+                PRIMARY KEY (symbol, timeframe, timestamp)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def state(self, symbol: str, timeframe: str) -> Tuple[int, Optional[int]]:
+        """
+        :return: (已缓存数量, 最新一根 K 线的时间戳)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), MAX(timestamp) FROM klines WHERE symbol = ? AND timeframe = ?",
+                (symbol, timeframe),
+            ).fetchone()
+        return row[0], row[1]
+
+    def upsert(self, symbol: str, timeframe: str, ohlcv: Sequence[Sequence[float]], replace: bool = False):
+        """
+        写入 K 线，已存在的时间戳会被覆盖 (未收盘的 K 线会不断更新)
+        :param replace: 先删除该交易对已缓存的K线 (全量拉取的结果可能与旧数据之间有缺口)
+        """
+        if not len(ohlcv):
+            return
+        rows = [
+            (symbol, timeframe, int(c[0]), float(c[1]), float(c[2]), float(c[3]), float(c[4]), float(c[5]))
+            for c in ohlcv
+        ]
+        with self._lock:
+            if replace:
+                self._conn.execute("DELETE FROM klines WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+            self._conn.executemany("INSERT OR REPLACE INTO klines VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            # 只保留最新的 max_candles 根
+            self._conn.execute(
+                """
+                DELETE FROM klines WHERE symbol = ? AND timeframe = ? AND timestamp < (
+                    SELECT timestamp FROM klines WHERE symbol = ? AND timeframe = ?
+                    ORDER BY timestamp DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (symbol, timeframe, symbol, timeframe, self.max_candles - 1),
+            )
+            self._conn.commit()
+
+    def load(self, symbol: str, timeframe: str, limit: int) -> List[List[float]]:
+        """
+        读取最新的 limit 根 K 线
+        :return: ccxt OHLCV 格式，按时间正序
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT timestamp, open, high, low, close, volume FROM klines
+                WHERE symbol = ? AND timeframe = ?
+                ORDER BY timestamp DESC LIMIT ?
+                """,
+                (symbol, timeframe, limit),
+            ).fetchall()
+        return [list(row) for row in reversed(rows)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,22 @@
-import ccxt
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Optional, Union
 from loguru import logger
 from binance_monitor.config import BinanceConfig
+from binance_monitor.api.exchange import Exchange, errors, exchange_class
+from binance_monitor.api.cache import KlineCache
+from binance_monitor.api.markets import MarketCache
+from binance_monitor.api.ratelimit import WeightLimiter
+from binance_monitor.api.resilience import Resilience
+from binance_monitor.api.snapshot import WarmSnapshot
+from binance_monitor.api.transport import open_transport
+from binance_monitor.core.archive import CandleArchive
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.utils.metrics import metrics
+from binance_monitor.utils.tracing import tracer
+
+# 币安单次 K 线请求的最大数量
+MAX_KLINES_PER_REQUEST = 1000
 
 class BinanceClient:
     """币安 API 客户端"""
@@ -11,7 +26,10 @@ class BinanceClient:
         options = {
             'apiKey': config.api_key,
             'secret': config.secret_key,
-            'enableRateLimit': True,
+            # 启用权重调度器时由它控制请求节奏，不再使用 ccxt 的固定间隔限流
+            'enableRateLimit': not config.weight_limit_per_minute,
+            # 单次请求超时 (毫秒)
+            'timeout': int(config.resilience.request_timeout_seconds * 1000),
             'options': {
                 'defaultType': 'spot', # 默认为现货
             }
@@ -26,8 +44,54 @@ class BinanceClient:
                 proxies['https'] = config.https_proxy
             options['proxies'] = proxies
             
-        self.exchange = ccxt.binance(options)
-        
+        self.exchange = exchange_class('binance')(options)
+
+        self.limiter: Optional[WeightLimiter] = None
+        if config.weight_limit_per_minute:
+            self.limiter = WeightLimiter(
+                config.weight_limit_per_minute, config.weight_safety_ratio, config.weight_class_limits
+            )
+            self._capture_response_headers()
+
+        # 本地 K 线缓存，启用后只增量拉取最新的几根
+        self.cache: Optional[Union[KlineCache, WarmSnapshot]] = None
+        self.snapshot: Optional[WarmSnapshot] = None
+        if config.warm_start_path:
+            # 启动快照同时充当K线缓存，退出时保存，下次启动直接 mmap 载入
+            self.snapshot = self.cache = WarmSnapshot(config.warm_start_path, max_candles=config.kline_cache_size)
+        elif config.kline_cache_path:
+            self.cache = KlineCache(config.kline_cache_path, max_candles=config.kline_cache_size)
+
+        # 长期K线存档，只追加
+        self.archive: Optional[CandleArchive] = None
+        if config.archive_path:
+            self.archive = CandleArchive(config.archive_path)
+
+        # 交易对元数据缓存：磁盘上有未过期的数据时直接注入 ccxt，避免启动时下载全部 markets
+        self.market_cache = MarketCache(config.markets_ttl_seconds, config.markets_cache_path)
+        self._markets_lock = threading.Lock()
+        # 最近一次交给 ccxt 的 markets (set_markets 会重建字典，不能用 exchange.markets 判断)
+        self._applied_markets: Optional[Dict[str, Any]] = None
+        if self.snapshot is not None and self.snapshot.markets is not None:
+            self.market_cache.seed(self.snapshot.markets, self.snapshot.markets_saved_at)
+        markets = self.market_cache.get()
+        if markets is not None:
+            self.exchange.set_markets(markets)
+            self._applied_markets = markets
+
+        # 录制 / 回放交易所响应，用于离线复现扫描
+        self.transport = open_transport(config.transport_mode, config.transport_path, config.replay_latency_scale)
+
+        # 重试、对冲请求和熔断；录制/回放按请求顺序匹配，不能发出重复的对冲请求
+        self.resilience = Resilience(config.resilience, hedge=config.resilience.hedge and self.transport is None)
+
+    def get_tickers(self) -> Dict[str, Dict[str, Any]]:
+        """
+        一次请求获取全部交易对的 24h 行情 (权重 80)
+        :return: {symbol: ccxt ticker}
+        """
+        return self._call("tickers", self.exchange.fetch_tickers)
+
     def get_price(self, symbol: str) -> float:
         """
         获取当前交易对价格
@@ -35,7 +99,7 @@ class BinanceClient:
         :return: 当前价格
         """
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self._call("ticker", self.exchange.fetch_ticker, symbol)
             price = ticker.get('last')
             if price is None:
                 raise ValueError(f"Could not fetch price for {symbol}")
@@ -44,40 +108,199 @@ class BinanceClient:
             logger.error(f"Error fetching price for {symbol}: {e}")
             raise
 
-    def get_klines(self, symbol: str, timeframe: str = '4h', limit: int = 2) -> List[Dict[str, Any]]:
+    def get_klines(self, symbol: str, timeframe: str = '4h', limit: int = 2) -> CandleSeries:
         """
         获取 K 线数据
         :param symbol: 交易对，如 'BTC/USDT'
         :param timeframe: 时间周期，如 '1m', '1h', '4h', '1d'
         :param limit: 获取数量，默认 2 (用于比较上一根和当前这根)
-        :return: K 线数据列表，每项包含 timestamp, open, high, low, close, volume
+        :return: 按时间倒序的 CandleSeries，每项包含 timestamp, open, high, low, close, volume
+        """
+        ohlcv = self.get_ohlcv(symbol, timeframe, limit)
+        # 按时间倒序排列（最新的在前面）
+        with tracer.span("parse", candles=len(ohlcv)):
+            return CandleSeries.from_ohlcv(ohlcv)
+
+    def get_ohlcv(self, symbol: str, timeframe: str = '4h', limit: int = 2):
+        """
+        获取 K 线原始数据 (经过缓存和存档，不解析成 CandleSeries)
+        :return: ccxt OHLCV 格式，按时间正序，最多 limit 根
         """
         try:
-            # fetch_ohlcv 返回格式: [timestamp, open, high, low, close, volume]
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            
-            results = []
-            for candle in ohlcv:
-                results.append({
-                    'timestamp': candle[0],
-                    'open': float(candle[1]),
-                    'high': float(candle[2]),
-                    'low': float(candle[3]),
-                    'close': float(candle[4]),
-                    'volume': float(candle[5])
-                })
-            
-            # 按时间倒序排列（最新的在前面）
-            return sorted(results, key=lambda x: x['timestamp'], reverse=True)
-            
+            start = time.perf_counter()
+            with tracer.span("fetch", symbol=symbol, timeframe=timeframe, limit=limit, cached=self.cache is not None):
+                # fetch_ohlcv 返回格式: [timestamp, open, high, low, close, volume]
+                if self.cache is not None:
+                    ohlcv = self._fetch_ohlcv_cached(symbol, timeframe, limit)
+                else:
+                    ohlcv = self._fetch_ohlcv(symbol, timeframe, limit)
+            metrics.fetch_latency.labels(timeframe).observe(time.perf_counter() - start)
+            if self.archive is not None:
+                self._archive(symbol, timeframe, ohlcv)
+            return ohlcv
+
         except Exception as e:
             logger.error(f"Error fetching klines for {symbol} ({timeframe}): {e}")
             raise
 
+    def _fetch_ohlcv_cached(self, symbol: str, timeframe: str, limit: int) -> List[List[float]]:
+        """
+        增量拉取：从缓存中最新一根 K 线 (可能在上次拉取时尚未收盘) 开始，
+        用 since 只拉取尾部，合并进缓存后从本地返回最新 limit 根
+        """
+        # 需要的窗口比缓存容量大时 (例如由小周期聚合大周期) 扩大缓存
+        self.cache.max_candles = max(self.cache.max_candles, limit)
+
+        count, last_ts = self.cache.state(symbol, timeframe)
+        if count >= limit and last_ts is not None:
+            timeframe_ms = Exchange.parse_timeframe(timeframe) * 1000
+            now_ms = int(time.time() * 1000)
+            missing = (now_ms - last_ts) // timeframe_ms + 1
+            if missing < limit:
+                tail = self._fetch_ohlcv(symbol, timeframe, missing + 1, since=last_ts)
+                self.cache.upsert(symbol, timeframe, tail)
+                rows = self.cache.load(symbol, timeframe, limit)
+                # 数量足够不代表连续: 缓存中可能有更早一次全量拉取留下的缺口
+                if len(rows) == limit and rows[-1][0] - rows[0][0] == (limit - 1) * timeframe_ms:
+                    return rows
+
+        # 缓存不足、间隔太久或窗口不连续，全量拉取并替换缓存
+        ohlcv = self._fetch_ohlcv(symbol, timeframe, limit)
+        self.cache.upsert(symbol, timeframe, ohlcv, replace=True)
+        return ohlcv
+
+    def _archive(self, symbol: str, timeframe: str, ohlcv):
+        """追加到K线存档，写入失败不影响本次扫描"""
+        try:
+            with tracer.span("archive", candles=len(ohlcv)):
+                self.archive.append(symbol, timeframe, ohlcv)
+        except Exception as e:
+            logger.warning(f"Failed to archive klines for {symbol} ({timeframe}): {e}")
+
+    def _fetch_ohlcv(self, symbol: str, timeframe: str, limit: int, since: Optional[int] = None) -> List[List[float]]:
+        """
+        拉取 OHLCV，超过单次上限 (1000) 时按 since 分页
+        :return: ccxt OHLCV 格式，按时间正序，最多 limit 根
+        """
+        if limit <= MAX_KLINES_PER_REQUEST:
+            if since is None:
+                return self._call("klines", self.exchange.fetch_ohlcv, symbol, timeframe, limit=limit)
+            return self._call("klines", self.exchange.fetch_ohlcv, symbol, timeframe, since=since, limit=limit)
+
+        timeframe_ms = Exchange.parse_timeframe(timeframe) * 1000
+        if since is None:
+            since = (int(time.time() * 1000) // timeframe_ms - limit + 1) * timeframe_ms
+
+        rows: List[List[float]] = []
+        while len(rows) < limit:
+            page_limit = min(MAX_KLINES_PER_REQUEST, limit - len(rows))
+            page = self._call("klines", self.exchange.fetch_ohlcv, symbol, timeframe, since=since, limit=page_limit)
+            if not page:
+                break
+            rows.extend(page)
+            since = page[-1][0] + timeframe_ms
+            if len(page) < page_limit:
+                break
+        return rows[-limit:]
+
+    def _call(self, endpoint: str, method, *args, **kwargs):
+        """
+        发出一次交易所请求，录制/回放模式下经过 transport
+        网络类错误按退避重试，连续失败的交易对/接口被熔断 (见 resilience.Resilience)
+        :param endpoint: 接口类别，见 ratelimit.ENDPOINT_WEIGHTS
+        """
+        def attempt():
+            try:
+                with tracer.span("request", endpoint=endpoint, args=list(args), since=kwargs.get('since')):
+                    if self.transport is None:
+                        return self._send(endpoint, method, *args, **kwargs)
+                    return self.transport.call(endpoint, args, kwargs, lambda: self._send(endpoint, method, *args, **kwargs))
+            except Exception as e:
+                metrics.api_errors.labels(endpoint, type(e).__name__).inc()
+                raise
+
+        symbol = args[0] if endpoint in ("klines", "ticker") and args else None
+        return self.resilience.call(endpoint, symbol, attempt)
+
+    def _send(self, endpoint: str, method, *args, **kwargs):
+        """
+        经过权重调度器发出请求: 预算不足时等待，响应后按服务端已用权重校正，被限流时暂停
+        """
+        if self.limiter is None:
+            return method(*args, **kwargs)
+
+        with tracer.span("rate_limit_wait", endpoint=endpoint):
+            self.limiter.acquire(endpoint)
+        # 请求没有收到响应 (超时、断线) 时不沿用上一次的响应头
+        self._response.headers = None
+        try:
+            return method(*args, **kwargs)
+        except (errors.DDoSProtection, errors.RateLimitExceeded):
+            self.limiter.on_rate_limited(self._retry_after())
+            raise
+        finally:
+            self.limiter.observe(self._response.headers)
+
+    def _capture_response_headers(self):
+        """
+        每个线程记录自己最近一次响应的响应头
+        exchange.last_response_headers 被扫描线程池共享，读到的可能是其他线程的响应
+        """
+        self._response = threading.local()
+        on_rest_response = self.exchange.on_rest_response
+
+        def capture(code, reason, url, method, headers, *args, **kwargs):
+            self._response.headers = headers
+            return on_rest_response(code, reason, url, method, headers, *args, **kwargs)
+
+        self.exchange.on_rest_response = capture
+
+    def _retry_after(self) -> Optional[float]:
+        headers = getattr(self._response, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def rate_limit_headroom(self) -> Optional[Dict[str, float]]:
+        """请求权重余量，未启用权重调度器时返回 None"""
+        return self.limiter.headroom() if self.limiter is not None else None
+
+    def close(self):
+        """关闭录制存档和本地缓存 (启用启动快照时在这里保存)"""
+        self.resilience.close()
+        if self.transport is not None:
+            self.transport.close()
+        if self.snapshot is not None:
+            self.snapshot.set_markets(*self.market_cache.peek())
+        if self.cache is not None:
+            self.cache.close()
+
+    def load_markets(self) -> Dict[str, Any]:
+        """
+        获取交易对元数据，缓存未过期时不发起请求
+        :return: ccxt markets 字典
+        """
+        with self._markets_lock:
+            markets = self.market_cache.get()
+            if markets is not None:
+                # 缓存内容变化时 (例如由快照载入) 才重新建立 ccxt 的索引
+                if self._applied_markets is not markets:
+                    self.exchange.set_markets(markets)
+                    self._applied_markets = markets
+                return markets
+
+            logger.info("Markets cache expired, reloading markets from Binance")
+            markets = self._call("markets", self.exchange.load_markets, reload=True)
+            self.market_cache.put(markets)
+            # load_markets 已经更新了 ccxt 的索引
+            self._applied_markets = markets
+            return markets
+
     def check_connection(self) -> bool:
-        """检查连接状态"""
+        """检查连接状态 (只请求服务器时间，不下载 markets)"""
         try:
-            self.exchange.load_markets()
+            self._call("time", self.exchange.fetch_time)
             return True
         except Exception as e:
             logger.error(f"Failed to connect to Binance: {e}")
@@ -0,0 +1,60 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+def _install_lazy_ccxt():
+    """
+    `import ccxt` 会执行 ccxt/__init__.py，导入全部 100 多个交易所 (约 0.3 秒，是启动耗时的大头)。
+    这里先在 sys.modules 中放一个惰性的 ccxt 包: 子模块 (ccxt.base.*, ccxt.binance) 照常按需导入，
+    访问包上任何尚未加载的属性 (例如 ccxt.okx、ccxt.__version__) 或 dir(ccxt) 时才执行真正的 ccxt/__init__.py，
+    其他代码里的 `import ccxt` 不受影响
+    """
+    if "ccxt" in sys.modules:
+        return
+    spec = importlib.util.find_spec("ccxt")
+    if spec is None:
+        return
+    module = importlib.util.module_from_spec(spec)
+    lock = threading.RLock()
+    state = {"loaded": False}
+
+    def load():
+        with lock:
+            if not state["loaded"]:
+                state["loaded"] = True
+                spec.loader.exec_module(module)
+
+    def __getattr__(name):
+        # 包括 __version__ 等双下划线属性: 对其他代码来说它就是完整的 ccxt
+        load()
+        if name in module.__dict__:
+            return module.__dict__[name]
+        raise AttributeError(f"module 'ccxt' has no attribute '{name}'")
+
+    def __dir__():
+        load()
+        return sorted(module.__dict__)
+
+    module.__getattr__ = __getattr__
+    module.__dir__ = __dir__
+    sys.modules["ccxt"] = module
+
+_install_lazy_ccxt()
+
+from ccxt.base import errors  # noqa: E402
+from ccxt.base.exchange import Exchange  # noqa: E402
+
+def exchange_class(name: str = "binance"):
+    """
+    只加载一个交易所类
+    ccxt 已完整导入 (或在测试中被 patch) 时直接取包上的属性
+    """
+    package = sys.modules["ccxt"]
+    attr = package.__dict__.get(name)
+    if attr is not None and not isinstance(attr, types.ModuleType):
+        return attr
+    return getattr(importlib.import_module(f"ccxt.{name}"), name)
+
+__all__ = ["Exchange", "errors", "exchange_class"]
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+class MarketCache:
+    """
+    交易对元数据 (load_markets 的结果) 缓存
+    内存中保存一份，可选持久化到磁盘，超过 ttl 后视为过期
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._markets: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        :return: 未过期的 markets，没有或已过期时返回 None
+        """
+        if self._markets is None and self.path:
+            self._load_from_disk()
+        if self._markets is not None and time.time() - self._loaded_at < self.ttl_seconds:
+            return self._markets
+        return None
+
+    def seed(self, markets: Dict[str, Any], loaded_at: float):
+        """用外部保存的 markets 初始化 (例如启动快照)，保留原始加载时间以便按 ttl 过期"""
+        if self._markets is None or loaded_at > self._loaded_at:
+            self._markets = markets
+            self._loaded_at = loaded_at
+
+    def peek(self) -> Tuple[Optional[Dict[str, Any]], float]:
+        """:return: (内存中的 markets, 加载时间)，不检查是否过期"""
+        return self._markets, self._loaded_at
+
+    def put(self, markets: Dict[str, Any]):
+        self._markets = markets
+        self._loaded_at = time.time()
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 先写临时文件再替换，避免进程中断留下半个文件
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"saved_at": self._loaded_at, "markets": markets}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to persist markets cache to {self.path}: {e}")
+
+    def _load_from_disk(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._markets = data["markets"]
+            self._loaded_at = float(data["saved_at"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable markets cache {self.path}: {e}")
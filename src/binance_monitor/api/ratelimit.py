@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from loguru import logger
+
+# 币安现货 REST 接口的请求权重 (https://developers.binance.com/docs/binance-spot-api-docs/rest-api)
+ENDPOINT_WEIGHTS = {
+    "klines": 2,
+    "ticker": 2,
+    "tickers": 80,
+    "markets": 20,
+    "time": 1,
+}
+
+USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+
+class TokenBucket:
+    """令牌桶，capacity 为桶容量，rate 为每秒补充的令牌数"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """距离能够支付 cost 还需要等待的秒数"""
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost: float):
+        self._refill()
+        self.tokens -= cost
+
+    def available(self) -> float:
+        self._refill()
+        return max(0.0, self.tokens)
+
+    def clamp(self, available: float):
+        """根据服务端反馈收紧本地估计"""
+        self._refill()
+        self.tokens = min(self.tokens, available)
+
+class WeightLimiter:
+    """
+    币安请求权重调度器
+    - 所有请求共享一个按分钟权重上限补充的令牌桶，另外每类 endpoint 可单独设置每分钟配额
+    - 每次响应后用 x-mbx-used-weight-1m 校正本地估计，接近上限时主动暂停到下一分钟，而不是等到 429/418
+    - 被限流时按 Retry-After 暂停所有请求
+    线程安全，并发扫描的各线程在发请求前调用 acquire
+    """
+
+    def __init__(self, weight_limit: int = 6000, safety_ratio: float = 0.9,
+                 class_limits: Optional[Mapping[str, int]] = None):
+        """
+        :param weight_limit: 币安每分钟权重上限
+        :param safety_ratio: 只使用上限的这一比例，给其他进程/突发留余量
+        :param class_limits: 每类 endpoint 每分钟的权重配额，例如 {"tickers": 800}
+        """
+        self.weight_limit = weight_limit
+        self.budget = weight_limit * safety_ratio
+        self._cond = threading.Condition()
+        self._bucket = TokenBucket(self.budget, self.budget / 60)
+        self._class_buckets = {
+            name: TokenBucket(limit, limit / 60) for name, limit in (class_limits or {}).items()
+        }
+        self._paused_until = 0.0
+        self.used_weight = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self, endpoint: str, weight: Optional[int] = None):
+        """阻塞直到预算允许发出该请求"""
+        cost = weight if weight is not None else ENDPOINT_WEIGHTS.get(endpoint, 1)
+        class_bucket = self._class_buckets.get(endpoint)
+        started = None
+
+        with self._cond:
+            while True:
+                wait = max(
+                    self._paused_until - time.monotonic(),
+                    self._bucket.wait_time(cost),
+                    class_bucket.wait_time(cost) if class_bucket else 0.0,
+                )
+                if wait <= 0:
+                    break
+                started = started or time.monotonic()
+                self._cond.wait(wait)
+
+            self._bucket.consume(cost)
+            if class_bucket:
+                class_bucket.consume(cost)
+            if started is not None:
+                self.waited_seconds += time.monotonic() - started
+
+    def observe(self, headers: Optional[Mapping[str, Any]]):
+        """用响应头中服务端统计的已用权重校正本地预算"""
+        if not headers:
+            return
+        value = None
+        for key, item in headers.items():
+            if key.lower() == USED_WEIGHT_HEADER:
+                value = item
+                break
+        if value is None:
+            return
+
+        try:
+            used = int(value)
+        except (TypeError, ValueError):
+            return
+
+        with self._cond:
+            self.used_weight = used
+            self._bucket.clamp(self.budget - used)
+            if used >= self.budget:
+                # 币安按自然分钟统计权重，暂停到下一分钟开始
+                pause = 60 - time.time() % 60
+                self._pause(pause)
+                logger.warning(f"Request weight {used}/{self.weight_limit} near limit, pausing {pause:.1f}s")
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """收到 429/418 时调用，按 Retry-After 暂停 (缺省暂停到下一分钟)"""
+        pause = retry_after if retry_after is not None else 60 - time.time() % 60
+        with self._cond:
+            self._pause(pause)
+            self._bucket.clamp(0)
+        logger.warning(f"Rate limited by Binance, pausing requests for {pause:.1f}s")
+
+    def _pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def headroom(self) -> Dict[str, float]:
+        """
+        当前预算余量
+        :return: used_weight 为服务端最近一次报告的已用权重，remaining 为本分钟剩余权重，
+                 available 为本地令牌桶中立即可用的权重
+        """
+        with self._cond:
+            return {
+                "used_weight": self.used_weight,
+                "weight_limit": self.weight_limit,
+                "remaining": max(0, self.weight_limit - self.used_weight),
+                "available": self._bucket.available(),
+                "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+                "waited_seconds": self.waited_seconds,
+            }
@@ -0,0 +1,215 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from binance_monitor.api.exchange import errors
+from binance_monitor.config import ResilienceConfig
+from binance_monitor.utils.metrics import metrics
+
+class CircuitOpenError(Exception):
+    """熔断中，请求未发出"""
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, (errors.DDoSProtection, errors.RateLimitExceeded))
+
+def is_transient(error: Exception) -> bool:
+    """
+    可以重试的错误: 超时、断线、交易所不可用 (ccxt.NetworkError 及其子类)
+    限流 (429/418) 不在此列: 权重调度器已经按 Retry-After 暂停所有请求，立即重试只会占用扫描时间
+    """
+    return isinstance(error, errors.NetworkError) and not is_rate_limited(error)
+
+class CircuitBreaker:
+    """
+    连续失败 failures 次后打开，reset_seconds 后进入半开状态放行一次试探请求:
+    试探成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, name: str, failures: int, reset_seconds: float):
+        self.name = name
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            # 半开: 只放行一个试探请求
+            self._trial = True
+            return True
+
+    def release(self):
+        """放弃已获得的试探机会 (请求最终没有发出)"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit {self.name} closed")
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or (self._opened_at is None and self._consecutive >= self.failures):
+                if self._opened_at is None:
+                    logger.warning(f"Circuit {self.name} opened after {self._consecutive} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+class LatencyTracker:
+    """最近若干次成功请求的耗时，用于估计对冲等待时间"""
+
+    def __init__(self, size: int = 256):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+class Resilience:
+    """
+    包在每次交易所调用外层: 熔断检查 -> (对冲) 请求 -> 网络类错误按抖动的指数退避重试
+    熔断器按交易对和接口分别统计: 交易对的任何错误都计入 (例如已下架)，接口只计网络类错误
+    """
+
+    def __init__(self, config: ResilienceConfig, hedge: Optional[bool] = None):
+        """:param hedge: 覆盖 config.hedge (录制/回放时必须关闭)"""
+        self.config = config
+        self.hedge = config.hedge if hedge is None else hedge
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(
+                    name, self.config.breaker_failures, self.config.breaker_reset_seconds
+                )
+            return breaker
+
+    def open_circuits(self) -> list:
+        with self._lock:
+            return sorted(name for name, breaker in self._breakers.items() if breaker.is_open)
+
+    def _tracker(self, endpoint: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latency.get(endpoint)
+            if tracker is None:
+                tracker = self._latency[endpoint] = LatencyTracker()
+            return tracker
+
+    def call(self, endpoint: str, symbol: Optional[str], send: Callable[[], object]):
+        """
+        :param symbol: 请求针对的交易对，为空时只使用接口熔断器
+        :param send: 发出一次请求的函数
+        """
+        endpoint_breaker = self.breaker(f"endpoint:{endpoint}")
+        symbol_breaker = self.breaker(f"symbol:{symbol}") if symbol else None
+        allowed = []
+        for breaker in filter(None, (endpoint_breaker, symbol_breaker)):
+            if not breaker.allow():
+                for other in allowed:
+                    other.release()
+                metrics.circuit_rejections.labels(breaker.name.split(":", 1)[0]).inc()
+                raise CircuitOpenError(f"Circuit {breaker.name} is open")
+            allowed.append(breaker)
+
+        config = self.config
+        deadline = time.monotonic() + config.request_budget_seconds
+        tracker = self._tracker(endpoint)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                result = self._hedged(send, tracker) if self.hedge and endpoint == "klines" else send()
+            except Exception as e:
+                transient = is_transient(e)
+                delay = random.uniform(0, min(config.retry_max_delay_seconds, config.retry_base_delay_seconds * 2 ** attempt))
+                if transient and attempt < config.max_retries and time.monotonic() + delay < deadline:
+                    attempt += 1
+                    metrics.request_retries.labels(endpoint).inc()
+                    logger.debug(f"Retrying {endpoint} {symbol or ''} in {delay:.2f}s after {type(e).__name__}: {e}")
+                    time.sleep(delay)
+                    continue
+                # 每次调用最终失败计一次；限流与交易对、接口是否可用无关，非网络错误说明接口本身可用
+                if is_rate_limited(e):
+                    for breaker in allowed:
+                        breaker.release()
+                    raise
+                if transient:
+                    endpoint_breaker.record_failure()
+                else:
+                    endpoint_breaker.record_success()
+                if symbol_breaker is not None:
+                    symbol_breaker.record_failure()
+                raise
+
+            tracker.add(time.monotonic() - start)
+            endpoint_breaker.record_success()
+            if symbol_breaker is not None:
+                symbol_breaker.record_success()
+            return result
+
+    def _hedged(self, send: Callable[[], object], tracker: LatencyTracker):
+        """主请求在 P95 延迟内未返回时再发一个相同请求，取先成功的结果"""
+        delay = tracker.quantile(self.config.hedge_quantile, self.config.hedge_min_samples)
+        if delay is None:
+            return send()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+            pool = self._pool
+
+        primary = pool.submit(send)
+        done, _ = wait([primary], timeout=max(delay, self.config.hedge_min_delay_seconds))
+        if done:
+            return primary.result()
+
+        hedge = pool.submit(send)
+        metrics.hedged_requests.labels("sent").inc()
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.hedged_requests.labels("won").inc()
+                    return future.result()
+                if error is None or future is primary:
+                    error = future.exception()
+        raise error
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+INDEX_FILE = "index.json"
+MARKETS_FILE = "markets.json"
+
+class WarmSnapshot:
+    """
+    启动快照: 上一个进程退出时保存的 markets 和各交易对最近的K线，供下一个进程秒级启动
+    K线保存为一个 .npy 文件，启动时以 mmap 方式打开，只有真正用到的交易对才会读入内存；
+    接口与 KlineCache 相同 (state / upsert / load)，BinanceClient 用它做增量拉取
+
+    目录结构:
+        index.json       {saved_at, candles_file, pairs: [[symbol, timeframe, start, stop], ...]}
+        candles-*.npy    (n, 6) float64，各交易对按时间正序首尾相接
+        markets.json     {saved_at, markets}，与 MarketCache 的磁盘格式相同
+    """
+
+    def __init__(self, path: str, max_candles: int = 1000):
+        self.path = path
+        self.max_candles = max_candles
+        self.markets: Optional[Dict[str, Any]] = None
+        self.markets_saved_at = 0.0
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], np.ndarray] = {}
+        self._candles_file: Optional[str] = None
+        self._load()
+
+    def _load(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index["pairs"]:
+                self._candles_file = index["candles_file"]
+                candles = np.load(os.path.join(self.path, self._candles_file), mmap_mode='r')
+                for symbol, timeframe, start, stop in index["pairs"]:
+                    self._series[(symbol, timeframe)] = candles[start:stop]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable warm-start snapshot {self.path}: {e}")
+            self._series = {}
+
+        markets_path = os.path.join(self.path, MARKETS_FILE)
+        if os.path.exists(markets_path):
+            try:
+                with open(markets_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.markets = data["markets"]
+                self.markets_saved_at = float(data["saved_at"])
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable markets snapshot: {e}")
+
+    def state(self, symbol: str, timeframe: str) -> Tuple[int, Optional[int]]:
+        """:return: (已缓存数量, 最新一根 K 线的时间戳)"""
+        with self._lock:
+            rows = self._series.get((symbol, timeframe))
+        if rows is None or not len(rows):
+            return 0, None
+        return len(rows), int(rows[-1, 0])
+
+    def upsert(self, symbol: str, timeframe: str, ohlcv: Sequence[Sequence[float]], replace: bool = False):
+        """
+        合并新K线，时间戳相同的以新数据为准，只保留最新的 max_candles 根
+        :param replace: 丢弃该交易对已有的K线，与 KlineCache.upsert 相同
+        """
+        if not len(ohlcv):
+            return
+        new = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        with self._lock:
+            old = None if replace else self._series.get((symbol, timeframe))
+            if old is not None and len(old):
+                # 旧数据中比新数据最早一根更早的部分保留 (K线按时间正序)
+                keep = old[old[:, 0] < new[:, 0].min()]
+                merged = np.concatenate([keep, new])
+            else:
+                merged = new
+            if len(merged) > 1 and not np.all(merged[1:, 0] > merged[:-1, 0]):
+                _, index = np.unique(merged[::-1, 0], return_index=True)
+                merged = merged[::-1][index]
+            self._series[(symbol, timeframe)] = merged[-self.max_candles:]
+
+    def load(self, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+        """
+        最新的 limit 根 K 线
+        :return: (n, 6) 数组，按时间正序 (未修改过的交易对直接是 mmap 上的视图)
+        """
+        with self._lock:
+            rows = self._series.get((symbol, timeframe))
+        if rows is None:
+            return np.empty((0, 6))
+        return rows[-limit:]
+
+    def set_markets(self, markets: Optional[Dict[str, Any]], saved_at: float):
+        self.markets = markets
+        self.markets_saved_at = saved_at
+
+    def save(self):
+        """写入新的快照: 先写K线文件，再原子替换 index.json，最后删除旧的K线文件"""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            items = list(self._series.items())
+
+        pairs = []
+        offset = 0
+        for (symbol, timeframe), rows in items:
+            pairs.append([symbol, timeframe, offset, offset + len(rows)])
+            offset += len(rows)
+        candles_file = f"candles-{time.time_ns()}.npy"
+        candles = np.concatenate([rows for _, rows in items]) if items else np.empty((0, 6))
+        np.save(os.path.join(self.path, candles_file), candles)
+
+        self._replace(INDEX_FILE, json.dumps({
+            "saved_at": time.time(),
+            "candles_file": candles_file,
+            "pairs": pairs,
+        }).encode('utf-8'))
+        if self.markets is not None:
+            self._replace(MARKETS_FILE, json.dumps(
+                {"saved_at": self.markets_saved_at, "markets": self.markets}
+            ).encode('utf-8'))
+
+        # 旧文件可能仍被 mmap 引用，Linux 上删除后映射依然有效
+        for name in os.listdir(self.path):
+            if name.startswith("candles-") and name != candles_file:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        self._candles_file = candles_file
+
+    def _replace(self, name: str, data: bytes):
+        tmp_path = os.path.join(self.path, f"{name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+    def close(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Failed to save warm-start snapshot to {self.path}: {e}")
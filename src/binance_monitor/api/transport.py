@@ -0,0 +1,124 @@
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from binance_monitor.api.exchange import errors
+
+class ReplayMissError(LookupError):
+    """回放存档中没有对应的请求"""
+
+def request_key(endpoint: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """
+    请求的匹配键: 接口类别 + 参数，不含 since
+    since 由当前时间推算 (分页、增量拉取)，回放时会不同；同一键的多次请求按录制顺序返回
+    """
+    params = {k: v for k, v in kwargs.items() if k != 'since'}
+    return json.dumps([endpoint, list(args), params], sort_keys=True, separators=(',', ':'))
+
+class RecordingTransport:
+    """
+    录制模式: 照常请求交易所，把每个响应 (或异常) 追加到 gzip 压缩的 JSON Lines 存档
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def call(self, endpoint: str, args: tuple, kwargs: Dict[str, Any], send: Callable[[], Any]) -> Any:
+        entry: Dict[str, Any] = {"key": request_key(endpoint, args, kwargs)}
+        start = time.monotonic()
+        try:
+            result = send()
+            entry["result"] = result
+            return result
+        except Exception as e:
+            entry["error"] = [type(e).__name__, str(e)]
+            raise
+        finally:
+            entry["elapsed"] = time.monotonic() - start
+            self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                logger.info(f"Recorded {self.count} exchange responses to {self.path}")
+
+class ReplayTransport:
+    """
+    回放模式: 不访问网络，从存档中按请求键依次返回录制的响应，录制时的异常按原类型重新抛出
+    同一键的录制用完后重复返回最后一条
+    """
+
+    def __init__(self, path: str, latency_scale: float = 0.0):
+        """
+        :param latency_scale: 按录制耗时的倍数模拟延迟，0 表示不等待 (内存速度)
+        """
+        self.path = path
+        self.latency_scale = latency_scale
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+        logger.info(f"Loaded {sum(len(q) for q in self._entries.values())} recorded responses from {path}")
+
+    def call(self, endpoint: str, args: tuple, kwargs: Dict[str, Any], send: Callable[[], Any]) -> Any:
+        key = request_key(endpoint, args, kwargs)
+        with self._lock:
+            queue = self._entries.get(key)
+            if not queue:
+                raise ReplayMissError(f"No recorded response for {endpoint} {tuple(args)} {kwargs}")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+
+        if self.latency_scale:
+            time.sleep(entry.get("elapsed", 0.0) * self.latency_scale)
+
+        if "error" in entry:
+            name, message = entry["error"]
+            error_cls = getattr(errors, name, None)
+            if not (isinstance(error_cls, type) and issubclass(error_cls, Exception)):
+                error_cls = RuntimeError
+            raise error_cls(message)
+        return entry["result"]
+
+    def close(self):
+        pass
+
+def open_transport(mode: str, path: Optional[str], latency_scale: float = 0.0):
+    """
+    :param mode: live / record / replay
+    :return: live 模式返回 None
+    """
+    if mode == "live":
+        return None
+    if not path:
+        raise ValueError(f"transport_path is required in {mode} mode")
+    if mode == "record":
+        return RecordingTransport(path)
+    if mode == "replay":
+        return ReplayTransport(path, latency_scale)
+    raise ValueError(f"Unknown transport mode: {mode}")
@@ -0,0 +1,11 @@
+from .loader import discover_datasets, load_ohlcv
+from .runner import Backtester, BacktestReport, HorizonStats, scan_pinbars
+
+__all__ = [
+    "Backtester",
+    "BacktestReport",
+    "HorizonStats",
+    "discover_datasets",
+    "load_ohlcv",
+    "scan_pinbars"
+]
@@ -0,0 +1,28 @@
+import argparse
+from loguru import logger
+from binance_monitor.backtest import Backtester
+
+def main():
+    parser = argparse.ArgumentParser(description="Pinbar 策略历史回测")
+    parser.add_argument("--data-dir", required=True, help="历史数据目录: <data_dir>/<SYMBOL>/<timeframe>.csv")
+    parser.add_argument("--symbols", nargs="*", help="只回测这些交易对，默认全部")
+    parser.add_argument("--timeframes", nargs="*", help="只回测这些周期，默认全部")
+    parser.add_argument("--horizons", nargs="*", type=int, default=[1, 5, 10], help="前向收益的持有K线数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--output", help="把完整报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    report = Backtester(args.data_dir, horizons=args.horizons, workers=args.workers).run(args.symbols, args.timeframes)
+
+    logger.info(f"Pinbars: {report.signals}, priority: {report.priority_signals} ({report.priority_ratio:.1%})")
+    for group, stats in report.horizons.items():
+        for s in stats:
+            logger.info(f"[{group}] +{s.horizon} bars: n={s.signals}, hit rate={s.hit_rate:.1%}, mean return={s.mean_return:.4%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report.model_dump_json(indent=2))
+        logger.info(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import glob
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from binance_monitor.core.archive import ArchiveFile
+
+def symbol_dirname(symbol: str) -> str:
+    """'BTC/USDT' -> 'BTCUSDT'"""
+    return symbol.replace('/', '')
+
+def discover_datasets(data_dir: str, symbols: Optional[Sequence[str]] = None,
+                      timeframes: Optional[Sequence[str]] = None) -> List[Tuple[str, str, List[str]]]:
+    """
+    扫描本地历史数据目录，布局为 <data_dir>/<SYMBOL>/<timeframe>.csv (或 .npy、K线存档 .bin)
+    同一周期可以拆成多个文件，例如币安公开数据的按月文件 <timeframe>-2023-01.csv
+    :param symbols: 只加载这些交易对 (如 'BTC/USDT' 或 'BTCUSDT')，为空则全部
+    :param timeframes: 只加载这些周期，为空则全部
+    :return: [(symbol 目录名, timeframe, 文件列表), ...]
+    """
+    wanted = {symbol_dirname(s) for s in symbols} if symbols else None
+    datasets: Dict[Tuple[str, str], List[str]] = {}
+
+    for symbol in sorted(os.listdir(data_dir)):
+        symbol_dir = os.path.join(data_dir, symbol)
+        if not os.path.isdir(symbol_dir) or (wanted is not None and symbol not in wanted):
+            continue
+        for path in sorted(glob.glob(os.path.join(symbol_dir, "*"))):
+            name, ext = os.path.splitext(os.path.basename(path))
+            if ext not in (".csv", ".npy", ".bin"):
+                continue
+            timeframe = name.split("-", 1)[0]
+            if timeframes and timeframe not in timeframes:
+                continue
+            datasets.setdefault((symbol, timeframe), []).append(path)
+
+    return [(symbol, timeframe, paths) for (symbol, timeframe), paths in sorted(datasets.items())]
+
+def load_ohlcv(paths: Sequence[str]) -> np.ndarray:
+    """
+    读取并合并 OHLCV 文件，前 6 列为 timestamp, open, high, low, close, volume (与 ccxt 一致)
+    CSV 可以带表头，多出的列会被忽略
+    :return: 形状 (n, 6) 的 float64 数组，按时间正序且时间戳唯一
+    """
+    parts = []
+    for path in paths:
+        if path.endswith(".npy"):
+            data = np.load(path)
+        elif path.endswith(".bin"):
+            data = ArchiveFile(path).to_ohlcv()
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                first = f.readline()
+            skip = 0 if first[:1].isdigit() else 1
+            data = np.loadtxt(path, delimiter=",", skiprows=skip, usecols=range(6), ndmin=2)
+        parts.append(np.asarray(data, dtype=np.float64)[:, :6])
+
+    if not parts:
+        return np.empty((0, 6), dtype=np.float64)
+
+    data = np.concatenate(parts) if len(parts) > 1 else parts[0]
+    _, unique = np.unique(data[:, 0], return_index=True)
+    return data[unique]
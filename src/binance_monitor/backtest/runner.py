@@ -0,0 +1,162 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from binance_monitor.backtest.loader import discover_datasets, load_ohlcv
+from binance_monitor.core.detectors import FeatureSet, PinbarDetector
+
+# 与 StrategyAnalyzer 相同的上下文长度
+CONTEXT_BARS = 40
+
+GROUPS = ("all", "priority")
+
+class HorizonStats(BaseModel):
+    """某个持有周期的前向收益统计，收益已按信号方向调整 (看涨做多, 看跌做空)"""
+    horizon: int = Field(..., description="信号K线收盘后持有的K线数")
+    signals: int = Field(0, description="有足够后续数据的信号数")
+    hit_rate: float = Field(0.0, description="方向正确 (调整后收益 > 0) 的比例")
+    mean_return: float = Field(0.0, description="平均调整后收益")
+
+class DatasetSummary(BaseModel):
+    symbol: str
+    timeframe: str
+    bars: int
+    signals: int
+    priority_signals: int
+
+class BacktestReport(BaseModel):
+    """回测报告"""
+    bars: int = 0
+    signals: int = 0
+    priority_signals: int = 0
+    priority_ratio: float = Field(0.0, description="重点信号占全部 Pinbar 的比例")
+    horizons: Dict[str, List[HorizonStats]] = Field(default_factory=dict, description="按 all / priority 分组的前向收益")
+    datasets: List[DatasetSummary] = Field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+def scan_pinbars(ohlcv: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    在整段历史上逐根滑动 StrategyAnalyzer 的规则 (每根K线以其之前 40 根为上下文)
+    :param ohlcv: 形状 (n, 6)，按时间正序
+    :return: (Pinbar 所在下标, 主影线是否向上, 是否重点)
+    """
+    n = len(ohlcv)
+    if n <= CONTEXT_BARS:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, np.empty(0, dtype=bool), np.empty(0, dtype=bool)
+
+    # 第 i 根连同之前 40 根组成一行，按时间倒序排列成检测器使用的 (n - 40, 41, 4) 矩阵 (视图，不复制)
+    windows = sliding_window_view(ohlcv[:, 1:5], CONTEXT_BARS + 1, axis=0)
+    ohlc = windows.transpose(0, 2, 1)[:, ::-1]
+
+    is_pinbar, direction, is_priority = PinbarDetector().detect(FeatureSet(ohlc))
+    index = np.flatnonzero(is_pinbar)
+    return index + CONTEXT_BARS, direction[index] == 1, is_priority[index]
+
+def backtest_dataset(symbol: str, timeframe: str, paths: Sequence[str], horizons: Sequence[int]) -> Dict[str, Any]:
+    """
+    回测单个 (symbol, timeframe)，在子进程中执行
+    :return: 可直接累加的计数与求和，避免把明细传回主进程
+    """
+    data = load_ohlcv(paths)
+    index, is_up, is_priority = scan_pinbars(data)
+    close = data[:, 4]
+    # 主影线向下 (锤子线) 看涨，向上 (射击之星) 看跌
+    side = np.where(is_up, -1.0, 1.0)
+
+    totals: Dict[str, Dict[int, List[float]]] = {group: {} for group in GROUPS}
+    for horizon in horizons:
+        valid = index + horizon < len(close)
+        entry = index[valid]
+        adjusted = (close[entry + horizon] / close[entry] - 1.0) * side[valid]
+        for group, mask in (("all", slice(None)), ("priority", is_priority[valid])):
+            returns = adjusted[mask]
+            totals[group][horizon] = [len(returns), int(np.count_nonzero(returns > 0)), float(returns.sum())]
+
+    return {
+        "summary": DatasetSummary(
+            symbol=symbol,
+            timeframe=timeframe,
+            bars=len(data),
+            signals=len(index),
+            priority_signals=int(np.count_nonzero(is_priority)),
+        ),
+        "totals": totals,
+    }
+
+class Backtester:
+    """
+    历史回测：从本地文件加载多个交易对/周期的K线，用与实盘相同的规则扫描每一根K线，
+    统计信号数量、重点信号比例以及 N 根K线后的前向收益
+    """
+
+    def __init__(self, data_dir: str, horizons: Sequence[int] = (1, 5, 10), workers: Optional[int] = None):
+        """
+        :param data_dir: 历史数据目录，见 discover_datasets
+        :param horizons: 统计前向收益的持有K线数
+        :param workers: 进程数，默认为 CPU 核数
+        """
+        self.data_dir = data_dir
+        self.horizons = sorted(set(horizons))
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, symbols: Optional[Sequence[str]] = None, timeframes: Optional[Sequence[str]] = None) -> BacktestReport:
+        started = time.perf_counter()
+        datasets = discover_datasets(self.data_dir, symbols, timeframes)
+        logger.info(f"Backtesting {len(datasets)} datasets from {self.data_dir} with {self.workers} workers")
+
+        args = [
+            [symbol for symbol, _, _ in datasets],
+            [timeframe for _, timeframe, _ in datasets],
+            [paths for _, _, paths in datasets],
+            [self.horizons] * len(datasets),
+        ]
+        if self.workers <= 1 or len(datasets) <= 1:
+            outputs = list(map(backtest_dataset, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunksize = max(1, len(datasets) // (self.workers * 4))
+                outputs = list(pool.map(backtest_dataset, *args, chunksize=chunksize))
+
+        report = self._merge(outputs)
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Backtest finished in {report.elapsed_seconds:.2f}s: {report.bars} bars, "
+            f"{report.signals} pinbars, {report.priority_signals} priority"
+        )
+        return report
+
+    def _merge(self, outputs: List[Dict[str, Any]]) -> BacktestReport:
+        report = BacktestReport()
+        sums = {group: {h: [0, 0, 0.0] for h in self.horizons} for group in GROUPS}
+
+        for output in outputs:
+            summary = output["summary"]
+            report.datasets.append(summary)
+            report.bars += summary.bars
+            report.signals += summary.signals
+            report.priority_signals += summary.priority_signals
+            for group in GROUPS:
+                for horizon, values in output["totals"][group].items():
+                    for i, value in enumerate(values):
+                        sums[group][horizon][i] += value
+
+        if report.signals:
+            report.priority_ratio = report.priority_signals / report.signals
+        for group in GROUPS:
+            report.horizons[group] = [
+                HorizonStats(
+                    horizon=horizon,
+                    signals=count,
+                    hit_rate=hits / count if count else 0.0,
+                    mean_return=total / count if count else 0.0,
+                )
+                for horizon, (count, hits, total) in sums[group].items()
+            ]
+        return report
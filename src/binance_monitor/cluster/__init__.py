@@ -0,0 +1,13 @@
+from .broker import BrokerState, connect_broker, serve_broker
+from .coordinator import ClusterCoordinator
+from .ring import HashRing
+from .worker import ClusterWorker
+
+__all__ = [
+    "BrokerState",
+    "ClusterCoordinator",
+    "ClusterWorker",
+    "HashRing",
+    "connect_broker",
+    "serve_broker"
+]
@@ -0,0 +1,73 @@
+import argparse
+import multiprocessing
+import socket
+from loguru import logger
+from binance_monitor.config import load_config
+from binance_monitor.notification import EmailNotifier, NotificationManager
+from binance_monitor.utils.metrics import metrics
+from binance_monitor.utils.tracing import tracer
+from binance_monitor.cluster import ClusterCoordinator, ClusterWorker, connect_broker, serve_broker
+
+def run_coordinator(config_path: str, workers: int = 0):
+    """启动 broker 和协调者，workers > 0 时在本机再启动这么多个 worker 进程"""
+    config = load_config(config_path)
+    cluster = config.cluster
+    address = (cluster.broker_host, cluster.broker_port)
+    manager = serve_broker(address, cluster.authkey.encode())
+    logger.info(f"Broker listening on {address[0]}:{address[1]}")
+
+    processes = []
+    for i in range(workers):
+        # 非 daemon: worker 启用 analysis_workers 时还要创建自己的分析进程池，退出时显式终止
+        process = multiprocessing.Process(target=run_worker, args=(config_path, f"local-{i}"), name=f"worker-{i}")
+        process.start()
+        processes.append(process)
+
+    notification_manager = NotificationManager(config.notification)
+    notification_manager.add_notifier(EmailNotifier(config.email))
+    metrics.serve(config.metrics)
+    tracer.configure(config.tracing)
+    coordinator = ClusterCoordinator(config, notification_manager, manager.broker())
+    try:
+        coordinator.start()
+    finally:
+        notification_manager.shutdown()
+        coordinator.close()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        manager.shutdown()
+
+def run_worker(config_path: str, worker_id: str):
+    config = load_config(config_path)
+    cluster = config.cluster
+    broker = connect_broker((cluster.broker_host, cluster.broker_port), cluster.authkey.encode())
+    worker = ClusterWorker(config, broker, worker_id)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="分片扫描: 一个协调者 + 多个 worker")
+    parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="启动 broker 和协调者")
+    coordinator.add_argument("--local-workers", type=int, default=0, help="同时在本机启动的 worker 进程数")
+
+    worker = sub.add_parser("worker", help="连接协调者的 broker 并领取分片")
+    worker.add_argument("--id", default=None, help="worker 标识，默认 <主机名>-<进程号>")
+    args = parser.parse_args()
+
+    try:
+        if args.role == "coordinator":
+            run_coordinator(args.config, args.local_workers)
+        else:
+            run_worker(args.config, args.id or f"{socket.gethostname()}-{multiprocessing.current_process().pid}")
+    except KeyboardInterrupt:
+        logger.info("Cluster node stopped by user.")
+
+if __name__ == "__main__":
+    main()
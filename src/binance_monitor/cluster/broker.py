@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Optional, Tuple
+
+class BrokerState:
+    """
+    协调者与 worker 之间的消息中转 (本地消息队列的替代品)
+    每个 worker 一个任务队列，所有 worker 共用一个结果队列；worker 定期心跳，
+    时间以 broker 所在进程为准，不依赖各主机的时钟
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, "queue.Queue"] = {}
+        self._results: "queue.Queue" = queue.Queue()
+        self._heartbeats: Dict[str, float] = {}
+
+    def register(self, worker_id: str):
+        with self._lock:
+            self._tasks.setdefault(worker_id, queue.Queue())
+            self._heartbeats[worker_id] = time.monotonic()
+
+    def heartbeat(self, worker_id: str):
+        with self._lock:
+            if worker_id in self._heartbeats:
+                self._heartbeats[worker_id] = time.monotonic()
+
+    def unregister(self, worker_id: str):
+        """移除 worker 并丢弃它尚未领取的任务"""
+        with self._lock:
+            self._heartbeats.pop(worker_id, None)
+            self._tasks.pop(worker_id, None)
+
+    def workers(self) -> Dict[str, float]:
+        """:return: {worker_id: 距离上次心跳的秒数}"""
+        now = time.monotonic()
+        with self._lock:
+            return {worker_id: now - ts for worker_id, ts in self._heartbeats.items()}
+
+    def put_task(self, worker_id: str, task: Dict[str, Any]):
+        with self._lock:
+            tasks = self._tasks.setdefault(worker_id, queue.Queue())
+        tasks.put(task)
+
+    def get_task(self, worker_id: str, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """领取任务；worker 已被移除时返回 None，worker 应重新 register"""
+        with self._lock:
+            tasks = self._tasks.get(worker_id)
+        if tasks is None:
+            return None
+        try:
+            return tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def is_registered(self, worker_id: str) -> bool:
+        with self._lock:
+            return worker_id in self._heartbeats
+
+    def put_result(self, result: Dict[str, Any]):
+        self._results.put(result)
+
+    def get_result(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+_state: Optional[BrokerState] = None
+
+def _get_state() -> BrokerState:
+    global _state
+    if _state is None:
+        _state = BrokerState()
+    return _state
+
+class BrokerManager(BaseManager):
+    """通过 multiprocessing.managers 把 BrokerState 暴露给本机或其他主机上的进程"""
+
+BrokerManager.register("broker", callable=_get_state)
+
+def serve_broker(address: Tuple[str, int], authkey: bytes) -> BrokerManager:
+    """在后台进程中启动 broker，返回已启动的 manager"""
+    manager = BrokerManager(address=address, authkey=authkey)
+    manager.start()
+    return manager
+
+def connect_broker(address: Tuple[str, int], authkey: bytes, timeout: float = 30.0):
+    """
+    连接 broker，启动期间连接失败时重试直到 timeout
+    :return: BrokerState 代理
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        manager = BrokerManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.broker()
+        except (ConnectionError, OSError):
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
@@ -0,0 +1,104 @@
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from binance_monitor.config import AppConfig
+from binance_monitor.core.engine import MonitorEngine
+from binance_monitor.notification.manager import NotificationManager
+from binance_monitor.cluster.ring import HashRing
+
+class ClusterCoordinator(MonitorEngine):
+    """
+    协调者: 不自己拉取K线，而是把交易对按 symbol 一致性哈希分给在线 worker，
+    收集各 worker 的分析结果后合并成一份报告 (去重、通知与单机模式相同)。
+    等待结果期间 worker 心跳超时则把它从哈希环上移除，它未完成的交易对重新分配给其他 worker
+    """
+
+    LOCAL_ANALYSIS = False
+
+    def __init__(self, config: AppConfig, notification_manager: NotificationManager, broker):
+        super().__init__(config, notification_manager)
+        self.broker = broker
+        self.cluster = config.cluster
+        self._jobs = itertools.count(1)
+        self._shards = itertools.count(1)
+        self._worker_headroom: Dict[str, Optional[Dict[str, float]]] = {}
+
+    def live_workers(self) -> List[str]:
+        timeout = self.cluster.worker_timeout_seconds
+        return sorted(worker for worker, age in self.broker.workers().items() if age <= timeout)
+
+    def _prepare_scan(self) -> bool:
+        """等待至少一个 worker 在线"""
+        deadline = time.monotonic() + self.cluster.worker_timeout_seconds
+        while not self.live_workers():
+            if time.monotonic() >= deadline:
+                logger.error("No live workers, skipping this run.")
+                return False
+            time.sleep(self.cluster.heartbeat_seconds)
+        return True
+
+    def _log_headroom(self):
+        for worker, headroom in sorted(self._worker_headroom.items()):
+            if headroom:
+                logger.info(f"[{worker}] request weight used {headroom['used_weight']}/{headroom['weight_limit']}")
+
+    def _scan_pairs(self, pairs):
+        """
+        分发一组 (symbol, timeframe) 给 worker 并等待结果
+        同一 symbol 的所有周期分给同一个 worker，便于其在本地聚合周期、复用缓存
+        :return: 与 pairs 顺序一致的分析结果列表，失败或超时的交易对为 None
+        """
+        job_id = next(self._jobs)
+        by_symbol: Dict[str, List[Tuple[str, str]]] = {}
+        for symbol, timeframe in pairs:
+            by_symbol.setdefault(symbol, []).append((symbol, timeframe))
+
+        ring = HashRing(self.live_workers(), replicas=self.cluster.replicas)
+        # shard_id -> (worker, symbols)
+        pending: Dict[int, Tuple[str, List[str]]] = {}
+
+        def dispatch(symbols):
+            for worker, shard_symbols in ring.assign(symbols).items():
+                shard_id = next(self._shards)
+                pending[shard_id] = (worker, shard_symbols)
+                shard_pairs = [pair for symbol in shard_symbols for pair in by_symbol[symbol]]
+                self.broker.put_task(worker, {"job": job_id, "shard": shard_id, "pairs": shard_pairs})
+
+        dispatch(list(by_symbol))
+        logger.info(f"Job {job_id}: dispatched {len(pairs)} pairs to {len(ring.nodes)} workers")
+
+        collected: Dict[Tuple[str, str], Any] = {}
+        deadline = time.monotonic() + self.cluster.job_timeout_seconds
+        while pending and time.monotonic() < deadline:
+            result = self.broker.get_result(timeout=self.cluster.heartbeat_seconds)
+            if result is not None:
+                if result.get("job") == job_id and result.get("shard") in pending:
+                    worker, _ = pending.pop(result["shard"])
+                    collected.update(zip((tuple(pair) for pair in result["pairs"]), result["results"]))
+                    self._worker_headroom[worker] = result.get("headroom")
+                continue
+
+            # 心跳超时的 worker 视为已退出，重新分配它未完成的交易对
+            alive = set(self.live_workers())
+            dead = {worker for worker, _ in pending.values() if worker not in alive}
+            if not dead:
+                continue
+            for worker in dead:
+                ring.remove(worker)
+                self.broker.unregister(worker)
+                self._worker_headroom.pop(worker, None)
+            orphaned = [shard_id for shard_id, (worker, _) in pending.items() if worker in dead]
+            symbols = [symbol for shard_id in orphaned for symbol in pending.pop(shard_id)[1]]
+            if not ring.nodes:
+                logger.error(f"Workers {sorted(dead)} died and no workers are left, giving up on {len(symbols)} symbols")
+                break
+            logger.warning(f"Workers {sorted(dead)} died, rebalancing {len(symbols)} symbols to {ring.nodes}")
+            dispatch(symbols)
+
+        if pending:
+            missing = sum(len(symbols) for _, symbols in pending.values())
+            logger.error(f"Job {job_id}: no result for {missing} symbols before timeout")
+        return [collected.get(pair) for pair in pairs]
@@ -0,0 +1,51 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+class HashRing:
+    """
+    一致性哈希环
+    每个节点在环上放置 replicas 个虚拟节点；增删节点时只有落在该节点区间的 key 会迁移
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: self._owners[p] for p in self._points}
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """:return: {节点: [key]}，没有节点时返回空字典"""
+        shards: Dict[str, List[str]] = {}
+        if not self._points:
+            return shards
+        for key in keys:
+            shards.setdefault(self.node_for(key), []).append(key)
+        return shards
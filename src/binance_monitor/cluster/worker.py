@@ -0,0 +1,66 @@
+import threading
+
+from loguru import logger
+
+from binance_monitor.config import AppConfig
+from binance_monitor.core.engine import MonitorEngine
+from binance_monitor.core.signals import SignalIndex
+from binance_monitor.notification.manager import NotificationManager
+
+class ClusterWorker:
+    """
+    worker: 从 broker 领取分片，用本机的 BinanceClient (自己的代理/出口 IP 和请求权重) 拉取并分析，
+    把结果交回协调者。去重和通知都由协调者负责
+    """
+
+    def __init__(self, config: AppConfig, broker, worker_id: str):
+        self.broker = broker
+        self.worker_id = worker_id
+        self.cluster = config.cluster
+        # 不直接通知，信号索引只在协调者维护
+        self.engine = MonitorEngine(config, NotificationManager())
+        self.engine.signal_index = SignalIndex()
+        self.running = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        self.running = True
+        self.broker.register(self.worker_id)
+        heartbeat = threading.Thread(target=self._heartbeat, name=f"heartbeat-{self.worker_id}", daemon=True)
+        heartbeat.start()
+        logger.info(f"Worker {self.worker_id} started")
+        try:
+            while self.running:
+                if not self.broker.is_registered(self.worker_id):
+                    # 曾被判定为超时 (例如长时间卡住)，重新加入
+                    logger.warning(f"Worker {self.worker_id} was evicted, registering again")
+                    self.broker.register(self.worker_id)
+                task = self.broker.get_task(self.worker_id, timeout=self.cluster.heartbeat_seconds)
+                if task is not None:
+                    self.process(task)
+        finally:
+            self._stopped.set()
+            self.engine.close()
+
+    def process(self, task):
+        pairs = [tuple(pair) for pair in task["pairs"]]
+        logger.info(f"Worker {self.worker_id}: scanning {len(pairs)} pairs for job {task['job']}")
+        results = self.engine._scan_pairs(pairs)
+        self.broker.put_result({
+            "job": task["job"],
+            "shard": task["shard"],
+            "worker": self.worker_id,
+            "pairs": pairs,
+            "results": results,
+            "headroom": self.engine.client.rate_limit_headroom(),
+        })
+
+    def stop(self):
+        self.running = False
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.cluster.heartbeat_seconds):
+            try:
+                self.broker.heartbeat(self.worker_id)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} heartbeat failed: {e}")
@@ -1,8 +1,14 @@
-from .settings import AppConfig, load_config, MonitorConfig, BinanceConfig
+from .settings import AppConfig, load_config, MonitorConfig, BinanceConfig, ClusterConfig, ResilienceConfig, UniverseConfig
+from .reload import ConfigWatcher, diff_config
 
 __all__ = [
     "AppConfig",
     "load_config",
     "MonitorConfig",
-    "BinanceConfig"
+    "BinanceConfig",
+    "ClusterConfig",
+    "ResilienceConfig",
+    "UniverseConfig",
+    "ConfigWatcher",
+    "diff_config"
 ]
@@ -0,0 +1,101 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from binance_monitor.config.settings import AppConfig, load_config
+
+# 运行中无法生效的配置: 修改后保留旧值并提示重启
+RESTART_SECTIONS = ("binance", "email", "notification", "metrics", "tracing", "cluster")
+RESTART_MONITOR_FIELDS = ("mode", "schedule", "signal_index_path", "signal_index_capacity", "run_once", "analysis_workers")
+
+def config_pairs(config: AppConfig) -> Set[Tuple[str, str]]:
+    return {(symbol, timeframe) for symbol in config.monitor.symbols for timeframe in config.monitor.timeframes}
+
+def diff_config(old: AppConfig, new: AppConfig) -> Dict[str, Any]:
+    """
+    比较两份配置
+    :return: {"added": 新增的 (symbol, timeframe), "removed": 移除的 (symbol, timeframe),
+              "monitor": 变化的 monitor 字段, "restart": 需要重启才能生效的配置项}
+    """
+    old_pairs, new_pairs = config_pairs(old), config_pairs(new)
+    monitor_changed = [
+        name for name in type(new.monitor).model_fields
+        if getattr(old.monitor, name) != getattr(new.monitor, name)
+    ]
+    restart = [name for name in RESTART_SECTIONS if getattr(old, name) != getattr(new, name)]
+    restart += [f"monitor.{name}" for name in monitor_changed if name in RESTART_MONITOR_FIELDS]
+    return {
+        "added": sorted(new_pairs - old_pairs),
+        "removed": sorted(old_pairs - new_pairs),
+        "monitor": [name for name in monitor_changed if name not in RESTART_MONITOR_FIELDS],
+        "restart": restart,
+    }
+
+def live_config(old: AppConfig, new: AppConfig) -> AppConfig:
+    """新配置中可以在运行中生效的部分，需要重启的配置项保留旧值"""
+    monitor = new.monitor.model_copy(update={name: getattr(old.monitor, name) for name in RESTART_MONITOR_FIELDS})
+    update = {name: getattr(old, name) for name in RESTART_SECTIONS}
+    update["monitor"] = monitor
+    return new.model_copy(update=update)
+
+class ConfigWatcher:
+    """
+    轮询配置文件的修改时间，变化后重新加载并回调
+    新配置无法解析、校验失败或回调抛出异常时继续使用上一份有效配置，等待下一次修改
+    """
+
+    def __init__(self, path: str, on_change: Callable[[AppConfig], None], interval: float = 2.0,
+                 loader: Callable[[str], AppConfig] = load_config):
+        """
+        :param on_change: 收到新配置时调用，抛出异常表示拒绝这份配置
+        :param interval: 检查间隔(秒)
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.loader = loader
+        self._stamp = self._file_stamp()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """
+        检查一次文件是否修改
+        :return: 是否应用了新配置
+        """
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        # 无论成功与否都记下这次修改，错误的配置不会被反复加载
+        self._stamp = stamp
+        try:
+            config = self.loader(self.path)
+            self.on_change(config)
+        except Exception as e:
+            logger.error(f"Invalid config in {self.path}, keeping the last good config: {e}")
+            return False
+        logger.info(f"Reloaded config from {self.path}")
+        return True
+
+    def start(self) -> "ConfigWatcher":
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
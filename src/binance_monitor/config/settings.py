@@ -1,14 +1,52 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from binance_monitor.notification import EmailConfig
+from binance_monitor.notification import EmailConfig, DispatchConfig
+from binance_monitor.utils.metrics import MetricsConfig
+from binance_monitor.utils.tracing import TraceConfig
 
 class MonitorConfig(BaseModel):
     """监控任务配置"""
     symbols: list[str] = Field(..., description="监控交易对列表，例如 ['BTC/USDT', 'ETH/USDT']")
-    timeframes: list[str] = Field(["4h", "1d"], description="监控周期列表")
+    timeframes: list[str] = Field(["4h", "1d"], min_length=1, description="监控周期列表")
     check_interval_minutes: int = Field(60, description="扫描间隔(分钟), 如果使用 cron_expression 则忽略此项")
     cron_expression: Optional[str] = Field(None, description="Cron表达式，例如 '1 */4 * * *'")
+    schedule: Literal["cron", "candle_close"] = Field("cron", description="cron: 按 cron_expression 扫描全部周期; candle_close: 每个周期在K线收盘后才扫描")
+    settle_seconds: float = Field(5.0, ge=0, description="K线收盘后等待多少秒再扫描 (candle_close 模式)")
+    concurrency: int = Field(4, ge=1, description="并发扫描的最大线程数, 1 表示顺序扫描")
+    resample: bool = Field(False, description="每个交易对只拉取最小周期, 更大的周期在本地按交易所边界聚合")
+    verify_resample: bool = Field(False, description="聚合后再拉取 REST K线比对 (用于校验, 会增加请求)")
+    signal_index_path: Optional[str] = Field(None, description="已通知信号索引(SQLite), 为空则只在内存中去重")
+    signal_index_capacity: int = Field(10000, ge=1, description="已通知信号的内存 LRU 容量")
+    patterns: list[str] = Field(["pinbar"], description="启用的形态检测器: pinbar, engulfing, inside_bar, breakout")
+    mode: Literal["poll", "stream"] = Field("poll", description="poll: 按 cron 轮询 REST; stream: 订阅 WebSocket, K线收盘即检测")
+    retry_failed_pairs: bool = Field(True, description="本轮拉取失败的交易对在其他交易对完成后再尝试一次")
+    reload_interval_seconds: float = Field(2.0, ge=0, description="检查配置文件修改的间隔(秒), 修改后热加载交易对/周期等设置; 0 表示不监听")
+    run_once: bool = Field(False, description="只扫描一次后退出 (由外部 cron / 定时容器调度时使用, 建议配合 binance.warm_start_path)")
+    ring_buffer: bool = Field(True, description="每个 (交易对, 周期) 的K线保存在固定容量的环形缓冲区中，每轮扫描原地更新，常驻内存不随运行时间增长")
+    analysis_workers: int = Field(0, ge=0, description="批量分析使用的进程数, 环形缓冲区分配在共享内存中, 常驻进程池直接读取K线并生成信号 (需启用 ring_buffer); 0 表示在扫描进程内分析")
+    analysis_min_pairs: int = Field(256, ge=1, description="一批交易对不少于此数时才使用进程池分析")
+
+    @model_validator(mode="after")
+    def _check_analysis_workers(self) -> "MonitorConfig":
+        # 进程池只读取共享内存中的环形缓冲区
+        if self.analysis_workers and not self.ring_buffer:
+            raise ValueError("analysis_workers requires ring_buffer to be enabled")
+        return self
+
+class ResilienceConfig(BaseModel):
+    """请求超时、重试、对冲请求和熔断配置"""
+    request_timeout_seconds: float = Field(10.0, gt=0, description="单次 HTTP 请求超时 (ccxt timeout)")
+    max_retries: int = Field(2, ge=0, description="网络类错误 (超时、断线、限流) 的最大重试次数")
+    retry_base_delay_seconds: float = Field(0.5, ge=0, description="指数退避的初始间隔, 实际等待在 [0, base * 2^n] 内随机")
+    retry_max_delay_seconds: float = Field(5.0, ge=0, description="单次退避的最长等待")
+    request_budget_seconds: float = Field(30.0, gt=0, description="一次调用 (含重试) 的总时间预算, 超出后不再重试")
+    hedge: bool = Field(False, description="响应慢于近期 P95 时再发一个相同的K线请求, 取先返回的结果 (会多消耗请求权重)")
+    hedge_quantile: float = Field(0.95, gt=0, lt=1, description="触发对冲请求的延迟分位数")
+    hedge_min_samples: int = Field(20, ge=1, description="至少积累多少次成功请求的延迟后才开始对冲")
+    hedge_min_delay_seconds: float = Field(0.05, ge=0, description="对冲等待的下限")
+    breaker_failures: int = Field(5, ge=1, description="同一交易对/接口连续失败多少次后熔断")
+    breaker_reset_seconds: float = Field(300.0, gt=0, description="熔断多久后放行一次试探请求")
 
 class BinanceConfig(BaseModel):
     """币安API配置"""
@@ -16,12 +54,73 @@ class BinanceConfig(BaseModel):
     secret_key: Optional[str] = Field(None, description="Secret Key (可选)")
     http_proxy: Optional[str] = Field(None, description="HTTP代理地址, 例如 http://127.0.0.1:7890")
     https_proxy: Optional[str] = Field(None, description="HTTPS代理地址, 例如 http://127.0.0.1:7890")
+    stream_url: str = Field("wss://stream.binance.com:9443/stream", description="WebSocket 行情地址 (stream 模式)")
+    kline_cache_path: Optional[str] = Field(None, description="本地K线缓存文件(SQLite), 为空则不启用增量拉取")
+    kline_cache_size: int = Field(1000, ge=50, description="每个交易对/周期最多缓存的K线数量")
+    warm_start_path: Optional[str] = Field(None, description="启动快照目录 (markets + 最近K线, 退出时保存), 设置后代替 kline_cache_path 作为K线缓存")
+    archive_path: Optional[str] = Field(None, description="K线存档目录 (定长二进制, 每个交易对/周期一个文件), 设置后把拉取到的K线追加写入, 可直接用于回测")
+    weight_limit_per_minute: int = Field(6000, ge=0, description="币安每分钟请求权重上限, 0 表示使用 ccxt 默认限流")
+    weight_safety_ratio: float = Field(0.9, gt=0, le=1, description="只使用权重上限的这一比例")
+    weight_class_limits: dict[str, int] = Field({}, description="每类接口每分钟的权重配额, 例如 {tickers: 800}; 接口类别见 api.ratelimit.ENDPOINT_WEIGHTS")
+    markets_ttl_seconds: int = Field(86400, ge=0, description="交易对元数据缓存有效期(秒)")
+    markets_cache_path: Optional[str] = Field(None, description="交易对元数据的磁盘缓存文件, 为空则只缓存在内存")
+    transport_mode: Literal["live", "record", "replay"] = Field("live", description="live: 正常请求; record: 请求并录制响应; replay: 只从录制存档回放")
+    transport_path: Optional[str] = Field(None, description="录制存档文件 (gzip JSON Lines), record/replay 模式必填")
+    replay_latency_scale: float = Field(0.0, ge=0, description="回放时按录制耗时的倍数模拟延迟, 0 表示不等待")
+    resilience: ResilienceConfig = Field(default_factory=ResilienceConfig)
+
+    @field_validator("weight_class_limits")
+    @classmethod
+    def _check_class_limits(cls, limits: dict[str, int]) -> dict[str, int]:
+        # api 包会导入本模块，这里在校验时才导入
+        from binance_monitor.api.ratelimit import ENDPOINT_WEIGHTS
+
+        for endpoint, limit in limits.items():
+            if endpoint not in ENDPOINT_WEIGHTS:
+                raise ValueError(f"Unknown endpoint class {endpoint!r}, expected one of {sorted(ENDPOINT_WEIGHTS)}")
+            # 配额小于单次请求的权重时这类请求永远发不出去
+            if limit < ENDPOINT_WEIGHTS[endpoint]:
+                raise ValueError(f"Weight limit for {endpoint} must be at least {ENDPOINT_WEIGHTS[endpoint]}, got {limit}")
+        return limits
+
+class UniverseTier(BaseModel):
+    """一档交易对: 排名在前 size 个 (累计) 的交易对每 every 轮扫描一次"""
+    size: int = Field(..., ge=1, description="本档累计到第几名")
+    every: int = Field(1, ge=1, description="每隔几轮扫描一次")
+
+class UniverseConfig(BaseModel):
+    """全市场模式: 每轮用一次 fetch_tickers 按成交额/波动率筛选交易对, 代替手工维护 monitor.symbols"""
+    enabled: bool = Field(False, description="是否启用全市场模式, monitor.symbols 中的交易对总是会被扫描")
+    quote: str = Field("USDT", description="只选择这个计价币的现货交易对")
+    rank_by: Literal["quote_volume", "volatility"] = Field("quote_volume", description="quote_volume: 24h 成交额; volatility: 24h (最高-最低)/最新价")
+    top_n: int = Field(100, ge=1, description="最多扫描排名前 N 的交易对")
+    min_quote_volume: float = Field(0.0, ge=0, description="24h 成交额下限 (计价币), 低于它的交易对不扫描")
+    exclude: list[str] = Field([], description="排除的交易对, 例如稳定币 ['USDC/USDT', 'FDUSD/USDT']")
+    exclude_leveraged: bool = Field(True, description="排除杠杆代币 (xxxUP/xxxDOWN/xxxBULL/xxxBEAR)")
+    refresh_minutes: float = Field(60.0, ge=0, description="多久重新拉取一次 tickers 排名, 0 表示每轮扫描都刷新")
+    tiers: list[UniverseTier] = Field([], description="分档扫描, 例如 [{size: 30, every: 1}, {size: 100, every: 4}]; 为空时 top_n 每轮都扫描")
+
+class ClusterConfig(BaseModel):
+    """多进程/多主机分片扫描配置 (python -m binance_monitor.cluster)"""
+    broker_host: str = Field("127.0.0.1", description="协调者上 broker 的监听地址, worker 用它连接")
+    broker_port: int = Field(50051, ge=1, le=65535, description="broker 端口")
+    authkey: str = Field("binance-monitor", description="broker 连接密钥, 多主机部署时务必修改")
+    heartbeat_seconds: float = Field(2.0, gt=0, description="worker 心跳间隔")
+    worker_timeout_seconds: float = Field(10.0, gt=0, description="超过这么久没有心跳的 worker 视为已退出, 其交易对重新分配")
+    job_timeout_seconds: float = Field(600.0, gt=0, description="单轮扫描等待 worker 结果的最长时间")
+    replicas: int = Field(64, ge=1, description="一致性哈希环上每个 worker 的虚拟节点数")
 
 class AppConfig(BaseSettings):
     """应用总配置"""
     monitor: MonitorConfig
     email: EmailConfig
     binance: BinanceConfig = Field(default_factory=BinanceConfig)
+    # 应用默认在后台发送通知，避免扫描被 SMTP 阻塞
+    notification: DispatchConfig = Field(default_factory=lambda: DispatchConfig(async_dispatch=True))
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    tracing: TraceConfig = Field(default_factory=TraceConfig)
+    cluster: ClusterConfig = Field(default_factory=ClusterConfig)
+    universe: UniverseConfig = Field(default_factory=UniverseConfig)
 
     model_config = SettingsConfigDict(
         yaml_file="config/config.yaml",
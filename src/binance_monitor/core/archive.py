@@ -0,0 +1,163 @@
+import os
+import struct
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from binance_monitor.core.candles import CandleSeries, FIELDS
+
+# 定长记录: int64 时间戳 + 5 个 float64，共 48 字节，小端
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+MAGIC = b"BMKLINE1"
+VERSION = 1
+# 文件头: magic, 版本, 记录长度, 记录数, 第一根/最后一根的时间戳，补齐到 64 字节
+HEADER = struct.Struct("<8sIIqqq")
+HEADER_SIZE = 64
+
+class ArchiveFile:
+    """
+    单个 (symbol, timeframe) 的K线存档，按时间正序追加的定长二进制记录
+    读取时通过 numpy.memmap 映射整个文件，按时间戳二分查找，返回的切片都是 mmap 上的视图 (零拷贝)。
+    写入只允许追加: 比最后一根更早的K线被忽略，与最后一根时间戳相同的覆盖它 (未收盘K线的更新)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Optional[np.memmap] = None
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self._header(0, 0, 0))
+        self.count, self.first_ts, self.last_ts = self._read_header()
+
+    def _header(self, count: int, first_ts: int, last_ts: int) -> bytes:
+        return HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, count, first_ts, last_ts).ljust(HEADER_SIZE, b"\0")
+
+    def _read_header(self) -> Tuple[int, int, int]:
+        with open(self.path, 'rb') as f:
+            magic, version, itemsize, count, first_ts, last_ts = HEADER.unpack(f.read(HEADER.size))
+            size = os.fstat(f.fileno()).st_size
+        if magic != MAGIC or version != VERSION or itemsize != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{self.path} is not a kline archive (version {VERSION})")
+        # 追加写入时先写记录再更新文件头，中断后多出的半截记录按文件头忽略
+        count = min(count, (size - HEADER_SIZE) // RECORD_DTYPE.itemsize)
+        return count, first_ts, last_ts
+
+    @property
+    def records(self) -> np.ndarray:
+        """全部记录 (mmap 视图)，追加后会重新映射"""
+        with self._lock:
+            if self._records is None or len(self._records) != self.count:
+                if not self.count:
+                    return np.empty(0, dtype=RECORD_DTYPE)
+                self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(self.count,))
+            return self._records
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, ohlcv: Sequence[Sequence[float]]) -> int:
+        """
+        追加K线 (ccxt 格式，按时间正序)
+        :return: 新增的K线数量 (不含覆盖最后一根)
+        """
+        if not len(ohlcv):
+            return 0
+        data = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(FIELDS))
+        rows = np.empty(len(data), dtype=RECORD_DTYPE)
+        rows["timestamp"] = data[:, 0].astype(np.int64)
+        for i, name in enumerate(FIELDS[1:], start=1):
+            rows[name] = data[:, i]
+        rows = rows[np.argsort(rows["timestamp"], kind="stable")]
+        _, unique = np.unique(rows["timestamp"][::-1], return_index=True)
+        rows = rows[::-1][unique]
+
+        with self._lock:
+            start = self.count
+            if self.count:
+                rows = rows[rows["timestamp"] >= self.last_ts]
+                if len(rows) and rows["timestamp"][0] == self.last_ts:
+                    start -= 1
+            if not len(rows):
+                return 0
+            count = start + len(rows)
+            first_ts = self.first_ts if start else int(rows["timestamp"][0])
+            last_ts = int(rows["timestamp"][-1])
+            with open(self.path, 'r+b') as f:
+                f.seek(HEADER_SIZE + start * RECORD_DTYPE.itemsize)
+                f.write(rows.tobytes())
+                f.flush()
+                f.seek(0)
+                f.write(self._header(count, first_ts, last_ts))
+            added = count - self.count
+            self.count, self.first_ts, self.last_ts = count, first_ts, last_ts
+            return added
+
+    def last(self, n: int) -> np.ndarray:
+        """最新的 n 根 (按时间正序)"""
+        records = self.records
+        return records[max(0, len(records) - n):]
+
+    def range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        """时间戳在 [start_ms, end_ms) 内的K线 (二分查找，按时间正序)"""
+        records = self.records
+        timestamps = records["timestamp"]
+        lo = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side="left"))
+        hi = len(records) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side="left"))
+        return records[lo:hi]
+
+    def series(self, limit: int, end_ms: Optional[int] = None) -> CandleSeries:
+        """
+        最新的 limit 根 (end_ms 之前) 作为 CandleSeries，各列是 mmap 上倒序的视图
+        """
+        records = self.range(end_ms=end_ms) if end_ms is not None else self.records
+        records = records[max(0, len(records) - limit):][::-1]
+        return CandleSeries(*(records[name] for name in FIELDS))
+
+    def to_ohlcv(self, records: Optional[np.ndarray] = None) -> np.ndarray:
+        """转换成 (n, 6) float64 数组 (与 backtest.load_ohlcv 一致，会复制)"""
+        records = self.records if records is None else records
+        out = np.empty((len(records), len(FIELDS)), dtype=np.float64)
+        for i, name in enumerate(FIELDS):
+            out[:, i] = records[name]
+        return out
+
+class CandleArchive:
+    """
+    K线存档目录，布局与回测数据一致: <root>/<SYMBOL>/<timeframe>.bin
+    每个 (symbol, timeframe) 一个 ArchiveFile，打开后复用
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[Tuple[str, str], ArchiveFile] = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.replace('/', ''), f"{timeframe}.bin")
+
+    def open(self, symbol: str, timeframe: str) -> ArchiveFile:
+        key = (symbol, timeframe)
+        with self._lock:
+            archive = self._files.get(key)
+            if archive is None:
+                archive = self._files[key] = ArchiveFile(self.path(symbol, timeframe))
+            return archive
+
+    def append(self, symbol: str, timeframe: str, ohlcv: Sequence[Sequence[float]]) -> int:
+        return self.open(symbol, timeframe).append(ohlcv)
+
+    def series(self, symbol: str, timeframe: str, limit: int, end_ms: Optional[int] = None) -> CandleSeries:
+        return self.open(symbol, timeframe).series(limit, end_ms)
@@ -0,0 +1,247 @@
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from binance_monitor.core.archive import RECORD_DTYPE
+from binance_monitor.core.candles import FIELDS, CandleSeries
+
+class CandleRing:
+    """
+    固定容量的K线环形缓冲区 (结构化数组，每根 48 字节，创建后不再分配内存)
+    每条记录同时写入 i 和 i + capacity 两个位置，最近 n 根总是一段连续内存，
+    window() 返回的 CandleSeries 各列都是缓冲区上的视图，不复制。
+    注意视图在同一缓冲区下一次写入后会变化，需要保留时自行 copy
+    """
+
+    __slots__ = ("capacity", "arena", "slot", "_buffer", "_head", "_size")
+
+    def __init__(self, capacity: int, arena: Optional["RingArena"] = None):
+        """
+        :param arena: 给出时缓冲区分配在该共享内存区中 (分析进程可按 slot 直接读取)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.arena = arena
+        self.slot: Optional[int] = None
+        if arena is None:
+            self._buffer = np.zeros(2 * capacity, dtype=RECORD_DTYPE)
+        else:
+            self.slot, self._buffer = arena.allocate()
+        # 下一次写入的位置 (0 <= head < capacity)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._buffer["timestamp"][self._head - 1 + self.capacity])
+
+    def _write(self, index: int, row: Sequence[float]):
+        record = (int(row[0]), row[1], row[2], row[3], row[4], row[5])
+        self._buffer[index] = record
+        self._buffer[index + self.capacity] = record
+
+    def push(self, row: Sequence[float]) -> bool:
+        """
+        写入一根K线 (O(1))，与最新一根时间戳相同的覆盖它，更早的忽略
+        :param row: [timestamp, open, high, low, close, volume]
+        :return: 是否新增了一根
+        """
+        last = self.last_timestamp
+        if last is not None and row[0] <= last:
+            if row[0] == last:
+                self._write((self._head - 1) % self.capacity, row)
+            return False
+        self._write(self._head, row)
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return True
+
+    def extend(self, rows: Sequence[Sequence[float]]) -> int:
+        """
+        批量写入 (ccxt 格式，按时间正序且不重复，例如一次 REST 拉取的结果)
+        规则与 push 相同，超过容量时只保留最新的 capacity 根
+        :return: 新增的K线数量
+        """
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, len(FIELDS))
+        last = self.last_timestamp
+        if last is not None:
+            timestamps = data[:, 0]
+            same = timestamps == last
+            if same.any():
+                self._write((self._head - 1) % self.capacity, data[same][-1])
+            data = data[timestamps > last]
+        added = len(data)
+        data = data[-self.capacity:]
+        if not len(data):
+            return 0
+
+        records = np.empty(len(data), dtype=RECORD_DTYPE)
+        records["timestamp"] = data[:, 0].astype(np.int64)
+        for i, name in enumerate(FIELDS[1:], start=1):
+            records[name] = data[:, i]
+        index = (self._head + np.arange(len(data))) % self.capacity
+        self._buffer[index] = records
+        self._buffer[index + self.capacity] = records
+        self._head = (self._head + len(data)) % self.capacity
+        self._size = min(self._size + len(data), self.capacity)
+        return added
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    @property
+    def end(self) -> int:
+        """缓冲区中最新一根之后的位置，最近 n 根为 [end - n, end)"""
+        return self._head + self.capacity
+
+    def records(self, n: Optional[int] = None) -> np.ndarray:
+        """最新的 n 根记录 (按时间正序)，缓冲区上的连续视图"""
+        n = self._size if n is None else min(n, self._size)
+        return self._buffer[self.end - n:self.end]
+
+    def window(self, n: Optional[int] = None) -> CandleSeries:
+        """最新的 n 根，按时间倒序 (index 0 为最新) 的 CandleSeries 视图"""
+        records = self.records(n)[::-1]
+        return CandleSeries(*(records[name] for name in FIELDS))
+
+    def __getitem__(self, index: int) -> List[float]:
+        """按时间正序取一根 (支持负数下标)，格式与 ccxt 一致"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring index out of range")
+        record = self.records()[index]
+        return [int(record["timestamp"]), *(float(record[name]) for name in FIELDS[1:])]
+
+    def __iter__(self) -> Iterator[List[float]]:
+        for i in range(self._size):
+            yield self[i]
+
+class RingArena:
+    """
+    同一容量的环形缓冲区集中分配在共享内存块中，每块 (chunk) 是 (slots, 2 * capacity) 的记录矩阵
+    块分配后不移动也不扩容，释放的 slot 放回空闲列表复用；
+    分析进程用块名映射同一块内存，按 slot 和 CandleRing.end 直接取出K线窗口
+    """
+
+    def __init__(self, capacity: int, chunk_bytes: int = 4 << 20):
+        self.capacity = capacity
+        self.chunk_slots = max(1, chunk_bytes // (2 * capacity * RECORD_DTYPE.itemsize))
+        self._chunks: List[shared_memory.SharedMemory] = []
+        self._arrays: List[np.ndarray] = []
+        self._free: List[int] = []
+
+    def allocate(self) -> Tuple[int, np.ndarray]:
+        """分配一个 slot，返回 (slot, 长度为 2 * capacity 的缓冲区视图)"""
+        if not self._free:
+            shape = (self.chunk_slots, 2 * self.capacity)
+            shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * RECORD_DTYPE.itemsize)
+            self._chunks.append(shm)
+            self._arrays.append(np.ndarray(shape, dtype=RECORD_DTYPE, buffer=shm.buf))
+            first = (len(self._chunks) - 1) * self.chunk_slots
+            self._free.extend(range(first + self.chunk_slots - 1, first - 1, -1))
+        slot = self._free.pop()
+        chunk, row = divmod(slot, self.chunk_slots)
+        return slot, self._arrays[chunk][row]
+
+    def release(self, slot: int):
+        self._free.append(slot)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """各共享内存块的名字，按 slot // chunk_slots 排列"""
+        return tuple(shm.name for shm in self._chunks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._chunks)
+
+    def close(self):
+        self._arrays.clear()
+        self._free.clear()
+        for shm in self._chunks:
+            try:
+                shm.close()
+            except BufferError:
+                # 外部仍持有缓冲区上的视图，映射随这些视图释放
+                pass
+            shm.unlink()
+        self._chunks.clear()
+
+class RingStore:
+    """
+    引擎持有的 (symbol, timeframe) -> CandleRing
+    常驻内存为 交易对数 x 容量 x 96 字节，不随运行时间增长
+    """
+
+    def __init__(self, shared: bool = False):
+        """
+        :param shared: 缓冲区分配在共享内存 (RingArena) 中，供多进程分析直接读取
+        """
+        self.shared = shared
+        self._rings: Dict[Tuple[str, str], CandleRing] = {}
+        self._arenas: Dict[int, RingArena] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def get(self, symbol: str, timeframe: str, capacity: int) -> CandleRing:
+        """取得缓冲区，容量不足时换成更大的 (保留已有K线)"""
+        key = (symbol, timeframe)
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None or ring.capacity < capacity:
+                arena = None
+                if self.shared:
+                    arena = self._arenas.get(capacity)
+                    if arena is None:
+                        arena = self._arenas[capacity] = RingArena(capacity)
+                bigger = CandleRing(capacity, arena)
+                if ring is not None:
+                    records = ring.records()
+                    bigger.extend(np.column_stack([records[name] for name in FIELDS]))
+                    self._release(ring)
+                ring = self._rings[key] = bigger
+            return ring
+
+    def find(self, symbol: str, timeframe: str) -> Optional[CandleRing]:
+        """已有的缓冲区，没有时返回 None (不创建)"""
+        with self._lock:
+            return self._rings.get((symbol, timeframe))
+
+    @staticmethod
+    def _release(ring: CandleRing):
+        if ring.arena is not None:
+            ring.arena.release(ring.slot)
+
+    def retain(self, symbols: Iterable[str], timeframes: Iterable[str]):
+        """释放不再监控的交易对/周期的缓冲区"""
+        symbols, timeframes = set(symbols), set(timeframes)
+        with self._lock:
+            for key in [key for key in self._rings if key[0] not in symbols or key[1] not in timeframes]:
+                self._release(self._rings.pop(key))
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            if self.shared:
+                return sum(arena.nbytes for arena in self._arenas.values())
+            return sum(ring._buffer.nbytes for ring in self._rings.values())
+
+    def close(self):
+        """释放所有缓冲区和共享内存"""
+        with self._lock:
+            self._rings.clear()
+            for arena in self._arenas.values():
+                arena.close()
+            self._arenas.clear()
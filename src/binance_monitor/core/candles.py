@@ -0,0 +1,79 @@
+from typing import Any, Dict, Iterator, List, Sequence, Union
+import numpy as np
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+class CandleSeries:
+    """
+    K 线序列 (列式存储)，与 get_klines 的旧格式一致按时间倒序排列，index 0 为最新
+    每一列都是 NumPy 数组: timestamp 为 int64，OHLCV 为 float64
+    切片返回共享底层数据的视图，不会复制
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, timestamp: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv: Sequence[Sequence[float]]) -> "CandleSeries":
+        """
+        直接由 ccxt fetch_ohlcv 的返回值构建，不生成逐根的字典
+        :param ohlcv: [[timestamp, open, high, low, close, volume], ...]，ccxt 默认按时间正序
+        """
+        data = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(FIELDS))
+        if len(data) > 1 and not np.all(data[1:, 0] > data[:-1, 0]):
+            data = data[np.argsort(data[:, 0], kind="stable")]
+
+        # 转置成 (6, n) 的连续内存，每一列都是连续数组
+        columns = np.ascontiguousarray(data[::-1].T)
+        return cls(columns[0].astype(np.int64), columns[1], columns[2], columns[3], columns[4], columns[5])
+
+    @classmethod
+    def from_dicts(cls, klines: Sequence[Dict[str, Any]]) -> "CandleSeries":
+        """兼容旧的字典列表格式 (按时间倒序)"""
+        n = len(klines)
+        columns = np.empty((len(FIELDS) - 1, n), dtype=np.float64)
+        timestamp = np.empty(n, dtype=np.int64)
+        for i, k in enumerate(klines):
+            timestamp[i] = k['timestamp']
+            columns[0, i] = k['open']
+            columns[1, i] = k['high']
+            columns[2, i] = k['low']
+            columns[3, i] = k['close']
+            columns[4, i] = k.get('volume', 0.0)
+        return cls(timestamp, columns[0], columns[1], columns[2], columns[3], columns[4])
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "CandleSeries"]:
+        if isinstance(index, slice):
+            return CandleSeries(*(getattr(self, f)[index] for f in FIELDS))
+        return {
+            'timestamp': int(self.timestamp[index]),
+            'open': float(self.open[index]),
+            'high': float(self.high[index]),
+            'low': float(self.low[index]),
+            'close': float(self.close[index]),
+            'volume': float(self.volume[index]),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+def as_series(klines: Union[CandleSeries, Sequence[Dict[str, Any]]]) -> CandleSeries:
+    """把旧的字典列表转换为 CandleSeries，已经是 CandleSeries 的直接返回"""
+    if isinstance(klines, CandleSeries):
+        return klines
+    return CandleSeries.from_dicts(klines)
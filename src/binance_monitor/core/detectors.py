@@ -0,0 +1,204 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Type
+
+import numpy as np
+
+# 检测结果记录, direction 的含义由检测器定义: pinbar 为主影线方向 (1 = 向上, 与 BATCH_RESULT_DTYPE 一致)，
+# 其他检测器为 1 = 看涨, -1 = 看跌, 0 = 无方向
+DETECTION_DTYPE = np.dtype([
+    ("matched", np.bool_),
+    ("direction", np.int8),
+    ("is_priority", np.bool_),
+])
+
+class FeatureSet:
+    """
+    一批交易对共享的K线特征，按需计算并缓存，每个特征每批只算一次
+    :param ohlc: 形状 (pairs, bars, 4) 的矩阵，bars 轴按时间倒序，index 0 为待检测的已收盘K线
+    特征名:
+        open / high / low / close / range / body / upper_shadow / lower_shadow   待检测K线
+        prev_open / prev_high / prev_low / prev_close / prev_body               前一根K线
+        rolling_high_N / rolling_low_N                                          之前 N 根K线的最高价 / 最低价
+    """
+
+    def __init__(self, ohlc: np.ndarray):
+        self.ohlc = ohlc
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = self._compute(name)
+        return value
+
+    def _compute(self, name: str) -> np.ndarray:
+        if name in _BASE_FEATURES:
+            return _BASE_FEATURES[name](self)
+        kind, _, size = name.rpartition("_")
+        if kind in ("rolling_high", "rolling_low") and size.isdigit():
+            window = self.ohlc[:, 1:int(size) + 1]
+            if kind == "rolling_high":
+                return window[:, :, 1].max(axis=1)
+            return window[:, :, 2].min(axis=1)
+        raise KeyError(f"Unknown feature: {name}")
+
+_BASE_FEATURES: Dict[str, Callable[[FeatureSet], np.ndarray]] = {
+    "open": lambda f: f.ohlc[:, 0, 0],
+    "high": lambda f: f.ohlc[:, 0, 1],
+    "low": lambda f: f.ohlc[:, 0, 2],
+    "close": lambda f: f.ohlc[:, 0, 3],
+    "range": lambda f: f["high"] - f["low"],
+    "body": lambda f: np.abs(f["close"] - f["open"]),
+    "upper_shadow": lambda f: f["high"] - np.maximum(f["open"], f["close"]),
+    "lower_shadow": lambda f: np.minimum(f["open"], f["close"]) - f["low"],
+    "prev_open": lambda f: f.ohlc[:, 1, 0],
+    "prev_high": lambda f: f.ohlc[:, 1, 1],
+    "prev_low": lambda f: f.ohlc[:, 1, 2],
+    "prev_close": lambda f: f.ohlc[:, 1, 3],
+    "prev_body": lambda f: np.abs(f["prev_close"] - f["prev_open"]),
+}
+
+class Detector(ABC):
+    """
+    形态检测器基类
+    子类声明 name、lookback (需要待检测K线之前多少根) 和 features，
+    在 detect 中只通过 FeatureSet 读取特征，这样多个检测器共享同一份计算结果
+    """
+    name: str = ""
+    lookback: int = 0
+    features: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def detect(self, features: FeatureSet) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """:return: (matched, direction, is_priority)"""
+        pass
+
+    def describe(self, candle: Dict[str, float], direction: int, is_priority: bool) -> str:
+        """通知中的详情文本"""
+        direction_cn = {1: "看涨", -1: "看跌"}.get(direction)
+        prices = f"价格: 开={candle['open']}, 高={candle['high']}, 低={candle['low']}, 收={candle['close']}"
+        return f"方向: {direction_cn}, {prices}" if direction_cn else prices
+
+DETECTORS: Dict[str, Type[Detector]] = {}
+
+def register_detector(cls: Type[Detector]) -> Type[Detector]:
+    """注册检测器 (可作为类装饰器)，之后可以在 monitor.patterns 中按 name 启用"""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} must define a name")
+    DETECTORS[cls.name] = cls
+    return cls
+
+def create_detectors(names: Iterable[str]) -> List[Detector]:
+    unknown = [name for name in names if name not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown patterns {unknown}, available: {sorted(DETECTORS)}")
+    return [DETECTORS[name]() for name in dict.fromkeys(names)]
+
+@register_detector
+class PinbarDetector(Detector):
+    """
+    Pinbar: 主影线 > 整根K线长度的 2/3 (与 StrategyAnalyzer._is_pinbar 一致)
+    主影线一侧贴近或越过之前 40 根的高/低点时为重点 (与 _check_context 一致)
+    direction 为主影线方向: 1 = 向上, -1 = 向下
+    """
+    name = "pinbar"
+    lookback = 40
+    features = ("range", "upper_shadow", "lower_shadow", "high", "low", "rolling_high_40", "rolling_low_40")
+
+    def detect(self, f: FeatureSet):
+        total_length = f["range"]
+        main_shadow = np.maximum(f["upper_shadow"], f["lower_shadow"])
+        matched = (total_length != 0) & (main_shadow > total_length * (2/3))
+        is_up = f["upper_shadow"] > f["lower_shadow"]
+
+        max_prev_high, min_prev_low = f["rolling_high_40"], f["rolling_low_40"]
+        up_context = (np.abs(f["high"] - max_prev_high) < total_length) | (f["low"] > max_prev_high)
+        down_context = (np.abs(f["low"] - min_prev_low) < total_length) | (f["high"] < min_prev_low)
+        is_priority = matched & np.where(is_up, up_context, down_context)
+        return matched, np.where(is_up, 1, -1), is_priority
+
+    def describe(self, candle, direction, is_priority):
+        # 与 StrategyAnalyzer._format_details 的文字保持一致
+        prices = f"价格: 开={candle['open']}, 高={candle['high']}, 低={candle['low']}, 收={candle['close']}"
+        if not is_priority:
+            return prices
+        direction_cn = "看涨" if direction == 1 else "看跌"
+        return f"方向: {direction_cn} (反转信号), {prices}"
+
+@register_detector
+class EngulfingDetector(Detector):
+    """吞没: 实体完全覆盖前一根K线的实体且方向相反"""
+    name = "engulfing"
+    lookback = 1
+    features = ("open", "close", "prev_open", "prev_close", "body", "prev_body")
+
+    def detect(self, f: FeatureSet):
+        bullish = (f["close"] > f["open"]) & (f["prev_close"] < f["prev_open"])
+        bearish = (f["close"] < f["open"]) & (f["prev_close"] > f["prev_open"])
+        top = np.maximum(f["open"], f["close"])
+        bottom = np.minimum(f["open"], f["close"])
+        covers = (top >= np.maximum(f["prev_open"], f["prev_close"])) & (bottom <= np.minimum(f["prev_open"], f["prev_close"]))
+        matched = (bullish | bearish) & covers & (f["body"] > f["prev_body"])
+        return matched, np.where(bullish, 1, -1), np.zeros_like(matched)
+
+@register_detector
+class InsideBarDetector(Detector):
+    """孕线 (inside bar): 最高、最低价都在前一根K线范围内"""
+    name = "inside_bar"
+    lookback = 1
+    features = ("high", "low", "prev_high", "prev_low")
+
+    def detect(self, f: FeatureSet):
+        matched = (f["high"] < f["prev_high"]) & (f["low"] > f["prev_low"])
+        return matched, np.zeros(len(matched), dtype=np.int8), np.zeros_like(matched)
+
+@register_detector
+class BreakoutDetector(Detector):
+    """突破: 收盘价突破之前 20 根的最高价或跌破最低价，同时创 40 根新高/新低时为重点"""
+    name = "breakout"
+    lookback = 40
+    features = ("close", "rolling_high_20", "rolling_low_20", "rolling_high_40", "rolling_low_40")
+
+    def detect(self, f: FeatureSet):
+        up = f["close"] > f["rolling_high_20"]
+        down = f["close"] < f["rolling_low_20"]
+        is_priority = (up & (f["close"] > f["rolling_high_40"])) | (down & (f["close"] < f["rolling_low_40"]))
+        return up | down, np.where(up, 1, -1), is_priority
+
+class DetectionEngine:
+    """对一批K线矩阵一次性运行所有启用的检测器，共享同一个 FeatureSet"""
+
+    def __init__(self, detectors: Sequence[Detector]):
+        self.detectors = list(detectors)
+        # 待检测K线本身 + 最长的回看窗口
+        self.window = 1 + max((d.lookback for d in self.detectors), default=0)
+        # 所有检测器声明的特征 (去重)，每批只计算一次
+        self.features = list(dict.fromkeys(name for d in self.detectors for name in d.features))
+
+    @property
+    def names(self) -> List[str]:
+        return [d.name for d in self.detectors]
+
+    def evaluate(self, ohlc: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        :param ohlc: 形状 (pairs, >=window, 4)，index 0 为待检测K线
+        :return: {检测器名: 长度为 pairs 的 DETECTION_DTYPE 数组}
+        """
+        if ohlc.ndim != 3 or ohlc.shape[2] != 4 or ohlc.shape[1] < self.window:
+            raise ValueError(f"Expected (pairs, >={self.window}, 4) OHLC matrix, got {ohlc.shape}")
+        return self.evaluate_features(FeatureSet(ohlc))
+
+    def evaluate_features(self, features: FeatureSet) -> Dict[str, np.ndarray]:
+        """在已有的 FeatureSet 上运行，调用方可以和其他计算共享特征缓存"""
+        ohlc = features.ohlc
+        for name in self.features:
+            features[name]
+        out = {}
+        for detector in self.detectors:
+            matched, direction, is_priority = detector.detect(features)
+            record = np.zeros(len(ohlc), dtype=DETECTION_DTYPE)
+            record["matched"] = matched
+            record["direction"] = direction
+            record["is_priority"] = is_priority & matched
+            out[detector.name] = record
+        return out
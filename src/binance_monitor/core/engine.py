@@ -1,46 +1,125 @@
+import asyncio
+import multiprocessing
+import threading
 import time
-import schedule
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from croniter import croniter
+from typing import Optional
 from loguru import logger
-from binance_monitor.config import AppConfig
+from binance_monitor.config import AppConfig, ConfigWatcher, diff_config
+from binance_monitor.config.reload import live_config
 from binance_monitor.api.client import BinanceClient
+from binance_monitor.api.resilience import CircuitOpenError
 from binance_monitor.notification.manager import NotificationManager
 from binance_monitor.notification.models import NotificationMessage, NotificationLevel
-from binance_monitor.core.strategy import StrategyAnalyzer
+from binance_monitor.core.strategy import StrategyAnalyzer, detected_signals
+from binance_monitor.core.scheduler import CandleCloseScheduler
+from binance_monitor.core.buffer import RingStore
+from binance_monitor.core.parallel import ParallelAnalyzer
+from binance_monitor.core.signals import SignalIndex
+from binance_monitor.core.universe import Universe
+from binance_monitor.core.resample import can_resample, resample, timeframe_ms, verify_resampled
+from binance_monitor.utils.metrics import metrics
+from binance_monitor.utils.tracing import tracer
+
+# 信号索引中的信号类型
+SIGNAL_TYPE = "pinbar"
+
+# 已通知信号的持久化记录保留最长周期的这么多根K线
+SIGNAL_RETENTION_BARS = 3
+
+def signal_retention_ms(timeframes) -> int:
+    return SIGNAL_RETENTION_BARS * max(timeframe_ms(timeframe) for timeframe in timeframes)
+
+# 获取足够的数据: 1 (current) + 1 (target) + 40 (context) = 42
+# 为了保险起见，获取 50
+KLINE_LIMIT = 50
 
 class MonitorEngine:
-    def __init__(self, config: AppConfig, notification_manager: NotificationManager):
+    # 是否在本进程分析K线 (协调者把分析交给 worker，不需要进程池和共享内存缓冲区)
+    LOCAL_ANALYSIS = True
+
+    def __init__(self, config: AppConfig, notification_manager: NotificationManager, config_path: Optional[str] = None):
+        """
+        :param config_path: 配置文件路径，给出时 start() 后监听文件修改并热加载
+        """
         self.config = config
+        self.config_path = config_path
         self.notifier = notification_manager
         self.client = BinanceClient(config.binance)
-        self.strategy = StrategyAnalyzer()
+        # 多进程分析 (可选)，进程池在第一次用到时启动
+        self.parallel = self._create_parallel(config)
+        self.strategy = StrategyAnalyzer(config.monitor.patterns, parallel=self.parallel)
+        # 已通知过的信号，避免同一根K线在多次扫描中重复分析和通知
+        self.signal_index = SignalIndex(
+            config.monitor.signal_index_path, config.monitor.signal_index_capacity,
+            signal_retention_ms(config.monitor.timeframes),
+        )
+        # 全市场模式: 按 tickers 排名选择交易对
+        self.universe = Universe(self.client, config.universe)
+        # 每个 (symbol, timeframe) 的K线环形缓冲区，扫描之间复用；多进程分析时分配在共享内存中
+        self.rings = RingStore(shared=self.parallel is not None)
+        self.stream = None
+        self.scheduler: Optional[CandleCloseScheduler] = None
+        self.watcher: Optional[ConfigWatcher] = None
+        # 热加载 (ConfigWatcher 线程) 与扫描互斥: 一轮扫描从头到尾使用同一份配置和策略
+        self._config_lock = threading.RLock()
+        # 已交给通知器、尚未确认发送结果的信号，避免发送期间的扫描重复通知
+        self._pending_signals = set()
+        self._pending_lock = threading.Lock()
         self.running = False
 
+    def _create_parallel(self, config: AppConfig) -> Optional[ParallelAnalyzer]:
+        if not config.monitor.analysis_workers or not self.LOCAL_ANALYSIS:
+            return None
+        if multiprocessing.current_process().daemon:
+            # daemon 进程不能创建子进程
+            logger.warning("analysis_workers is ignored in a daemon process, analyzing in-process")
+            return None
+        return ParallelAnalyzer(config.monitor.analysis_workers, config.monitor.analysis_min_pairs)
+
     def start(self):
         """启动监控引擎"""
         logger.info("Starting Monitor Engine...")
+
+        if self.config_path and self.config.monitor.reload_interval_seconds and not self.config.monitor.run_once:
+            self.watcher = ConfigWatcher(self.config_path, self.apply_config, self.config.monitor.reload_interval_seconds).start()
         
         # 立即运行一次
         self.run_job()
+
+        if self.config.monitor.run_once:
+            logger.info("run_once is set, exiting after the first scan")
+            return
         
         self.running = True
+
+        if self.config.monitor.mode == "stream":
+            self._run_stream()
+            return
+
+        if self.config.monitor.schedule == "candle_close":
+            self._run_candle_close_loop()
+            return
         
         # 获取 Cron 表达式，如果没有配置则默认每小时
-        cron_expr = self.config.monitor.cron_expression
-        if not cron_expr:
+        if not self.config.monitor.cron_expression:
             logger.warning("No cron_expression found, using default interval loop (not recommended).")
             # 这里可以保留旧逻辑或强制要求配置
             # 为了简单起见，如果没有 cron，我们构造一个基于 interval 的简单 cron 或者报错
             # 这里我们假设用户配置了 cron
             return
 
-        logger.info(f"Using Cron expression: {cron_expr}")
+        from croniter import croniter
+
+        logger.info(f"Using Cron expression: {self.config.monitor.cron_expression}")
 
         while self.running:
             now = datetime.now()
             
             try:
+                # 每次重新读取，热加载修改的 cron 表达式在下一次等待时生效
+                cron_expr = self.config.monitor.cron_expression
                 # 使用 croniter 计算下一次运行时间
                 iter = croniter(cron_expr, now)
                 next_run_time = iter.get_next(datetime)
@@ -52,51 +131,374 @@ class MonitorEngine:
                 if wait_seconds > 0:
                     time.sleep(wait_seconds)
                 
-                self.run_job()
+                self.run_job(scheduled_at=next_run_time.timestamp())
                 
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
                 # 防止死循环报错，休眠一会
                 time.sleep(60)
 
-    def run_job(self):
-        """执行一次扫描任务"""
-        logger.info(f"Running scan job at {datetime.now()}")
-        
-        if not self.client.check_connection():
-            logger.error("Cannot connect to Binance API, skipping this run.")
+    def _run_candle_close_loop(self):
+        """按各周期K线收盘时间调度，只扫描出现新收盘K线的周期"""
+        self.scheduler = scheduler = CandleCloseScheduler(self.config.monitor.timeframes, self.config.monitor.settle_seconds)
+        # 启动时已经完整扫描过一次
+        scheduler.mark_done(scheduler.timeframes, int(time.time() * 1000))
+        logger.info(f"Using candle-close schedule for {scheduler.timeframes} (settle {self.config.monitor.settle_seconds}s)")
+
+        while self.running:
+            try:
+                now_ms = int(time.time() * 1000)
+                # monitor.timeframes 至少有一个周期 (配置校验，热加载同样校验)
+                with self._config_lock:
+                    next_run_ms = scheduler.next_run_ms(now_ms)
+                wait_seconds = (next_run_ms - now_ms) / 1000
+                logger.info(f"Next candle close scan at {datetime.fromtimestamp(next_run_ms / 1000)} (waiting {wait_seconds:.2f} seconds)")
+                if wait_seconds > 0:
+                    time.sleep(wait_seconds)
+
+                # 热加载在两次扫描之间生效，不会在 due / 扫描 / mark_done 中途替换周期
+                with self._config_lock:
+                    now_ms = int(time.time() * 1000)
+                    due = scheduler.due(now_ms)
+                    if due:
+                        self.run_job(timeframes=due, scheduled_at=next_run_ms / 1000)
+                        scheduler.mark_done(due, now_ms)
+
+            except Exception as e:
+                logger.error(f"Error in scheduler loop: {e}")
+                time.sleep(60)
+
+    def _run_stream(self):
+        """WebSocket 模式：K 线收盘即检测，不再轮询"""
+        # aiohttp 导入较慢，只在 stream 模式下加载
+        from binance_monitor.core.stream import KlineStream
+
+        binance = self.config.binance
+        # 全市场模式下订阅启动时排名的交易对 (分档只对轮询有意义，这里全部订阅)
+        pairs = [
+            (symbol, timeframe)
+            for symbol in self._universe_symbols(all_tiers=True)
+            for timeframe in self.config.monitor.timeframes
+        ]
+        self.stream = KlineStream(
+            self.client,
+            self.strategy,
+            pairs,
+            on_signals=self._send_consolidated_report,
+            url=binance.stream_url,
+            proxy=binance.https_proxy or binance.http_proxy,
+            concurrency=self.config.monitor.concurrency,
+        )
+        logger.info(f"Streaming {len(pairs)} kline streams from {binance.stream_url}")
+        asyncio.run(self.stream.run())
+
+    def apply_config(self, config: AppConfig):
+        """
+        热加载新配置，只应用变化的部分:
+        交易对/周期的增减在下一轮扫描生效 (stream 模式立即增减订阅)，K线缓存、markets、信号索引都保留；
+        客户端、通知等需要重启才能生效的配置保留旧值并给出警告。
+        新配置不合法 (例如未知的形态) 时抛出异常，当前配置保持不变
+        """
+        with self._config_lock:
+            old = self.config
+            diff = diff_config(old, config)
+            if diff["restart"]:
+                logger.warning(f"Config changes to {', '.join(diff['restart'])} require a restart and were not applied")
+            config = live_config(old, config)
+            if config == old:
+                return
+
+            # 先构建所有新对象，任何一步失败都不修改当前状态
+            strategy = self.strategy
+            if config.monitor.patterns != old.monitor.patterns:
+                strategy = StrategyAnalyzer(config.monitor.patterns, parallel=self.parallel)
+
+            self.config = config
+            self.strategy = strategy
+            self.universe.configure(config.universe)
+            self.signal_index.retention_ms = signal_retention_ms(config.monitor.timeframes)
+            if self.parallel is not None:
+                self.parallel.min_pairs = config.monitor.analysis_min_pairs
+            if self.watcher is not None and config.monitor.reload_interval_seconds:
+                self.watcher.interval = config.monitor.reload_interval_seconds
+            if self.scheduler is not None:
+                self.scheduler.settle_ms = int(config.monitor.settle_seconds * 1000)
+                self.scheduler.set_timeframes(config.monitor.timeframes, int(time.time() * 1000))
+            if self.stream is not None:
+                self.stream.strategy = strategy
+                self.stream.concurrency = config.monitor.concurrency
+                self.stream.set_pairs([
+                    (symbol, timeframe)
+                    for symbol in self._universe_symbols(all_tiers=True)
+                    for timeframe in config.monitor.timeframes
+                ])
+
+        logger.info(
+            f"Applied config: +{len(diff['added'])} / -{len(diff['removed'])} pairs, "
+            f"changed monitor settings: {', '.join(diff['monitor']) or 'none'}"
+        )
+
+    def close(self):
+        """释放客户端 (录制存档、K线缓存)、信号索引和分析进程池"""
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.client.close()
+        self.signal_index.close()
+        if self.parallel is not None:
+            self.parallel.close()
+        self.rings.close()
+
+    def run_job(self, timeframes=None, scheduled_at=None):
+        """
+        执行一次扫描任务
+        :param timeframes: 只扫描这些周期，默认全部
+        :param scheduled_at: 计划运行时间 (秒级时间戳)，用于统计扫描延迟
+        """
+        with self._config_lock:
+            timeframes = timeframes or self.config.monitor.timeframes
+            logger.info(f"Running scan job at {datetime.now()} for {', '.join(timeframes)}")
+            start = time.perf_counter()
+            if scheduled_at is not None:
+                metrics.scan_lag.set(max(0.0, time.time() - scheduled_at))
+            profiler = tracer.start_profile()
+            try:
+                with tracer.span("scan", timeframes=list(timeframes)):
+                    self._run_job(timeframes)
+            finally:
+                metrics.scan_duration.observe(time.perf_counter() - start)
+                # 每轮扫描写一个 trace 文件
+                tracer.flush(profiler)
+
+    def _run_job(self, timeframes):
+        if not self._prepare_scan():
             return
 
         # 收集所有的分析结果
-        results = []
+        pairs = [
+            (symbol, timeframe)
+            for symbol in self._universe_symbols()
+            for timeframe in timeframes
+        ]
+        results = [
+            signal for res in self._scan_pairs(pairs)
+            for signal in detected_signals(res)
+        ]
 
-        for symbol in self.config.monitor.symbols:
-            for timeframe in self.config.monitor.timeframes:
-                try:
-                    res = self._process_pair(symbol, timeframe)
-                    if res and res.get("is_pinbar"):
-                        results.append(res)
-                except Exception as e:
-                    logger.error(f"Error processing {symbol} {timeframe}: {e}")
+        for res in results:
+            metrics.signals_found.labels(res["timeframe"]).inc()
+
+        # 释放已移出监控 (热加载、全市场排名变化) 的交易对的缓冲区
+        self.rings.retain(self._universe_symbols(all_tiers=True), self.config.monitor.timeframes)
+        metrics.ring_buffer_bytes.set(self.rings.nbytes)
+
+        self._log_headroom()
 
         # 如果有结果，汇总发送邮件
         if results:
             self._send_consolidated_report(results)
         else:
-            logger.info("No Pinbars detected in this scan.")
+            logger.info("No patterns detected in this scan.")
+
+    def _universe_symbols(self, all_tiers: bool = False):
+        """
+        本轮扫描的交易对: monitor.symbols，启用全市场模式时再加上按 tickers 排名选出的交易对
+        :param all_tiers: 忽略分档，返回排名内的全部交易对
+        """
+        symbols = self.config.monitor.symbols
+        if not self.config.universe.enabled:
+            return symbols
+        if all_tiers:
+            return list(dict.fromkeys([*symbols, *self.universe.refresh()]))
+        selected = self.universe.select(symbols)
+        logger.info(f"Universe mode: scanning {len(selected)} pairs ({len(self.universe.ranked)} ranked, {len(symbols)} pinned)")
+        return selected
+
+    def _prepare_scan(self) -> bool:
+        """扫描前检查连接并加载 markets，返回 False 时跳过本轮"""
+        with tracer.span("check_connection"):
+            connected = self.client.check_connection()
+        if not connected:
+            logger.error("Cannot connect to Binance API, skipping this run.")
+            return False
+
+        try:
+            # 缓存未过期时不会发起请求
+            with tracer.span("load_markets"):
+                self.client.load_markets()
+        except Exception as e:
+            logger.error(f"Failed to load markets: {e}")
+        return True
+
+    def _log_headroom(self):
+        headroom = self.client.rate_limit_headroom()
+        if headroom:
+            metrics.weight_used.set(headroom['used_weight'])
+            logger.info(
+                f"Request weight used {headroom['used_weight']}/{headroom['weight_limit']}, "
+                f"waited {headroom['waited_seconds']:.1f}s for budget"
+            )
+
+    def _scan_pairs(self, pairs):
+        """
+        扫描一组 (symbol, timeframe)：先按 concurrency 配置并发拉取 K 线，再一次性批量分析
+        :return: 与 pairs 顺序一致的分析结果列表，失败的交易对为 None
+        """
+        sources, limits = self._plan_sources(pairs)
+        requests = [(symbol, timeframe, limit) for (symbol, timeframe), limit in limits.items()]
+
+        # 线程池中的 span 挂到当前 scan 下
+        parent = tracer.current_span_id()
+
+        def fetch(request):
+            symbol, timeframe, limit = request
+            with tracer.span("pair", parent=parent, symbol=symbol, timeframe=timeframe, limit=limit):
+                return self._safe_fetch_pair(symbol, timeframe, limit)
+
+        fetched_list = self._fetch_all(fetch, requests)
+        failed = [i for i, klines in enumerate(fetched_list) if klines is None]
+        if failed and self.config.monitor.retry_failed_pairs:
+            # 其他交易对完成后再试一次失败的交易对 (熔断中的会立即失败，不占用时间)
+            logger.info(f"Retrying {len(failed)} failed pairs")
+            for i, klines in zip(failed, self._fetch_all(fetch, [requests[i] for i in failed])):
+                fetched_list[i] = klines
+        fetched = {(symbol, timeframe): klines for (symbol, timeframe, _), klines in zip(requests, fetched_list)}
+
+        prepared = []
+        for symbol, timeframe in pairs:
+            source = sources[(symbol, timeframe)]
+            klines = fetched.get((symbol, source))
+            if klines is not None and source != timeframe:
+                klines = self._derive(symbol, source, timeframe, klines)
+            if klines is None:
+                metrics.skipped_pairs.labels("fetch_failed").inc()
+            prepared.append(klines)
+
+        # 最新已收盘K线的信号已经通知过的，不再分析
+        for i, ((symbol, timeframe), klines) in enumerate(zip(pairs, prepared)):
+            if klines is not None and len(klines) > 1 and self._already_reported(symbol, timeframe, klines.timestamp[1]):
+                logger.debug(f"Signal for {symbol} {timeframe} at {klines.timestamp[1]} already reported, skipping")
+                metrics.skipped_pairs.labels("already_reported").inc()
+                prepared[i] = None
 
-    def _process_pair(self, symbol: str, timeframe: str):
-        # 获取足够的数据: 1 (current) + 1 (target) + 40 (context) = 42
-        # 为了保险起见，获取 50
-        klines = self.client.get_klines(symbol, timeframe, limit=50)
-        return self.strategy.analyze(symbol, timeframe, klines)
+        items = [
+            (symbol, timeframe, self._analysis_input(symbol, timeframe, sources[(symbol, timeframe)], klines))
+            for (symbol, timeframe), klines in zip(pairs, prepared)
+            if klines is not None
+        ]
+        start = time.perf_counter()
+        with tracer.span("analyze", pairs=len(items)):
+            analyzed = iter(self.strategy.analyze_many(items))
+        metrics.analysis_seconds.observe(time.perf_counter() - start)
+        return [next(analyzed) if klines is not None else None for klines in prepared]
+
+    def _analysis_input(self, symbol: str, timeframe: str, source: str, klines):
+        """
+        多进程分析时直接交出拉取时写入的共享内存缓冲区，分析进程按 slot 读取，不复制K线
+        由其他周期合成的K线和不经过缓冲区拉取的仍交出 CandleSeries
+        """
+        if self.parallel is None or source != timeframe or not len(klines):
+            return klines
+        ring = self.rings.find(symbol, timeframe)
+        if ring is not None and ring.last_timestamp == int(klines.timestamp[0]):
+            return ring
+        return klines
+
+    def _already_reported(self, symbol: str, timeframe: str, timestamp) -> bool:
+        """所有形态在同一次分析中一起检测、一起通知，任一形态已通知即说明这根K线处理过"""
+        timestamp = int(timestamp)
+        return any((symbol, timeframe, timestamp, pattern) in self.signal_index for pattern in self.strategy.engine.names)
+
+    def _signal_key(self, res):
+        return (res["symbol"], res["timeframe"], int(res["timestamp"]), res.get("pattern", SIGNAL_TYPE))
+
+    def _plan_sources(self, pairs):
+        """
+        决定每个 (symbol, timeframe) 从哪个周期的数据得到
+        启用 resample 时每个交易对只拉取最小的周期，其余能整除的周期在本地聚合
+        :return: ({pair: 数据来源周期}, {(symbol, 拉取周期): 拉取数量})
+        """
+        sources = {pair: pair[1] for pair in pairs}
+        if self.config.monitor.resample:
+            by_symbol = {}
+            for symbol, timeframe in pairs:
+                by_symbol.setdefault(symbol, []).append(timeframe)
+            for symbol, timeframes in by_symbol.items():
+                base = min(timeframes, key=timeframe_ms)
+                for timeframe in timeframes:
+                    if can_resample(base, timeframe):
+                        sources[(symbol, timeframe)] = base
+
+        limits = {}
+        for (symbol, timeframe), source in sources.items():
+            limit = KLINE_LIMIT * (timeframe_ms(timeframe) // timeframe_ms(source))
+            limits[(symbol, source)] = max(limits.get((symbol, source), 0), limit)
+        return sources, limits
+
+    def _derive(self, symbol: str, source: str, timeframe: str, klines):
+        """由小周期聚合出大周期，verify_resample 开启时与 REST K 线比对"""
+        try:
+            derived = resample(klines, source, timeframe)
+        except Exception as e:
+            logger.error(f"Error deriving {symbol} {timeframe} from {source}: {e}")
+            return None
+
+        if self.config.monitor.verify_resample:
+            try:
+                reference = self.client.get_klines(symbol, timeframe, limit=KLINE_LIMIT)
+                mismatched = verify_resampled(derived, reference)
+                if mismatched:
+                    logger.warning(f"Derived {symbol} {timeframe} candles differ from REST at {mismatched}")
+                else:
+                    logger.info(f"Derived {symbol} {timeframe} candles match REST")
+            except Exception as e:
+                logger.error(f"Error verifying derived {symbol} {timeframe}: {e}")
+        return derived
+
+    def _fetch_all(self, fetch, requests):
+        """按 concurrency 配置并发执行 fetch，返回与 requests 顺序一致的结果"""
+        workers = min(self.config.monitor.concurrency, len(requests))
+        if workers <= 1:
+            return [fetch(request) for request in requests]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+            return list(pool.map(fetch, requests))
+
+    def _safe_fetch_pair(self, symbol: str, timeframe: str, limit: int = KLINE_LIMIT):
+        """单个交易对出错不影响其他交易对"""
+        try:
+            return self._fetch_pair(symbol, timeframe, limit)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping {symbol} {timeframe}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error processing {symbol} {timeframe}: {e}")
+            return None
+
+    def _fetch_pair(self, symbol: str, timeframe: str, limit: int = KLINE_LIMIT):
+        if not self.config.monitor.ring_buffer:
+            return self.client.get_klines(symbol, timeframe, limit=limit)
+        # 拉取结果原地写入缓冲区，返回的 CandleSeries 是缓冲区上的视图 (下一次写入同一交易对前有效)
+        ring = self.rings.get(symbol, timeframe, limit)
+        ring.extend(self.client.get_ohlcv(symbol, timeframe, limit=limit))
+        return ring.window(limit)
 
     def _send_consolidated_report(self, results):
-        """发送汇总报告"""
+        """发送汇总报告，已经通知过或正在发送的信号会被跳过；发送成功后才记入信号索引"""
+        with self._pending_lock:
+            results = [
+                res for res in results
+                if self._signal_key(res) not in self.signal_index and self._signal_key(res) not in self._pending_signals
+            ]
+        if not results:
+            logger.info("All detected signals were already reported.")
+            return
+
         # 按优先级排序，重点在前
         results.sort(key=lambda x: x["is_priority"], reverse=True)
         
-        title = f"监控报告 - 发现 {len(results)} 个 Pinbar 形态"
+        if all(res.get("pattern", SIGNAL_TYPE) == SIGNAL_TYPE for res in results):
+            title = f"监控报告 - 发现 {len(results)} 个 Pinbar 形态"
+        else:
+            title = f"监控报告 - 发现 {len(results)} 个形态信号"
         
         content_lines = []
         content_lines.append(f"扫描时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -118,6 +520,8 @@ class MonitorEngine:
 
             line = f"{priority_mark} 交易对: {symbol} ({timeframe})"
             content_lines.append(line)
+            if res.get("pattern", SIGNAL_TYPE) != SIGNAL_TYPE:
+                content_lines.append(f"形态: {res['pattern']}")
             content_lines.append(f"K线时间: {time_str}")
             content_lines.append(f"详情: {res['details']}")
             content_lines.append("")
@@ -132,5 +536,18 @@ class MonitorEngine:
             content=full_content,
             level=NotificationLevel.INFO
         )
-        self.notifier.send_all(message)
-        logger.success("Consolidated report sent.")
+        keys = [self._signal_key(res) for res in results]
+        with self._pending_lock:
+            self._pending_signals.update(keys)
+
+        def on_done(delivered: bool):
+            # 发送失败 (重试耗尽、队列已满) 的信号不记入索引，下一轮扫描重新通知
+            if delivered:
+                self.signal_index.add_many(keys)
+                logger.success("Consolidated report sent.")
+            else:
+                logger.error(f"Consolidated report was not delivered, {len(keys)} signals will be reported again")
+            with self._pending_lock:
+                self._pending_signals.difference_update(keys)
+
+        self.notifier.send_all(message, on_done=on_done)
@@ -0,0 +1,116 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from binance_monitor.core.archive import RECORD_DTYPE
+from binance_monitor.core.buffer import CandleRing
+
+# worker 进程内的状态: 已映射的共享内存块和按形态列表缓存的分析器
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+_analyzers: Dict[Tuple[str, ...], object] = {}
+
+def _chunk(name: str, shape: Tuple[int, int]) -> np.ndarray:
+    # RingArena 的块分配后不移动，映射一次后一直复用
+    attached = _attached.get(name)
+    if attached is None:
+        shm = shared_memory.SharedMemory(name=name)
+        attached = _attached[name] = (shm, np.ndarray(shape, dtype=RECORD_DTYPE, buffer=shm.buf))
+    return attached[1]
+
+def gather_windows(chunks: Sequence[np.ndarray], chunk_slots: int, slots: np.ndarray, ends: np.ndarray,
+                   length: int) -> np.ndarray:
+    """
+    按 slot 和 CandleRing.end 从各块中取出每个缓冲区最新的 length 根
+    :return: 形状 (len(slots), length) 的记录矩阵，按时间倒序 (index 0 为最新)
+    """
+    out = np.empty((len(slots), length), dtype=RECORD_DTYPE)
+    chunk_index, rows = np.divmod(slots, chunk_slots)
+    columns = ends[:, None] - 1 - np.arange(length)
+    for chunk in np.unique(chunk_index):
+        mask = chunk_index == chunk
+        out[mask] = chunks[chunk][rows[mask][:, None], columns[mask]]
+    return out
+
+def _analyze_rings(names: Tuple[str, ...], chunk_slots: int, capacity: int, slots: np.ndarray, ends: np.ndarray,
+                   keys: List[Tuple[str, str]], patterns: Tuple[str, ...],
+                   closed_index: int) -> Tuple[np.ndarray, Dict[int, Dict[str, Any]]]:
+    """在 worker 进程中直接读取共享内存中的环形缓冲区并分析，只传回时间戳和命中交易对的结果"""
+    from binance_monitor.core.strategy import StrategyAnalyzer
+
+    analyzer = _analyzers.get(patterns)
+    if analyzer is None:
+        analyzer = _analyzers[patterns] = StrategyAnalyzer(patterns)
+    chunks = [_chunk(name, (chunk_slots, 2 * capacity)) for name in names]
+    records = gather_windows(chunks, chunk_slots, slots, ends, closed_index + analyzer.window)
+    return analyzer.analyze_records(keys, records, closed_index)
+
+class ParallelAnalyzer:
+    """
+    多进程批量分析
+    K线留在共享内存的环形缓冲区 (buffer.RingArena) 中，协调进程只把每个交易对的 slot 和写入位置按区间分给常驻进程池；
+    worker 映射同一块内存取窗口、计算特征和所有检测器并生成命中交易对的结果，
+    传回的只有每个交易对的时间戳和少量命中的信号
+    """
+
+    def __init__(self, workers: int, min_pairs: int = 256):
+        """
+        :param workers: 进程数
+        :param min_pairs: 交易对少于此数时在当前进程分析 (进程间调度的开销大于收益)
+        """
+        self.workers = workers
+        self.min_pairs = min_pairs
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 用 spawn 启动: 协调进程中有扫描/通知线程，fork 后的子进程可能继承被占用的锁
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                logger.info(f"Started {self.workers} analysis worker processes")
+            return self._pool
+
+    def analyze_rings(self, keys: Sequence[Tuple[str, str]], rings: Sequence[CandleRing], patterns: Sequence[str],
+                      closed_index: int = 1) -> Tuple[np.ndarray, Dict[int, Dict[str, Any]]]:
+        """
+        :param keys: 与 rings 对应的 (symbol, timeframe)
+        :param rings: 分配在 RingArena 中、K线足够的缓冲区
+        :return: (每个交易对已收盘K线的时间戳, {下标: 命中交易对的完整结果})，见 StrategyAnalyzer.analyze_records
+        """
+        pool = self._executor()
+        groups: Dict[int, List[int]] = {}
+        for i, ring in enumerate(rings):
+            groups.setdefault(id(ring.arena), []).append(i)
+
+        tasks = []
+        for indices in groups.values():
+            arena = rings[indices[0]].arena
+            slots = np.fromiter((rings[i].slot for i in indices), dtype=np.int64, count=len(indices))
+            ends = np.fromiter((rings[i].end for i in indices), dtype=np.int64, count=len(indices))
+            bounds = np.linspace(0, len(indices), min(self.workers, len(indices)) + 1).astype(int)
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                part = indices[start:stop]
+                future = pool.submit(
+                    _analyze_rings, arena.names, arena.chunk_slots, arena.capacity, slots[start:stop],
+                    ends[start:stop], [keys[i] for i in part], tuple(patterns), closed_index,
+                )
+                tasks.append((part, future))
+
+        timestamps = np.empty(len(rings), dtype=np.int64)
+        matched: Dict[int, Dict[str, Any]] = {}
+        for part, future in tasks:
+            part_timestamps, part_matched = future.result()
+            timestamps[part] = part_timestamps
+            matched.update((part[row], result) for row, result in part_matched.items())
+        return timestamps, matched
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
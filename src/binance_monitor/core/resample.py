@@ -0,0 +1,81 @@
+from typing import List
+
+import numpy as np
+
+from binance_monitor.api.exchange import Exchange
+from binance_monitor.core.candles import CandleSeries
+
+# 币安周线从周一 00:00 UTC 开始，而 Unix 纪元 (1970-01-01) 是周四
+WEEK_MS = 7 * 86400 * 1000
+WEEK_OFFSET_MS = 4 * 86400 * 1000
+
+def timeframe_ms(timeframe: str) -> int:
+    return Exchange.parse_timeframe(timeframe) * 1000
+
+def can_resample(source: str, target: str) -> bool:
+    """target 是否能由 source 聚合得到 (整数倍且不是按自然月划分的 1M)"""
+    if target.endswith("M") or source.endswith("M"):
+        return False
+    source_ms, target_ms = timeframe_ms(source), timeframe_ms(target)
+    return target_ms > source_ms and target_ms % source_ms == 0
+
+def bucket_start(timestamps: np.ndarray, target_ms: int) -> np.ndarray:
+    """与交易所对齐的K线开始时间: 日线及以下按 UTC 整点/零点对齐，周线按周一对齐"""
+    offset = WEEK_OFFSET_MS if target_ms == WEEK_MS else 0
+    return (timestamps - offset) // target_ms * target_ms + offset
+
+def resample(series: CandleSeries, source: str, target: str) -> CandleSeries:
+    """
+    把 source 周期的K线聚合成 target 周期
+    最旧的一根如果不是从周期起点开始 (窗口截断) 会被丢弃；最新一根可能尚未收盘，与交易所当前K线一致
+    :param series: 按时间倒序的 source 周期K线
+    :return: 按时间倒序的 target 周期K线
+    """
+    if not can_resample(source, target):
+        raise ValueError(f"Cannot derive {target} candles from {source}")
+    if len(series) == 0:
+        return series
+
+    # 转成时间正序处理
+    ts = series.timestamp[::-1]
+    buckets = bucket_start(ts, timeframe_ms(target))
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(ts))
+
+    if ts[0] != buckets[0]:
+        starts, ends = starts[1:], ends[1:]
+        if len(starts) == 0:
+            return series[0:0]
+
+    open_p = series.open[::-1][starts]
+    close_p = series.close[::-1][ends - 1]
+    high_p = np.maximum.reduceat(series.high[::-1], starts)
+    low_p = np.minimum.reduceat(series.low[::-1], starts)
+    volume = np.add.reduceat(series.volume[::-1], starts)
+
+    return CandleSeries(
+        buckets[starts][::-1].copy(),
+        open_p[::-1].copy(),
+        high_p[::-1].copy(),
+        low_p[::-1].copy(),
+        close_p[::-1].copy(),
+        volume[::-1].copy(),
+    )
+
+def verify_resampled(derived: CandleSeries, reference: CandleSeries) -> List[int]:
+    """
+    校验本地聚合的K线与交易所 REST 返回的K线是否一致
+    只比较双方都已收盘的K线 (跳过两边最新的一根)
+    :return: 不一致的K线时间戳
+    """
+    common, d_idx, r_idx = np.intersect1d(derived.timestamp[1:], reference.timestamp[1:], return_indices=True)
+    d_idx, r_idx = d_idx + 1, r_idx + 1
+
+    same = (
+        (derived.open[d_idx] == reference.open[r_idx])
+        & (derived.high[d_idx] == reference.high[r_idx])
+        & (derived.low[d_idx] == reference.low[r_idx])
+        & (derived.close[d_idx] == reference.close[r_idx])
+        & np.isclose(derived.volume[d_idx], reference.volume[r_idx], rtol=1e-9)
+    )
+    return [int(t) for t in common[~same]]
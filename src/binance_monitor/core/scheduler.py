@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from binance_monitor.core.resample import WEEK_MS, WEEK_OFFSET_MS, timeframe_ms
+
+def candle_open_time(ts_ms: int, timeframe: str) -> int:
+    """ts_ms 所在K线的开始时间 (与交易所对齐，1M 按 UTC 自然月)"""
+    if timeframe.endswith("M"):
+        months = int(timeframe[:-1])
+        dt = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
+        index = (dt.year * 12 + dt.month - 1) // months * months
+        start = datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+        return int(start.timestamp() * 1000)
+
+    period = timeframe_ms(timeframe)
+    offset = WEEK_OFFSET_MS if period == WEEK_MS else 0
+    return (ts_ms - offset) // period * period + offset
+
+def next_candle_open_time(ts_ms: int, timeframe: str) -> int:
+    """ts_ms 之后下一根K线的开始时间，即当前K线的收盘时间"""
+    if timeframe.endswith("M"):
+        start = datetime.fromtimestamp(candle_open_time(ts_ms, timeframe) / 1000, tz=timezone.utc)
+        index = start.year * 12 + start.month - 1 + int(timeframe[:-1])
+        return int(datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    return candle_open_time(ts_ms, timeframe) + timeframe_ms(timeframe)
+
+class CandleCloseScheduler:
+    """
+    按各周期K线收盘时间调度扫描
+    每个周期只在出现新的已收盘K线 (收盘后再等待 settle_seconds) 时才到期，
+    例如 1d 每天只扫描一次，而不是跟着 4h 的 cron 每 4 小时扫描一次
+    """
+
+    def __init__(self, timeframes: Sequence[str], settle_seconds: float = 5.0):
+        """
+        :param settle_seconds: K线收盘后等待的秒数，给交易所留出生成最终K线的时间
+        """
+        self.timeframes = list(dict.fromkeys(timeframes))
+        self.settle_ms = int(settle_seconds * 1000)
+        # 每个周期已处理的最新收盘时间
+        self._processed: Dict[str, int] = {}
+
+    def latest_close(self, timeframe: str, now_ms: int) -> int:
+        """now_ms 时已经收盘并等待完 settle 的最新K线的收盘时间"""
+        return candle_open_time(now_ms - self.settle_ms, timeframe)
+
+    def due(self, now_ms: int) -> List[str]:
+        """有新的已收盘K线、需要扫描的周期"""
+        return [
+            tf for tf in self.timeframes
+            if self.latest_close(tf, now_ms) > self._processed.get(tf, -1)
+        ]
+
+    def set_timeframes(self, timeframes: Sequence[str], now_ms: int):
+        """
+        配置热加载后更新周期: 保留已有周期的进度，新增的周期从下一根收盘K线开始调度
+        """
+        self.timeframes = list(dict.fromkeys(timeframes))
+        self._processed = {tf: self._processed[tf] for tf in self.timeframes if tf in self._processed}
+        self.mark_done([tf for tf in self.timeframes if tf not in self._processed], now_ms)
+
+    def mark_done(self, timeframes: Sequence[str], now_ms: int):
+        for tf in timeframes:
+            self._processed[tf] = self.latest_close(tf, now_ms)
+
+    def next_run_ms(self, now_ms: int) -> Optional[int]:
+        """下一次有周期到期的时间 (毫秒时间戳)"""
+        if not self.timeframes:
+            return None
+        return min(
+            next_candle_open_time(now_ms - self.settle_ms, tf) + self.settle_ms
+            for tf in self.timeframes
+        )
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+# (symbol, timeframe, K线时间戳, 信号类型)
+SignalKey = Tuple[str, str, int, str]
+
+class SignalIndex:
+    """
+    已发送信号索引，避免同一根已收盘K线被重复分析、重复通知
+    内存中是有界 LRU，可选 SQLite 持久化，重启后依然有效
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 10000, retention_ms: Optional[int] = None):
+        """
+        :param path: SQLite 文件路径，为空则只保存在内存中
+        :param capacity: 内存 LRU 容量
+        :param retention_ms: 写入时删除K线时间早于 (当前 - retention_ms) 的持久化记录，
+                             这些K线不会再作为最新已收盘K线被扫描到；为空则不清理
+        """
+        self.capacity = capacity
+        self.retention_ms = retention_ms
+        self._lru: "OrderedDict[SignalKey, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS signals (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    signal_type TEXT NOT NULL,
+                    reported_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, timeframe, timestamp, signal_type)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.commit()
+            # 预热最近的记录
+            rows = self._conn.execute(
+                "SELECT symbol, timeframe, timestamp, signal_type FROM signals ORDER BY reported_at DESC LIMIT ?",
+                (capacity,),
+            ).fetchall()
+            for row in reversed(rows):
+                self._lru[tuple(row)] = None
+
+    def __contains__(self, key: SignalKey) -> bool:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return True
+            if self._conn is None:
+                return False
+            found = self._conn.execute(
+                "SELECT 1 FROM signals WHERE symbol = ? AND timeframe = ? AND timestamp = ? AND signal_type = ?",
+                key,
+            ).fetchone()
+            if found:
+                self._remember(key)
+            return found is not None
+
+    def add_many(self, keys: Iterable[SignalKey]):
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock:
+            for key in keys:
+                self._remember(key)
+            if self._conn is not None:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO signals VALUES (?, ?, ?, ?, ?)",
+                    [(*key, now) for key in keys],
+                )
+                if self.retention_ms:
+                    self._conn.execute("DELETE FROM signals WHERE timestamp < ?", (int(now * 1000) - self.retention_ms,))
+                self._conn.commit()
+
+    def _remember(self, key: SignalKey):
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
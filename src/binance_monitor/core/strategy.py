@@ -1,12 +1,62 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence, Tuple, Union
+import numpy as np
 from loguru import logger
+from binance_monitor.core.buffer import CandleRing
+from binance_monitor.core.candles import FIELDS, CandleSeries, as_series
+from binance_monitor.core.detectors import DetectionEngine, FeatureSet, PinbarDetector, create_detectors
+
+Klines = Union[CandleSeries, CandleRing, List[Dict[str, Any]]]
+
+# 批量分析需要的窗口: 1 (current) + 1 (target) + 40 (context)
+BATCH_WINDOW = 42
+
+# 批量分析的结果记录, direction: 1 = 主影线向上, -1 = 主影线向下
+BATCH_RESULT_DTYPE = np.dtype([
+    ("timestamp", np.int64),
+    ("is_pinbar", np.bool_),
+    ("direction", np.int8),
+    ("context_high", np.float64),
+    ("context_low", np.float64),
+    ("is_priority", np.bool_),
+])
+
+def detected_signals(result: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    一个交易对分析结果中命中的所有信号
+    启用多个形态时 analyze_many 的结果带有 signals 列表，否则只有 Pinbar 本身
+    """
+    if not result:
+        return []
+    if "signals" in result:
+        return result["signals"]
+    return [result] if result.get("is_pinbar") else []
 
 class StrategyAnalyzer:
     """策略分析器"""
 
-    def analyze(self, symbol: str, timeframe: str, klines: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def __init__(self, patterns: Sequence[str] = ("pinbar",), parallel=None):
+        """
+        :param patterns: 启用的形态检测器，见 detectors.DETECTORS
+        :param parallel: parallel.ParallelAnalyzer，给出时交易对足够多的批量分析在进程池中进行
+        """
+        self.patterns = tuple(patterns)
+        self.parallel = parallel
+        self.detectors = create_detectors(patterns)
+        self.engine = DetectionEngine(self.detectors)
+        self._pinbar = PinbarDetector()
+        # 只启用 pinbar 时结果格式与 analyze 完全相同
+        self._multi = self.engine.names != ["pinbar"]
+
+    @property
+    def window(self) -> int:
+        """批量分析每个交易对使用的K线数 (从已收盘的一根开始)"""
+        return max(self.engine.window, BATCH_WINDOW - 1)
+
+    def analyze(self, symbol: str, timeframe: str, klines: Klines, closed_index: int = 1) -> Dict[str, Any]:
         """
         分析K线数据，返回分析结果
+        :param klines: CandleSeries 或按时间倒序的字典列表
+        :param closed_index: 待分析的已收盘K线位置，默认 1 (index 0 为未收盘的当前K线)
         :return: 字典包含 'is_pinbar', 'is_priority', 'message' 等字段
         """
         result = {
@@ -18,13 +68,14 @@ class StrategyAnalyzer:
             "details": ""
         }
 
-        if len(klines) < 41:
+        klines = as_series(klines)
+        if len(klines) < closed_index + 40:
             logger.warning(f"Insufficient data for {symbol} {timeframe}: {len(klines)} candles")
             return result
 
-        # 1. 获取最新的已完成K线 (index 1)
-        pinbar = klines[1] 
-        prev_40 = klines[2:42] # 取前40根
+        # 1. 获取最新的已完成K线 (默认 index 1)
+        pinbar = klines[closed_index]
+        prev_40 = klines[closed_index + 1:closed_index + 41] # 取前40根
         
         result["timestamp"] = pinbar['timestamp']
         
@@ -38,17 +89,210 @@ class StrategyAnalyzer:
         # 3. 判断上下文 (流程2) - 如果满足则标记为重点
         if self._check_context(pinbar, prev_40):
             result["is_priority"] = True
-            direction = "UP" if self._get_main_shadow_direction(pinbar) == "UP" else "DOWN"
-            direction_cn = "看涨" if direction == "UP" else "看跌"
-            result["details"] = (
-                f"方向: {direction_cn} (反转信号), "
-                f"价格: 开={pinbar['open']}, 高={pinbar['high']}, 低={pinbar['low']}, 收={pinbar['close']}"
-            )
-        else:
-            result["details"] = f"价格: 开={pinbar['open']}, 高={pinbar['high']}, 低={pinbar['low']}, 收={pinbar['close']}"
+        result["details"] = self._format_details(pinbar, result["is_priority"])
 
         return result
 
+    def analyze_batch(self, ohlc: np.ndarray, timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        向量化批量分析，一次计算所有交易对的 Pinbar、主影线方向、40 根上下文高低点和优先级
+        判断规则与 analyze 完全一致
+        :param ohlc: 形状 (pairs, candles, 4) 的矩阵，最后一维为 open/high/low/close，
+                     candles 轴按时间倒序 (index 0 为当前 K 线)，至少 42 根
+        :param timestamps: 形状 (pairs, candles) 的时间戳，可选
+        :return: 长度为 pairs 的 BATCH_RESULT_DTYPE 结构化数组
+        """
+        if ohlc.ndim != 3 or ohlc.shape[2] != 4 or ohlc.shape[1] < BATCH_WINDOW:
+            raise ValueError(f"Expected (pairs, >={BATCH_WINDOW}, 4) OHLC matrix, got {ohlc.shape}")
+
+        features = FeatureSet(ohlc[:, 1:BATCH_WINDOW])
+        return self._pinbar_records(features, timestamps[:, 1] if timestamps is not None else None)
+
+    def _pinbar_records(self, features: FeatureSet, timestamps: Optional[np.ndarray]) -> np.ndarray:
+        is_pinbar, direction, is_priority = self._pinbar.detect(features)
+        out = np.zeros(len(features.ohlc), dtype=BATCH_RESULT_DTYPE)
+        if timestamps is not None:
+            out["timestamp"] = timestamps
+        out["is_pinbar"] = is_pinbar
+        out["direction"] = direction
+        out["context_high"] = features["rolling_high_40"]
+        out["context_low"] = features["rolling_low_40"]
+        out["is_priority"] = is_priority
+        return out
+
+    def evaluate_ohlc(self, ohlc: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        在 (pairs, window, 4) 矩阵上运行 Pinbar 与所有启用的检测器 (共享同一个 FeatureSet)
+        :return: (不含时间戳的 BATCH_RESULT_DTYPE 记录, {检测器名: DETECTION_DTYPE 记录}，只启用 pinbar 时为空)
+        """
+        features = FeatureSet(ohlc)
+        pinbars = self._pinbar_records(features, None)
+        detections = self.engine.evaluate_features(features) if self._multi else {}
+        return pinbars, detections
+
+    def analyze_many(self, items: Sequence[Tuple[str, str, Klines]], closed_index: int = 1) -> List[Dict[str, Any]]:
+        """
+        批量分析多个交易对，返回与 items 顺序一致、与 analyze 相同格式的结果
+        所有启用的检测器在同一批矩阵上一次完成，共享 body/影线/滚动高低点等特征；
+        启用了 pinbar 以外的形态时，结果中另有 signals 列表 (见 detected_signals)。
+        klines 为共享内存中的 CandleRing 且交易对足够多时，整批交给 parallel 的进程池，当前进程不读取K线。
+        数据不足的交易对退回逐个 analyze (只检测 Pinbar)
+        :param items: [(symbol, timeframe, klines), ...]
+        :param closed_index: 待分析的已收盘K线位置，默认 1
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        window = self.window
+        end = closed_index + window
+        batch_index, series_list = [], []
+        ring_index, rings = [], []
+        for i, (symbol, timeframe, klines) in enumerate(items):
+            if isinstance(klines, CandleRing):
+                if klines.arena is not None and len(klines) >= end:
+                    ring_index.append(i)
+                    rings.append(klines)
+                    continue
+                klines = klines.window()
+            klines = as_series(klines)
+            if len(klines) >= end:
+                batch_index.append(i)
+                series_list.append(klines)
+            else:
+                results[i] = self.analyze(symbol, timeframe, klines, closed_index)
+
+        if rings and (self.parallel is None or len(rings) < self.parallel.min_pairs):
+            # 交易对太少，直接在当前进程分析缓冲区视图
+            batch_index.extend(ring_index)
+            series_list.extend(ring.window(end) for ring in rings)
+            ring_index, rings = [], []
+
+        if rings:
+            keys = [items[i][:2] for i in ring_index]
+            timestamps, matched = self.parallel.analyze_rings(keys, rings, self.patterns, closed_index)
+            for row, (i, timestamp) in enumerate(zip(ring_index, timestamps.tolist())):
+                result = matched.get(row)
+                if result is None:
+                    result = self._empty_result(*keys[row], timestamp)
+                results[i] = result
+            self._log_pinbars(matched.values())
+
+        if series_list:
+            ohlc = np.empty((len(series_list), window, 4))
+            self._fill_ohlc(ohlc, series_list, closed_index, end)
+            pinbars, detections = self.evaluate_ohlc(ohlc)
+            pinbars["timestamp"] = [series.timestamp[closed_index] for series in series_list]
+            candle_at = lambda row: series_list[row][closed_index]
+            for row, i in enumerate(batch_index):
+                symbol, timeframe, _ = items[i]
+                results[i] = self._batch_to_result(symbol, timeframe, pinbars, detections, row, candle_at)
+            self._log_pinbars(results[i] for i in batch_index)
+        return results
+
+    def analyze_records(self, keys: Sequence[Tuple[str, str]], records: np.ndarray,
+                        closed_index: int = 1) -> Tuple[np.ndarray, Dict[int, Dict[str, Any]]]:
+        """
+        分析 (pairs, closed_index + window) 的 RECORD_DTYPE 矩阵 (按时间倒序)，供分析进程使用
+        只为命中的交易对生成结果 (描述文字等)，其余交易对由调用方用时间戳补全
+        :return: (每个交易对已收盘K线的时间戳, {行号: 与 analyze_many 相同的结果})
+        """
+        ohlc = np.stack([records[name][:, closed_index:] for name in ("open", "high", "low", "close")], axis=-1)
+        pinbars, detections = self.evaluate_ohlc(ohlc)
+        timestamps = records["timestamp"][:, closed_index]
+        pinbars["timestamp"] = timestamps
+
+        hit = pinbars["is_pinbar"] | pinbars["is_priority"]
+        for record in detections.values():
+            hit |= record["matched"]
+        candle_at = lambda row: CandleSeries(*(records[name][row] for name in FIELDS))[closed_index]
+        matched = {
+            int(row): self._batch_to_result(*keys[row], pinbars, detections, row, candle_at)
+            for row in np.flatnonzero(hit)
+        }
+        return timestamps, matched
+
+    @staticmethod
+    def _fill_ohlc(out: np.ndarray, series_list: Sequence[CandleSeries], start: int, end: int):
+        for column, field in enumerate(("open", "high", "low", "close")):
+            np.stack([getattr(series, field)[start:end] for series in series_list], out=out[:, :, column])
+
+    def analyze_archive(self, archive, pairs: Sequence[Tuple[str, str]], closed_index: int = 1,
+                        end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        直接从K线存档分析，K线以 mmap 视图传入 analyze_many，不经过 ccxt 列表或字典
+        :param archive: core.archive.CandleArchive
+        :param end_ms: 只使用该时间之前的K线 (回放历史时刻)，默认最新
+        """
+        limit = closed_index + self.window
+        return self.analyze_many(
+            [(symbol, timeframe, archive.series(symbol, timeframe, limit, end_ms)) for symbol, timeframe in pairs],
+            closed_index,
+        )
+
+    def _empty_result(self, symbol: str, timeframe: str, timestamp: int) -> Dict[str, Any]:
+        """没有命中任何形态的交易对的结果"""
+        result = {
+            "is_pinbar": False,
+            "is_priority": False,
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "timestamp": timestamp,
+            "details": ""
+        }
+        if self._multi:
+            result["signals"] = []
+        return result
+
+    def _batch_to_result(self, symbol: str, timeframe: str, pinbars: np.ndarray, detections: Dict[str, np.ndarray],
+                         row: int, candle_at: Callable[[int], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        :param candle_at: 按行号取已收盘K线的字典，只在命中时调用
+        """
+        record = pinbars[row]
+        result = self._empty_result(symbol, timeframe, int(record["timestamp"]))
+        result["is_pinbar"] = bool(record["is_pinbar"])
+        result["is_priority"] = bool(record["is_priority"])
+        if result["is_pinbar"]:
+            result["details"] = self._format_details(candle_at(row), result["is_priority"])
+        if self._multi:
+            result["signals"] = self._signals(symbol, timeframe, detections, row, candle_at)
+        return result
+
+    def _signals(self, symbol: str, timeframe: str, detections: Dict[str, np.ndarray], row: int,
+                 candle_at: Callable[[int], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """一个交易对命中的所有形态，每个形态一条信号"""
+        signals = []
+        candle = None
+        for detector in self.detectors:
+            record = detections[detector.name][row]
+            if not record["matched"]:
+                continue
+            if candle is None:
+                candle = candle_at(row)
+            is_priority = bool(record["is_priority"])
+            signals.append({
+                "is_pinbar": detector.name == "pinbar",
+                "is_priority": is_priority,
+                "symbol": symbol,
+                "timeframe": timeframe,
+                "timestamp": int(candle["timestamp"]),
+                "pattern": detector.name,
+                "details": detector.describe(candle, int(record["direction"]), is_priority),
+            })
+        return signals
+
+    @staticmethod
+    def _log_pinbars(results: Iterable[Dict[str, Any]]):
+        for result in results:
+            if result["is_pinbar"]:
+                logger.info(f"Pinbar detected for {result['symbol']} {result['timeframe']} at {result['timestamp']}")
+
+    def _format_details(self, pinbar: Dict[str, Any], is_priority: bool) -> str:
+        prices = f"价格: 开={pinbar['open']}, 高={pinbar['high']}, 低={pinbar['low']}, 收={pinbar['close']}"
+        if not is_priority:
+            return prices
+        direction = "UP" if self._get_main_shadow_direction(pinbar) == "UP" else "DOWN"
+        direction_cn = "看涨" if direction == "UP" else "看跌"
+        return f"方向: {direction_cn} (反转信号), {prices}"
+
     def _is_pinbar(self, kline: Dict[str, Any]) -> bool:
         """
         判断是否是 Pinbar
@@ -82,10 +326,11 @@ class StrategyAnalyzer:
         
         return "UP" if upper_shadow > lower_shadow else "DOWN"
 
-    def _check_context(self, pinbar: Dict[str, Any], prev_klines: List[Dict[str, Any]]) -> bool:
+    def _check_context(self, pinbar: Dict[str, Any], prev_klines: Klines) -> bool:
         """
         流程2：上下文判断
         """
+        prev_klines = as_series(prev_klines)
         direction = self._get_main_shadow_direction(pinbar)
         pinbar_length = pinbar['high'] - pinbar['low']
         
@@ -94,8 +339,7 @@ class StrategyAnalyzer:
             # 判断pinbar的最高点减去前40根K线的最高点的值的绝对值是否小于这个pinbar的长度
             # 或者如果当前pinbar的最低值高于前40根k线的最高值 (Gap Up)
             
-            prev_highs = [k['high'] for k in prev_klines]
-            max_prev_high = max(prev_highs)
+            max_prev_high = float(prev_klines.high.max())
             
             cond1 = abs(pinbar['high'] - max_prev_high) < pinbar_length
             cond2 = pinbar['low'] > max_prev_high
@@ -109,8 +353,7 @@ class StrategyAnalyzer:
             # 判断pinbar的最低点减去前40根K线的最低点的值的绝对值是否小于这个pinbar的长度
             # 或者当前pinbar的最高值小于前40根k线的最低值 (Gap Down)
             
-            prev_lows = [k['low'] for k in prev_klines]
-            min_prev_low = min(prev_lows)
+            min_prev_low = float(prev_klines.low.min())
             
             cond1 = abs(pinbar['low'] - min_prev_low) < pinbar_length
             cond2 = pinbar['high'] < min_prev_low
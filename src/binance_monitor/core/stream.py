@@ -0,0 +1,292 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+from loguru import logger
+
+from binance_monitor.api.client import BinanceClient
+from binance_monitor.api.exchange import Exchange
+from binance_monitor.core.buffer import CandleRing
+from binance_monitor.core.strategy import StrategyAnalyzer, detected_signals
+from binance_monitor.utils.tracing import tracer
+
+DEFAULT_STREAM_URL = "wss://stream.binance.com:9443/stream"
+
+# 单条 SUBSCRIBE 消息携带的 stream 数量上限
+SUBSCRIBE_CHUNK = 200
+
+def stream_name(symbol: str, timeframe: str) -> str:
+    """'BTC/USDT', '4h' -> 'btcusdt@kline_4h'"""
+    return f"{symbol.replace('/', '').lower()}@kline_{timeframe}"
+
+class KlineStream:
+    """
+    币安 K 线 WebSocket 订阅
+    为每个 (symbol, timeframe) 维护一个已收盘 K 线的滚动窗口，收到 x=true (已收盘) 的 K 线时立即检测
+    断线后自动重连、重新订阅，并通过 REST 回补断线期间缺失的 K 线
+    """
+
+    def __init__(
+        self,
+        client: BinanceClient,
+        strategy: StrategyAnalyzer,
+        pairs: Sequence[Tuple[str, str]],
+        on_signals: Callable[[List[Dict[str, Any]]], None],
+        url: str = DEFAULT_STREAM_URL,
+        proxy: Optional[str] = None,
+        window: int = 50,
+        concurrency: int = 4,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        batch_delay: float = 2.0,
+    ):
+        """
+        :param on_signals: 检测到 Pinbar 时的回调，同一时刻收盘的多个信号会合并成一批
+        :param window: 每个交易对保留的已收盘 K 线数量
+        :param batch_delay: 合并信号的等待时间(秒)
+        """
+        self.client = client
+        self.strategy = strategy
+        self.on_signals = on_signals
+        self.url = url
+        self.proxy = proxy
+        self.window = window
+        self.concurrency = concurrency
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.batch_delay = batch_delay
+
+        self._pairs: Dict[str, Tuple[str, str]] = {stream_name(s, tf): (s, tf) for s, tf in pairs}
+        self._windows: Dict[Tuple[str, str], CandleRing] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # 正在回补缺口的交易对 -> 回补期间收到的已收盘K线
+        self._gap_rows: Dict[Tuple[str, str], List[List[float]]] = {}
+        self._gap_tasks: Set[asyncio.Task] = set()
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running = False
+
+    async def run(self):
+        """连接并持续消费，直到 stop() 被调用"""
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        # 没有扫描轮次，按时间把回补、分析的 span 写入 trace 文件
+        trace_task = asyncio.create_task(self._flush_traces()) if tracer.enabled else None
+        try:
+            await self._run()
+        finally:
+            if trace_task is not None:
+                trace_task.cancel()
+            tracer.flush()
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        async with aiohttp.ClientSession() as session:
+            while self.running:
+                try:
+                    async with session.ws_connect(self.url, proxy=self.proxy, heartbeat=30) as ws:
+                        self._ws = ws
+                        await self._subscribe(ws)
+                        # 先订阅再回补，回补期间到达的消息会缓存在连接中，不会丢失
+                        await self._backfill_all()
+                        delay = self.reconnect_delay
+                        await self._consume(ws)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Kline stream error: {e}")
+                finally:
+                    self._ws = None
+
+                if not self.running:
+                    break
+                logger.warning(f"Kline stream disconnected, reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+        if self._gap_tasks:
+            await asyncio.gather(*self._gap_tasks)
+        if self._flush_task is not None:
+            await self._flush_task
+
+    async def _flush_traces(self):
+        while True:
+            await asyncio.sleep(tracer.config.stream_flush_seconds)
+            await asyncio.to_thread(tracer.flush)
+
+    async def stop(self):
+        self.running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+    def set_pairs(self, pairs: Sequence[Tuple[str, str]]):
+        """
+        从其他线程 (配置热加载) 替换订阅的交易对，只增减变化的部分
+        未运行时直接替换，下次连接时按新列表订阅
+        """
+        if self._loop is None or not self.running:
+            self._pairs = {stream_name(s, tf): (s, tf) for s, tf in pairs}
+            return
+        asyncio.run_coroutine_threadsafe(self.update_pairs(pairs), self._loop)
+
+    async def update_pairs(self, pairs: Sequence[Tuple[str, str]]):
+        """增量订阅/退订，新增的交易对通过 REST 建立窗口，未变化的交易对保留现有窗口"""
+        wanted = {stream_name(s, tf): (s, tf) for s, tf in pairs}
+        added = [name for name in wanted if name not in self._pairs]
+        removed = [name for name in self._pairs if name not in wanted]
+        for name in removed:
+            self._windows.pop(self._pairs[name], None)
+        self._pairs = wanted
+
+        ws = self._ws
+        if ws is not None:
+            # 断线重连时 _subscribe 会按新的 _pairs 订阅，这里只处理当前连接
+            for method, streams in (("UNSUBSCRIBE", removed), ("SUBSCRIBE", added)):
+                for i in range(0, len(streams), SUBSCRIBE_CHUNK):
+                    await ws.send_json({"method": method, "params": streams[i:i + SUBSCRIBE_CHUNK], "id": int(time.time() * 1000) + i})
+        logger.info(f"Updated kline streams: +{len(added)} -{len(removed)}")
+        await self._backfill_all([wanted[name] for name in added], analyze_new=False)
+
+    async def _subscribe(self, ws: aiohttp.ClientWebSocketResponse):
+        streams = list(self._pairs)
+        for i in range(0, len(streams), SUBSCRIBE_CHUNK):
+            await ws.send_json({"method": "SUBSCRIBE", "params": streams[i:i + SUBSCRIBE_CHUNK], "id": i // SUBSCRIBE_CHUNK + 1})
+        logger.info(f"Subscribed to {len(streams)} kline streams")
+
+    async def _consume(self, ws: aiohttp.ClientWebSocketResponse):
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await self._handle_message(json.loads(msg.data))
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                raise ws.exception() or ConnectionError("WebSocket error")
+
+    async def _handle_message(self, payload: Dict[str, Any]):
+        # 组合流的消息格式为 {"stream": ..., "data": {...}}，订阅回执为 {"result": null, "id": 1}
+        data = payload.get("data", payload)
+        if data.get("e") != "kline":
+            return
+
+        k = data["k"]
+        if not k["x"]:
+            return
+
+        key = self._pairs.get(stream_name(k["s"], k["i"]))
+        if key is None:
+            return
+
+        row = [int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"])]
+        await self._on_closed_candle(key, row)
+
+    async def _on_closed_candle(self, key: Tuple[str, str], row: List[float]):
+        symbol, timeframe = key
+        if key in self._gap_rows:
+            # 缺口回补完成后一起处理
+            self._gap_rows[key].append(row)
+            return
+
+        timeframe_ms = Exchange.parse_timeframe(timeframe) * 1000
+        window = self._windows.get(key)
+
+        if window and row[0] <= window[-1][0]:
+            return  # 重复推送
+
+        if not window or row[0] - window[-1][0] > timeframe_ms:
+            # REST 回补放到单独的任务中，不阻塞其他交易对的消息
+            logger.warning(f"Gap detected in {symbol} {timeframe} stream, backfilling via REST")
+            self._gap_rows[key] = [row]
+            task = asyncio.create_task(self._fill_gap(key))
+            self._gap_tasks.add(task)
+            task.add_done_callback(self._gap_tasks.discard)
+            return
+
+        window.push(row)
+        self._evaluate(key)
+
+    async def _fill_gap(self, key: Tuple[str, str]):
+        """回补一个交易对的缺口，再依次处理回补期间收到的K线；失败时只跳过这些K线"""
+        try:
+            await self._backfill(key)
+        except Exception as e:
+            rows = self._gap_rows.pop(key)
+            logger.error(f"Error backfilling {key[0]} {key[1]}: {e}, skipped {len(rows)} closed candles")
+            return
+        rows = self._gap_rows.pop(key)
+        if stream_name(*key) not in self._pairs:
+            # 回补期间已退订
+            self._windows.pop(key, None)
+            return
+
+        window = self._windows[key]
+        evaluated = False
+        for row in rows:
+            if window.push(row):
+                self._evaluate(key)
+                evaluated = True
+        if not evaluated and window:
+            # 推送的K线已包含在回补结果中
+            self._evaluate(key)
+
+    async def _backfill_all(self, keys: Optional[Sequence[Tuple[str, str]]] = None, analyze_new: bool = True):
+        """:param keys: 只回补这些交易对，默认全部"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def backfill(key):
+            async with semaphore:
+                try:
+                    await self._backfill(key, analyze_new=analyze_new)
+                except Exception as e:
+                    logger.error(f"Error backfilling {key[0]} {key[1]}: {e}")
+
+        await asyncio.gather(*(backfill(key) for key in (self._pairs.values() if keys is None else keys)))
+
+    async def _backfill(self, key: Tuple[str, str], analyze_new: bool = False):
+        """
+        通过 REST 重建窗口，只保留已收盘的 K 线
+        :param analyze_new: 回补出比原窗口更新的已收盘 K 线时 (断线期间收盘) 立即检测
+        """
+        symbol, timeframe = key
+        timeframe_ms = Exchange.parse_timeframe(timeframe) * 1000
+        klines = await asyncio.to_thread(self.client.get_klines, symbol, timeframe, self.window + 1)
+
+        now_ms = int(time.time() * 1000)
+        rows = [
+            [k['timestamp'], k['open'], k['high'], k['low'], k['close'], k['volume']]
+            for k in reversed(list(klines))
+            if k['timestamp'] + timeframe_ms <= now_ms
+        ]
+
+        # 重连回补时复用原来的缓冲区
+        window = self._windows.get(key) or CandleRing(self.window)
+        last_ts = window.last_timestamp
+        window.clear()
+        window.extend(rows)
+        self._windows[key] = window
+
+        if analyze_new and last_ts is not None and rows and rows[-1][0] > last_ts:
+            self._evaluate(key)
+
+    def _evaluate(self, key: Tuple[str, str]):
+        symbol, timeframe = key
+        series = self._windows[key].window()
+        with tracer.span("analyze", symbol=symbol, timeframe=timeframe):
+            [result] = self.strategy.analyze_many([(symbol, timeframe, series)], closed_index=0)
+        signals = detected_signals(result)
+        if not signals:
+            return
+
+        self._pending.extend(signals)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_delay)
+        results, self._pending = self._pending, []
+        self._flush_task = None
+        try:
+            # 通知可能较慢 (SMTP)，放到线程里避免阻塞事件循环
+            await asyncio.to_thread(self.on_signals, results)
+        except Exception as e:
+            logger.error(f"Error delivering stream signals: {e}")
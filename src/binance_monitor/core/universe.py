@@ -0,0 +1,130 @@
+import re
+import time
+from typing import Any, List, Mapping, Optional, Sequence
+
+from loguru import logger
+
+from binance_monitor.api.client import BinanceClient
+from binance_monitor.config import UniverseConfig
+
+# 币安杠杆代币: <标的>UP/DOWN/BULL/BEAR，只在标的属于发行过杠杆代币的币种时才算，避免误伤 SYRUP 这类普通代币
+LEVERAGED_PATTERN = re.compile(r"^([A-Z0-9]*)(UP|DOWN|BULL|BEAR)$")
+LEVERAGED_UNDERLYINGS = frozenset({
+    "", "BTC", "ETH", "BNB", "XRP", "ADA", "DOT", "LINK", "TRX", "EOS", "LTC", "XTZ", "BCH",
+    "FIL", "SUSHI", "AAVE", "UNI", "YFI", "SXP", "XLM", "1INCH",
+})
+
+def is_leveraged(base: str, market: Optional[Mapping[str, Any]] = None) -> bool:
+    """
+    是否为杠杆代币
+    :param market: load_markets 中的交易对信息，交易所标记了 LEVERAGED 权限时直接按它判断
+    """
+    info = (market or {}).get("info") or {}
+    permissions = list(info.get("permissions") or [])
+    for permission_set in info.get("permissionSets") or []:
+        permissions.extend(permission_set)
+    if "LEVERAGED" in permissions:
+        return True
+    match = LEVERAGED_PATTERN.match(base)
+    return match is not None and match.group(1) in LEVERAGED_UNDERLYINGS
+
+def rank_symbols(tickers: Mapping[str, Mapping[str, Any]], markets: Optional[Mapping[str, Mapping[str, Any]]],
+                 config: UniverseConfig) -> List[str]:
+    """
+    按 24h 行情给交易对排序 (降序)
+    :param tickers: fetch_tickers 的结果
+    :param markets: load_markets 的结果，用于过滤已下架/非现货/其他计价币的交易对，为空时只按 symbol 判断计价币
+    """
+    exclude = set(config.exclude)
+    scored = []
+    for symbol, ticker in tickers.items():
+        base, _, quote = symbol.partition("/")
+        if quote != config.quote or symbol in exclude:
+            continue
+        market = markets.get(symbol) if markets is not None else None
+        if markets is not None and (not market or market.get("active") is False or market.get("spot") is False):
+            continue
+        if config.exclude_leveraged and is_leveraged(base, market):
+            continue
+
+        quote_volume = ticker.get("quoteVolume") or 0.0
+        if quote_volume < config.min_quote_volume:
+            continue
+        if config.rank_by == "quote_volume":
+            score = quote_volume
+        else:
+            high, low, last = ticker.get("high"), ticker.get("low"), ticker.get("last")
+            if not high or not low or not last:
+                continue
+            score = (high - low) / last
+        scored.append((score, symbol))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [symbol for _, symbol in scored]
+
+class Universe:
+    """
+    全市场模式的交易对选择
+    每隔 refresh_minutes 用一次 fetch_tickers (权重 80，相当于 40 次K线请求) 重新排名，
+    每轮扫描按分档返回需要扫描的交易对: 排名靠前的每轮都扫描，靠后的隔几轮扫描一次
+    """
+
+    def __init__(self, client: BinanceClient, config: UniverseConfig):
+        self.client = client
+        self.config = config
+        self.ranked: List[str] = []
+        self.refreshed_at: Optional[float] = None
+        self._scans = 0
+
+    def configure(self, config: UniverseConfig):
+        """热加载新配置，筛选条件变化时下一轮立即重新排名"""
+        if config.model_dump(exclude={"tiers", "refresh_minutes"}) != self.config.model_dump(exclude={"tiers", "refresh_minutes"}):
+            self.refreshed_at = None
+        self.config = config
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """排名过期时重新拉取 tickers，失败时沿用上一次的排名"""
+        due = (
+            force or self.refreshed_at is None
+            or time.monotonic() - self.refreshed_at >= self.config.refresh_minutes * 60
+        )
+        if not due:
+            return self.ranked
+        try:
+            tickers = self.client.get_tickers()
+            markets = self.client.exchange.markets or None
+            self.ranked = rank_symbols(tickers, markets, self.config)[:self._capacity()]
+            self.refreshed_at = time.monotonic()
+            logger.info(
+                f"Universe refreshed: {len(self.ranked)} {self.config.quote} pairs by {self.config.rank_by} "
+                f"(from {len(tickers)} tickers)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to refresh universe, keeping {len(self.ranked)} pairs: {e}")
+        return self.ranked
+
+    def _capacity(self) -> int:
+        if self.config.tiers:
+            return min(self.config.top_n, max(tier.size for tier in self.config.tiers))
+        return self.config.top_n
+
+    def select(self, pinned: Sequence[str] = ()) -> List[str]:
+        """
+        本轮要扫描的交易对
+        :param pinned: 总是扫描的交易对 (monitor.symbols)，排在最前面
+        """
+        ranked = self.refresh()
+        scan = self._scans
+        self._scans += 1
+
+        tiers = sorted(self.config.tiers, key=lambda tier: tier.size)
+        if not tiers:
+            selected = ranked
+        else:
+            selected = []
+            start = 0
+            for tier in tiers:
+                if scan % tier.every == 0:
+                    selected.extend(ranked[start:tier.size])
+                start = max(start, tier.size)
+        return list(dict.fromkeys([*pinned, *selected]))
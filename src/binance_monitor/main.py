@@ -1,23 +1,37 @@
+import time
+
+# 进程启动时间，用于统计从启动到开始第一次扫描的耗时
+_STARTED_AT = time.perf_counter()
+
 import sys
 import os
 from loguru import logger
 from binance_monitor.config import load_config
 from binance_monitor.notification import EmailNotifier, NotificationManager
 from binance_monitor.core.engine import MonitorEngine
+from binance_monitor.utils.metrics import metrics
+from binance_monitor.utils.tracing import tracer
+
+CONFIG_PATH = "config/config.yaml"
 
 def main():
+    notification_manager = None
+    engine = None
     try:
         # 1. Load Config
-        config = load_config()
+        config = load_config(CONFIG_PATH)
         logger.info("Configuration loaded.")
+        metrics.serve(config.metrics)
+        tracer.configure(config.tracing)
 
         # 2. Setup Notification
-        notification_manager = NotificationManager()
+        notification_manager = NotificationManager(config.notification)
         email_notifier = EmailNotifier(config.email)
         notification_manager.add_notifier(email_notifier)
         
         # 3. Setup and Start Engine
-        engine = MonitorEngine(config, notification_manager)
+        engine = MonitorEngine(config, notification_manager, config_path=CONFIG_PATH)
+        logger.info(f"Startup finished in {(time.perf_counter() - _STARTED_AT) * 1000:.0f} ms")
         engine.start()
 
     except KeyboardInterrupt:
@@ -26,6 +40,12 @@ def main():
         logger.error(f"Fatal error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # 发送完队列中剩余的通知再退出
+        if notification_manager is not None:
+            notification_manager.shutdown()
+        if engine is not None:
+            engine.close()
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,7 @@
 from .models import NotificationMessage, NotificationLevel
 from .base import BaseNotifier
 from .email_notifier import EmailNotifier, EmailConfig
-from .manager import NotificationManager
+from .manager import NotificationManager, DispatchConfig
 
 __all__ = [
     "NotificationMessage",
@@ -9,5 +9,6 @@ __all__ = [
     "BaseNotifier",
     "EmailNotifier",
     "EmailConfig",
-    "NotificationManager"
+    "NotificationManager",
+    "DispatchConfig"
 ]
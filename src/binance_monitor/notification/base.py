@@ -18,3 +18,7 @@ class BaseNotifier(ABC):
     def name(self) -> str:
         """通知器名称"""
         pass
+
+    def close(self):
+        """释放连接等资源，默认无需处理"""
+        pass
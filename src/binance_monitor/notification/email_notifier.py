@@ -1,4 +1,6 @@
 import smtplib
+import threading
+from typing import Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pydantic import BaseModel, EmailStr, Field
@@ -15,12 +17,15 @@ class EmailConfig(BaseModel):
     sender_email: EmailStr = Field(..., description="发件人邮箱")
     receiver_email: EmailStr = Field(..., description="收件人邮箱")
     use_tls: bool = Field(True, description="是否使用TLS加密")
+    timeout: float = Field(30.0, description="SMTP连接超时(秒)")
 
 class EmailNotifier(BaseNotifier):
-    """邮件通知实现"""
+    """邮件通知实现，复用已登录的 SMTP 会话，连接失效时自动重连"""
 
     def __init__(self, config: EmailConfig):
         self.config = config
+        self._server: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
 
     @property
     def name(self) -> str:
@@ -44,13 +49,8 @@ class EmailNotifier(BaseNotifier):
             """
             msg.attach(MIMEText(body, 'html'))
 
-            # 连接 SMTP 服务器
-            with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port) as server:
-                if self.config.use_tls:
-                    server.starttls()
-                
-                server.login(self.config.username, self.config.password)
-                server.send_message(msg)
+            with self._lock:
+                self._send_message(msg)
                 
             logger.info(f"Email sent successfully to {self.config.receiver_email}")
             return True
@@ -58,3 +58,48 @@ class EmailNotifier(BaseNotifier):
         except Exception as e:
             logger.error(f"Failed to send email: {str(e)}")
             return False
+
+    def _send_message(self, msg: MIMEMultipart):
+        """使用已有会话发送，会话被服务器断开时重新连接并重试一次"""
+        for attempt in range(2):
+            reused = self._server is not None
+            if not reused:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                self._discard()
+                # 新建的连接也失败就不再重试
+                if not reused or attempt == 1:
+                    raise
+                logger.info(f"SMTP session lost ({e}), reconnecting")
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=self.config.timeout)
+        try:
+            if self.config.use_tls:
+                server.starttls()
+            server.login(self.config.username, self.config.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _discard(self):
+        if self._server is None:
+            return
+        try:
+            self._server.close()
+        except Exception:
+            pass
+        self._server = None
+
+    def close(self):
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except Exception:
+                    pass
+            self._discard()
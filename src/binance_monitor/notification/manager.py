@@ -1,30 +1,201 @@
-from typing import List
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
 from loguru import logger
+from pydantic import BaseModel, Field
 from binance_monitor.notification.base import BaseNotifier
 from binance_monitor.notification.models import NotificationMessage
+from binance_monitor.utils.metrics import metrics
+from binance_monitor.utils.tracing import tracer
+
+class DispatchConfig(BaseModel):
+    """通知分发配置"""
+    async_dispatch: bool = Field(False, description="是否在后台线程中发送，扫描线程不等待发送完成")
+    max_retries: int = Field(2, ge=0, description="发送失败后的最大重试次数")
+    retry_delay_seconds: float = Field(2.0, ge=0, description="首次重试前的等待时间，之后每次翻倍")
+    queue_size: int = Field(100, ge=1, description="每个通知渠道的队列长度上限")
+
+class _ChannelStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+
+class _Delivery:
+    """一条消息在各渠道的发送结果，所有渠道都完成 (成功、重试耗尽或队列已满) 后回调一次"""
+
+    def __init__(self, channels: int, on_done: Optional[Callable[[bool], None]]):
+        self.remaining = channels
+        self.delivered = False
+        self.on_done = on_done
+        self._lock = threading.Lock()
+
+    def done(self, success: bool):
+        with self._lock:
+            self.delivered = self.delivered or success
+            self.remaining -= 1
+            if self.remaining:
+                return
+        if self.on_done is not None:
+            try:
+                self.on_done(self.delivered)
+            except Exception as e:
+                logger.error(f"Error in notification callback: {e}")
+
+class _ChannelWorker:
+    """单个通知渠道的后台发送线程"""
+
+    _STOP = object()
+
+    def __init__(self, notifier: BaseNotifier, manager: "NotificationManager", queue_size: int):
+        self.notifier = notifier
+        self.manager = manager
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self._run, name=f"notify-{notifier.name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, message: NotificationMessage, delivery: _Delivery, parent: Optional[int] = None) -> bool:
+        try:
+            self.queue.put_nowait((message, delivery, time.monotonic(), parent))
+            return True
+        except queue.Full:
+            return False
+
+    def stop(self):
+        self.queue.put(self._STOP)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                message, delivery, enqueued_at, parent = item
+                delivery.done(self.manager._deliver(self.notifier, message, enqueued_at, parent))
+            finally:
+                self.queue.task_done()
 
 class NotificationManager:
     """通知管理器，负责管理多个通知渠道"""
-    
-    def __init__(self):
+
+    def __init__(self, config: Optional[DispatchConfig] = None):
+        self.config = config or DispatchConfig()
         self._notifiers: List[BaseNotifier] = []
+        self._workers: Dict[str, _ChannelWorker] = {}
+        self._stats: Dict[str, _ChannelStats] = {}
+        self._stats_lock = threading.Lock()
 
     def add_notifier(self, notifier: BaseNotifier):
         """添加通知器"""
         self._notifiers.append(notifier)
+        self._stats[notifier.name] = _ChannelStats()
+        if self.config.async_dispatch:
+            self._workers[notifier.name] = _ChannelWorker(notifier, self, self.config.queue_size)
         logger.info(f"Notifier added: {notifier.name}")
 
-    def send_all(self, message: NotificationMessage):
-        """通过所有已注册的通知器发送消息"""
+    def send_all(self, message: NotificationMessage, on_done: Optional[Callable[[bool], None]] = None):
+        """
+        通过所有已注册的通知器发送消息 (异步模式下只入队，立即返回)
+        :param on_done: 所有渠道处理完后调用，参数为是否至少有一个渠道发送成功；
+                        异步模式下在发送线程中调用
+        """
         if not self._notifiers:
             logger.warning("No notifiers registered, skipping notification.")
+            if on_done is not None:
+                on_done(False)
             return
 
         logger.info(f"Sending notification: {message.title}")
-        for notifier in self._notifiers:
+        delivery = _Delivery(len(self._notifiers), on_done)
+        with tracer.span("notify", title=message.title) as span:
+            for notifier in self._notifiers:
+                worker = self._workers.get(notifier.name)
+                if worker is None:
+                    delivery.done(self._deliver(notifier, message, time.monotonic()))
+                elif not worker.submit(message, delivery, span.id):
+                    with self._stats_lock:
+                        self._stats[notifier.name].dropped += 1
+                    logger.error(f"Notification queue for {notifier.name} is full, dropping: {message.title}")
+                    delivery.done(False)
+
+    def _deliver(self, notifier: BaseNotifier, message: NotificationMessage, enqueued_at: float,
+                 parent: Optional[int] = None) -> bool:
+        """发送一条消息，失败时按指数退避重试 max_retries 次，返回是否发送成功"""
+        with tracer.span("channel", parent=parent, channel=notifier.name) as span:
+            success, attempts = self._deliver_with_retries(notifier, message, enqueued_at)
+            span.set(success=success, attempts=attempts)
+        return success
+
+    def _deliver_with_retries(self, notifier: BaseNotifier, message: NotificationMessage, enqueued_at: float):
+        """:return: (是否成功, 尝试次数)"""
+        delay = self.config.retry_delay_seconds
+        for attempt in range(self.config.max_retries + 1):
             try:
                 success = notifier.send(message)
-                if not success:
-                    logger.warning(f"Failed to send via {notifier.name}")
             except Exception as e:
                 logger.error(f"Error in {notifier.name}: {e}")
+                success = False
+
+            if success:
+                latency = time.monotonic() - enqueued_at
+                with self._stats_lock:
+                    stats = self._stats[notifier.name]
+                    stats.sent += 1
+                    stats.retries += attempt
+                    stats.last_latency = latency
+                    stats.total_latency += latency
+                metrics.notification_latency.labels(notifier.name).observe(latency)
+                return True, attempt + 1
+
+            if attempt < self.config.max_retries:
+                logger.warning(f"Failed to send via {notifier.name}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay *= 2
+
+        with self._stats_lock:
+            stats = self._stats[notifier.name]
+            stats.failed += 1
+            stats.retries += self.config.max_retries
+        logger.warning(f"Failed to send via {notifier.name}")
+        return False, self.config.max_retries + 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        各通知渠道的发送统计
+        :return: {渠道名: {queue_depth, sent, failed, retries, dropped, last_latency, avg_latency}}，延迟单位为秒 (从入队到发送成功)
+        """
+        with self._stats_lock:
+            result = {}
+            for name, stats in self._stats.items():
+                worker = self._workers.get(name)
+                result[name] = {
+                    "queue_depth": worker.queue.qsize() if worker else 0,
+                    "sent": stats.sent,
+                    "failed": stats.failed,
+                    "retries": stats.retries,
+                    "dropped": stats.dropped,
+                    "last_latency": stats.last_latency,
+                    "avg_latency": stats.total_latency / stats.sent if stats.sent else 0.0,
+                }
+            return result
+
+    def flush(self):
+        """等待所有已入队的消息处理完毕"""
+        for worker in self._workers.values():
+            worker.queue.join()
+
+    def shutdown(self):
+        """发送完队列中剩余的消息后停止后台线程并关闭各通知器"""
+        for worker in self._workers.values():
+            worker.stop()
+        self._workers.clear()
+        for notifier in self._notifiers:
+            try:
+                notifier.close()
+            except Exception as e:
+                logger.error(f"Error closing {notifier.name}: {e}")
@@ -0,0 +1,128 @@
+from loguru import logger
+from pydantic import BaseModel, Field
+
+# 秒级延迟的分桶: K线请求通常 50ms~2s, 整轮扫描可达数分钟
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+class MetricsConfig(BaseModel):
+    """Prometheus 指标配置"""
+    enabled: bool = Field(False, description="是否开启 HTTP 指标接口 (需要安装 prometheus-client)")
+    host: str = Field("0.0.0.0", description="指标接口监听地址")
+    port: int = Field(9108, ge=1, le=65535, description="指标接口端口")
+
+class _NoopMetric:
+    """未启用时的占位指标，所有操作都是空调用"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+_NOOP = _NoopMetric()
+
+class Metrics:
+    """
+    监控进程的 Prometheus 指标
+    默认所有指标都是空操作，enable() 之后才导入 prometheus_client 并创建真正的指标，
+    因此未启用时既不需要安装依赖，热路径上也只多一次空方法调用
+    """
+
+    def __init__(self):
+        self.disable()
+
+    def disable(self):
+        """恢复为空操作指标"""
+        self.registry = None
+        self.fetch_latency = _NOOP
+        self.analysis_seconds = _NOOP
+        self.notification_latency = _NOOP
+        self.scan_duration = _NOOP
+        self.api_errors = _NOOP
+        self.signals_found = _NOOP
+        self.skipped_pairs = _NOOP
+        self.weight_used = _NOOP
+        self.scan_lag = _NOOP
+        self.request_retries = _NOOP
+        self.hedged_requests = _NOOP
+        self.circuit_rejections = _NOOP
+        self.ring_buffer_bytes = _NOOP
+
+    @property
+    def enabled(self) -> bool:
+        return self.registry is not None
+
+    def enable(self, registry=None):
+        """
+        创建真正的指标
+        :param registry: prometheus_client.CollectorRegistry，默认新建一个 (不使用全局注册表，便于测试)
+        """
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.registry = registry if registry is not None else CollectorRegistry()
+        self.fetch_latency = Histogram(
+            "binance_monitor_kline_fetch_seconds", "K线请求耗时", ["timeframe"],
+            buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.analysis_seconds = Histogram(
+            "binance_monitor_analysis_seconds", "每轮扫描的策略分析耗时",
+            buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.notification_latency = Histogram(
+            "binance_monitor_notification_seconds", "通知从入队到发送成功的耗时", ["channel"],
+            buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.scan_duration = Histogram(
+            "binance_monitor_scan_seconds", "整轮扫描耗时",
+            buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.api_errors = Counter(
+            "binance_monitor_api_errors", "交易所请求失败次数", ["endpoint", "error"], registry=self.registry,
+        )
+        self.signals_found = Counter(
+            "binance_monitor_signals", "检测到的信号数量", ["timeframe"], registry=self.registry,
+        )
+        self.skipped_pairs = Counter(
+            "binance_monitor_skipped_pairs", "跳过分析的交易对数量", ["reason"], registry=self.registry,
+        )
+        self.weight_used = Gauge(
+            "binance_monitor_request_weight_used", "当前分钟已使用的请求权重", registry=self.registry,
+        )
+        self.scan_lag = Gauge(
+            "binance_monitor_scan_lag_seconds", "扫描实际开始时间相对计划时间的延迟", registry=self.registry,
+        )
+        self.request_retries = Counter(
+            "binance_monitor_request_retries", "网络类错误后的重试次数", ["endpoint"], registry=self.registry,
+        )
+        self.hedged_requests = Counter(
+            "binance_monitor_hedged_requests", "对冲请求数量 (sent: 发出, won: 先于主请求返回)", ["outcome"], registry=self.registry,
+        )
+        self.circuit_rejections = Counter(
+            "binance_monitor_circuit_rejections", "因熔断未发出的请求数量", ["scope"], registry=self.registry,
+        )
+        self.ring_buffer_bytes = Gauge(
+            "binance_monitor_ring_buffer_bytes", "K线环形缓冲区占用的内存", registry=self.registry,
+        )
+
+    def serve(self, config: MetricsConfig):
+        """按配置启用指标并启动 HTTP 接口 (后台线程)"""
+        if not config.enabled:
+            return
+        try:
+            from prometheus_client import start_http_server
+        except ImportError:
+            logger.error("Metrics are enabled but prometheus-client is not installed (pip install prometheus-client)")
+            return
+        if not self.enabled:
+            self.enable()
+        start_http_server(config.port, addr=config.host, registry=self.registry)
+        logger.info(f"Serving Prometheus metrics on http://{config.host}:{config.port}/metrics")
+
+# 进程内共享的指标实例
+metrics = Metrics()
@@ -0,0 +1,213 @@
+import cProfile
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+class TraceConfig(BaseModel):
+    """扫描链路追踪配置"""
+    enabled: bool = Field(False, description="是否记录每轮扫描的 span")
+    trace_dir: str = Field("logs/traces", description="trace 文件目录, 每轮扫描一个文件")
+    format: Literal["chrome", "jsonl"] = Field("chrome", description="chrome: Chrome trace (可用 Perfetto/speedscope 打开); jsonl: 每行一个 span")
+    max_files: int = Field(50, ge=1, description="最多保留最近多少轮扫描的 trace")
+    max_spans: int = Field(100000, ge=1, description="单个 trace 最多记录的 span 数, 超出后丢弃")
+    profile_every: int = Field(0, ge=0, description="每 N 轮扫描对 run_job 做一次 cProfile 采样, 0 表示不采样")
+    stream_flush_seconds: float = Field(60.0, gt=0, description="stream 模式没有扫描轮次, 每隔这么多秒写一个 trace 文件")
+
+class _NullSpan:
+    """未启用追踪时返回的空 span"""
+    id = None
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional[int], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.id = next(tracer._ids)
+
+    def __enter__(self) -> "Span":
+        stack = self.tracer._stack()
+        if self.parent is None and stack:
+            self.parent = stack[-1].id
+        stack.append(self)
+        self.ts_us = time.time_ns() // 1000
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        dur_us = (time.perf_counter_ns() - self._start) // 1000
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._record({
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "ts": self.ts_us,
+            "dur": dur_us,
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+        })
+        return False
+
+    def set(self, **attrs):
+        """补充 span 属性 (例如请求结束后才知道的结果)"""
+        self.attrs.update(attrs)
+
+class Tracer:
+    """
+    轻量的嵌套 span 记录器
+    同一线程内的 span 自动嵌套；线程池中的 span 通过 parent 参数挂到发起它的 span 下。
+    每轮扫描结束时 flush() 把缓冲的 span 写成一个文件，超过 max_files 的旧文件被删除。
+    未启用时 span() 返回同一个空对象，几乎没有开销
+    """
+
+    def __init__(self):
+        self.configure(TraceConfig())
+
+    def configure(self, config: TraceConfig):
+        self.config = config
+        self.enabled = config.enabled
+        self._ids = itertools.count(1)
+        self._spans: List[Dict[str, Any]] = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._scans = 0
+
+    def span(self, name: str, parent: Optional[int] = None, **attrs):
+        """
+        :param parent: 父 span 的 id，为空时取当前线程中最近打开的 span
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, parent, attrs)
+
+    def current_span_id(self) -> Optional[int]:
+        """当前线程中最内层 span 的 id，用于把线程池中的 span 挂到它下面"""
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        return stack[-1].id if stack else None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span: Dict[str, Any]):
+        with self._lock:
+            if len(self._spans) < self.config.max_spans:
+                self._spans.append(span)
+            else:
+                self._dropped += 1
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        """
+        按 profile_every 决定本轮扫描是否采样 cProfile
+        注意 cProfile 只统计调用线程，线程池中的拉取在 trace 的 span 中体现
+        """
+        if not self.enabled:
+            return None
+        self._scans += 1
+        every = self.config.profile_every
+        if not every or (self._scans - 1) % every:
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def flush(self, profiler: Optional[cProfile.Profile] = None) -> Optional[str]:
+        """
+        把缓冲的 span 写入新的 trace 文件，并清理旧文件
+        :return: trace 文件路径，未启用或没有 span 时返回 None
+        """
+        if profiler is not None:
+            profiler.disable()
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            spans, self._spans = self._spans, []
+            dropped, self._dropped = self._dropped, 0
+        if not spans and profiler is None:
+            return None
+
+        try:
+            os.makedirs(self.config.trace_dir, exist_ok=True)
+            stem = os.path.join(self.config.trace_dir, f"scan-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}")
+            if self.config.format == "chrome":
+                path = f"{stem}.json"
+                self._write_chrome(path, spans, dropped)
+            else:
+                path = f"{stem}.jsonl"
+                self._write_jsonl(path, spans)
+            if profiler is not None:
+                profiler.dump_stats(f"{stem}.prof")
+            if dropped:
+                logger.warning(f"Trace buffer full, dropped {dropped} spans")
+            self._rotate()
+            return path
+        except Exception as e:
+            logger.warning(f"Failed to write trace to {self.config.trace_dir}: {e}")
+            return None
+
+    def _write_chrome(self, path: str, spans: List[Dict[str, Any]], dropped: int):
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "ph": "X",
+                "ts": span["ts"],
+                "dur": span["dur"],
+                "pid": pid,
+                "tid": span["tid"],
+                "args": {**span["attrs"], "id": span["id"], "parent": span["parent"]},
+            }
+            for span in spans
+        ]
+        # 线程名，便于在查看器中区分扫描线程和通知线程
+        for tid, name in {span["tid"]: span["thread"] for span in spans}.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "otherData": {"dropped_spans": dropped}}, f, default=str)
+
+    def _write_jsonl(self, path: str, spans: List[Dict[str, Any]]):
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + '\n')
+
+    def _rotate(self):
+        stems = sorted({
+            os.path.splitext(name)[0]
+            for name in os.listdir(self.config.trace_dir)
+            if name.startswith("scan-")
+        })
+        for stem in stems[:-self.config.max_files]:
+            for ext in (".json", ".jsonl", ".prof"):
+                path = os.path.join(self.config.trace_dir, stem + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+# 进程内共享的 tracer
+tracer = Tracer()
@@ -1,5 +1,10 @@
 import sys
+import json
 import os
+import subprocess
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -7,6 +12,7 @@ from unittest.mock import MagicMock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from binance_monitor.api import BinanceClient
+from binance_monitor.api.ratelimit import WeightLimiter
 from binance_monitor.config import BinanceConfig
 
 class TestBinanceAPI(unittest.TestCase):
@@ -32,10 +38,465 @@ class TestBinanceAPI(unittest.TestCase):
     def test_connection_error(self, mock_binance):
         mock_exchange = MagicMock()
         mock_binance.return_value = mock_exchange
-        mock_exchange.load_markets.side_effect = Exception("Network Error")
+        mock_exchange.fetch_time.side_effect = Exception("Network Error")
         
         client = BinanceClient(BinanceConfig())
         self.assertFalse(client.check_connection())
+        mock_exchange.load_markets.assert_not_called()
+
+class TestLazyCcxt(unittest.TestCase):
+    def test_ccxt_package_is_complete_after_import(self):
+        # 在新进程中检查: 当前进程的 ccxt 可能已经被其他测试完整导入
+        code = (
+            "import sys\n"
+            "import binance_monitor.api.client\n"
+            "import importlib.metadata, ccxt\n"
+            "assert 'ccxt.okx' not in sys.modules\n"
+            "assert ccxt.__version__ == importlib.metadata.version('ccxt'), ccxt.__version__\n"
+            "assert 'okx' in dir(ccxt) and ccxt.binance is ccxt.binance\n"
+            "from ccxt import NetworkError\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(__file__), '../src'))
+        result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+class TestMarketCache(unittest.TestCase):
+    MARKETS = {"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT", "active": True}}
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "markets.json")
+
+    def make_client(self, mock_binance, **kwargs):
+        mock_exchange = MagicMock()
+        mock_exchange.markets = None
+        mock_exchange.load_markets.return_value = self.MARKETS
+        mock_binance.return_value = mock_exchange
+        return BinanceClient(BinanceConfig(markets_cache_path=self.path, **kwargs)), mock_exchange
+
+    @patch("ccxt.binance")
+    def test_markets_loaded_once_and_persisted(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        self.assertEqual(client.load_markets(), self.MARKETS)
+        self.assertEqual(client.load_markets(), self.MARKETS)
+        exchange.load_markets.assert_called_once_with(reload=True)
+
+        # 新进程直接使用磁盘缓存
+        client, exchange = self.make_client(mock_binance)
+        exchange.set_markets.assert_called_once_with(self.MARKETS)
+        self.assertEqual(client.load_markets(), self.MARKETS)
+        exchange.load_markets.assert_not_called()
+
+    @patch("ccxt.binance")
+    def test_cached_markets_are_indexed_once(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        client.load_markets()
+        # 新进程: ccxt 的 set_markets 重建字典，exchange.markets 不是缓存中的同一个对象
+        client, exchange = self.make_client(mock_binance)
+        exchange.set_markets.side_effect = lambda markets: setattr(exchange, "markets", dict(markets))
+        for _ in range(3):
+            self.assertEqual(client.load_markets(), self.MARKETS)
+        exchange.set_markets.assert_called_once_with(self.MARKETS)
+
+    @patch("ccxt.binance")
+    def test_expired_markets_are_reloaded(self, mock_binance):
+        client, exchange = self.make_client(mock_binance, markets_ttl_seconds=0)
+        client.load_markets()
+        client.load_markets()
+        self.assertEqual(exchange.load_markets.call_count, 2)
+
+    @patch("ccxt.binance")
+    def test_get_klines_paginates_large_limits(self, mock_binance):
+        mock_exchange = MagicMock()
+        mock_binance.return_value = mock_exchange
+        hour = 3600 * 1000
+
+        def fetch(symbol, timeframe, since=None, limit=None):
+            return [[since + i * hour, 1.0, 2.0, 0.5, 1.5, 1.0] for i in range(limit)]
+
+        mock_exchange.fetch_ohlcv.side_effect = fetch
+        client = BinanceClient(BinanceConfig(weight_limit_per_minute=0))
+        klines = client.get_klines("BTC/USDT", "1h", limit=1200)
+
+        self.assertEqual(len(klines), 1200)
+        self.assertEqual([c[1]["limit"] for c in mock_exchange.fetch_ohlcv.call_args_list], [1000, 200])
+        self.assertTrue((klines.timestamp[:-1] - klines.timestamp[1:] == hour).all())
+
+class TestKlineCache(unittest.TestCase):
+    HOUR_MS = 3600 * 1000
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache_path = os.path.join(self.tmpdir.name, "klines.db")
+        # 对齐到整点，最新一根为当前未收盘 K 线
+        self.now_open = int(time.time() * 1000) // self.HOUR_MS * self.HOUR_MS
+
+    def candles(self, count, end=None):
+        end = self.now_open if end is None else end
+        start = end - (count - 1) * self.HOUR_MS
+        return [[start + i * self.HOUR_MS, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(count)]
+
+    def make_client(self, mock_binance):
+        mock_exchange = MagicMock()
+        mock_binance.return_value = mock_exchange
+        config = BinanceConfig(kline_cache_path=self.cache_path, kline_cache_size=100)
+        return BinanceClient(config), mock_exchange
+
+    @patch("ccxt.binance")
+    def test_incremental_fetch(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+
+        # 第一次: 全量拉取
+        exchange.fetch_ohlcv.return_value = self.candles(50)
+        klines = client.get_klines("BTC/USDT", "1h", limit=50)
+        self.assertEqual(len(klines), 50)
+        exchange.fetch_ohlcv.assert_called_with("BTC/USDT", "1h", limit=50)
+
+        # 第二次: 只拉取最新一根之后的尾部
+        tail = [[self.now_open, 1.0, 3.0, 0.5, 2.5, 20.0]]
+        exchange.fetch_ohlcv.return_value = tail
+        klines = client.get_klines("BTC/USDT", "1h", limit=50)
+        _, kwargs = exchange.fetch_ohlcv.call_args
+        self.assertEqual(kwargs["since"], self.now_open)
+        self.assertLessEqual(kwargs["limit"], 3)
+        self.assertEqual(len(klines), 50)
+        self.assertEqual(klines[0]['timestamp'], self.now_open)
+        self.assertEqual(klines[0]['close'], 2.5)
+
+    @patch("ccxt.binance")
+    def test_cache_survives_restart(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        exchange.fetch_ohlcv.return_value = self.candles(50)
+        client.get_klines("ETH/USDT", "1h", limit=50)
+        client.cache.close()
+
+        client, exchange = self.make_client(mock_binance)
+        exchange.fetch_ohlcv.return_value = []
+        klines = client.get_klines("ETH/USDT", "1h", limit=50)
+        self.assertEqual(len(klines), 50)
+        self.assertIn("since", exchange.fetch_ohlcv.call_args[1])
+
+    @patch("ccxt.binance")
+    def test_stale_cache_falls_back_to_full_fetch(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        old_end = self.now_open - 200 * self.HOUR_MS
+        exchange.fetch_ohlcv.return_value = self.candles(50, end=old_end)
+        client.get_klines("SOL/USDT", "1h", limit=50)
+
+        exchange.fetch_ohlcv.return_value = self.candles(50)
+        klines = client.get_klines("SOL/USDT", "1h", limit=50)
+        exchange.fetch_ohlcv.assert_called_with("SOL/USDT", "1h", limit=50)
+        self.assertEqual(klines[0]['timestamp'], self.now_open)
+        # 全量拉取替换旧数据，不与缺口之前的K线拼在一起
+        self.assertEqual(client.cache.state("SOL/USDT", "1h"), (50, self.now_open))
+
+    @patch("ccxt.binance")
+    def test_window_with_gap_is_fetched_again(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        # 缓存数量足够，但两段之间缺了 150 根
+        client.cache.upsert("SOL/USDT", "1h", self.candles(40, end=self.now_open - 200 * self.HOUR_MS))
+        client.cache.upsert("SOL/USDT", "1h", self.candles(50))
+
+        # 尾部没有新K线，拼出的窗口跨越缺口，改为全量拉取
+        exchange.fetch_ohlcv.side_effect = [[], self.candles(80)]
+        klines = client.get_klines("SOL/USDT", "1h", limit=80)
+        exchange.fetch_ohlcv.assert_called_with("SOL/USDT", "1h", limit=80)
+        self.assertEqual(klines.timestamp[-1], self.now_open - 79 * self.HOUR_MS)
+
+class TestWarmSnapshot(unittest.TestCase):
+    HOUR_MS = 3600 * 1000
+    MARKETS = {"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT", "active": True}}
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "warm")
+        self.now_open = int(time.time() * 1000) // self.HOUR_MS * self.HOUR_MS
+
+    def candles(self, count):
+        start = self.now_open - (count - 1) * self.HOUR_MS
+        return [[start + i * self.HOUR_MS, 1.0, 2.0, 0.5, 1.5 + i, 10.0] for i in range(count)]
+
+    def make_client(self, mock_binance):
+        mock_exchange = MagicMock()
+        mock_exchange.markets = None
+        mock_exchange.load_markets.return_value = self.MARKETS
+        mock_binance.return_value = mock_exchange
+        return BinanceClient(BinanceConfig(warm_start_path=self.path, weight_limit_per_minute=0)), mock_exchange
+
+    @patch("ccxt.binance")
+    def test_restart_uses_snapshot(self, mock_binance):
+        client, exchange = self.make_client(mock_binance)
+        client.load_markets()
+        exchange.fetch_ohlcv.return_value = self.candles(50)
+        first = client.get_klines("BTC/USDT", "1h", limit=50)
+        client.close()
+        # markets 与 MarketCache 一样保存为 JSON，载入时不会执行任意代码
+        with open(os.path.join(self.path, "markets.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["markets"], self.MARKETS)
+
+        # 新进程: markets 直接注入 ccxt，K线只增量拉取尾部
+        client, exchange = self.make_client(mock_binance)
+        exchange.set_markets.assert_called_once_with(self.MARKETS)
+        self.assertEqual(client.load_markets(), self.MARKETS)
+        exchange.load_markets.assert_not_called()
+
+        exchange.fetch_ohlcv.return_value = [[self.now_open, 1.0, 3.0, 0.5, 2.5, 20.0]]
+        klines = client.get_klines("BTC/USDT", "1h", limit=50)
+        self.assertEqual(exchange.fetch_ohlcv.call_args[1]["since"], self.now_open)
+        self.assertEqual(klines[0]["close"], 2.5)
+        self.assertEqual(klines[1:].to_dicts(), first[1:].to_dicts())
+        client.close()
+
+        # 每次保存只保留最新的K线文件
+        candle_files = [name for name in os.listdir(self.path) if name.startswith("candles-")]
+        self.assertEqual(len(candle_files), 1)
+
+    def test_upsert_keeps_latest_candles(self):
+        from binance_monitor.api.snapshot import WarmSnapshot
+        snapshot = WarmSnapshot(self.path, max_candles=10)
+        snapshot.upsert("BTC/USDT", "1h", self.candles(8))
+        snapshot.upsert("BTC/USDT", "1h", [[self.now_open, 1.0, 2.0, 0.5, 99.0, 1.0], [self.now_open + self.HOUR_MS, 1.0, 2.0, 0.5, 100.0, 1.0]])
+        count, last_ts = snapshot.state("BTC/USDT", "1h")
+        self.assertEqual((count, last_ts), (9, self.now_open + self.HOUR_MS))
+        self.assertEqual(snapshot.load("BTC/USDT", "1h", 2)[:, 4].tolist(), [99.0, 100.0])
+        snapshot.upsert("BTC/USDT", "1h", [[self.now_open + i * self.HOUR_MS, 1, 2, 0.5, 1, 1] for i in range(2, 5)])
+        self.assertEqual(snapshot.state("BTC/USDT", "1h")[0], 10)
+
+    def test_unreadable_snapshot_is_ignored(self):
+        from binance_monitor.api.snapshot import WarmSnapshot
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, "index.json"), "w") as f:
+            f.write("{broken")
+        snapshot = WarmSnapshot(self.path)
+        self.assertEqual(snapshot.state("BTC/USDT", "1h"), (0, None))
+
+class TestWeightLimiter(unittest.TestCase):
+    def test_budget_throttles_requests(self):
+        # 600 权重/分钟 * 0.5 => 300 的桶, 每秒补充 5
+        limiter = WeightLimiter(weight_limit=600, safety_ratio=0.5)
+        start = time.monotonic()
+        for _ in range(150):
+            limiter.acquire("klines")  # 150 * 2 = 300, 刚好用完
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        limiter.acquire("klines")
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertGreater(limiter.headroom()["waited_seconds"], 0)
+
+    def test_used_weight_header_pauses_before_ban(self):
+        limiter = WeightLimiter(weight_limit=1000, safety_ratio=0.9)
+        limiter.observe({"X-MBX-USED-WEIGHT-1M": "950"})
+        headroom = limiter.headroom()
+        self.assertEqual(headroom["used_weight"], 950)
+        self.assertEqual(headroom["remaining"], 50)
+        self.assertGreater(headroom["paused_seconds"], 0)
+        self.assertEqual(headroom["available"], 0)
+
+    def test_class_quota_blocks_when_used_up(self):
+        # tickers 每分钟 160 => 两次请求用完, 每秒补充 160/60
+        limiter = WeightLimiter(weight_limit=6000, class_limits={"tickers": 160})
+        start = time.monotonic()
+        limiter.acquire("tickers")
+        limiter.acquire("tickers")
+        # 其他类别不受影响
+        limiter.acquire("klines")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire("tickers", weight=1), acquired.set()), daemon=True)
+        thread.start()
+        self.assertFalse(acquired.wait(0.2))
+        self.assertTrue(acquired.wait(2))
+
+    @patch("ccxt.binance")
+    def test_client_passes_class_limits(self, mock_binance):
+        client = BinanceClient(BinanceConfig(weight_class_limits={"tickers": 800}))
+        self.assertEqual(client.limiter._class_buckets["tickers"].capacity, 800)
+
+        with self.assertRaises(ValueError):
+            BinanceConfig(weight_class_limits={"orders": 100})
+        with self.assertRaises(ValueError):
+            BinanceConfig(weight_class_limits={"tickers": 10})
+
+    @staticmethod
+    def respond(exchange, headers, result=None, error=None):
+        """模拟 ccxt fetch: 每个响应都经过 on_rest_response"""
+        def fetch(*args, **kwargs):
+            exchange.on_rest_response(200, "OK", "https://api.binance.com", "GET", headers, "[]", {}, None)
+            if error is not None:
+                raise error
+            return result
+        return fetch
+
+    @patch("ccxt.binance")
+    def test_client_routes_requests_through_limiter(self, mock_binance):
+        mock_exchange = MagicMock()
+        mock_binance.return_value = mock_exchange
+
+        client = BinanceClient(BinanceConfig())
+        mock_exchange.fetch_ohlcv.side_effect = self.respond(
+            client.exchange, {"x-mbx-used-weight-1m": "42"}, [[0, 1.0, 2.0, 0.5, 1.5, 1.0]]
+        )
+        self.assertFalse(mock_binance.call_args[0][0]['enableRateLimit'])
+        client.get_klines("BTC/USDT", "1h", limit=1)
+        self.assertEqual(client.rate_limit_headroom()["used_weight"], 42)
+
+    @patch("ccxt.binance")
+    def test_rate_limited_response_pauses(self, mock_binance):
+        import ccxt
+        mock_exchange = MagicMock()
+        mock_binance.return_value = mock_exchange
+
+        client = BinanceClient(BinanceConfig())
+        mock_exchange.fetch_ohlcv.side_effect = self.respond(
+            client.exchange, {"Retry-After": "30"}, error=ccxt.DDoSProtection("429")
+        )
+        with self.assertRaises(ccxt.DDoSProtection):
+            client.get_klines("BTC/USDT", "1h", limit=1)
+        self.assertGreater(client.rate_limit_headroom()["paused_seconds"], 29)
+
+    @patch("ccxt.binance")
+    def test_response_headers_are_read_per_thread(self, mock_binance):
+        mock_exchange = MagicMock()
+        mock_binance.return_value = mock_exchange
+        client = BinanceClient(BinanceConfig())
+        responded, other_done = threading.Event(), threading.Event()
+        observed = {}
+        observe = client.limiter.observe
+
+        def record(headers):
+            observed[threading.current_thread().name] = headers
+            observe(headers)
+
+        client.limiter.observe = record
+
+        def fetch(symbol, timeframe, limit):
+            weight = "100" if symbol == "BTC/USDT" else "900"
+            client.exchange.on_rest_response(200, "OK", "url", "GET", {"x-mbx-used-weight-1m": weight}, "[]", {}, None)
+            mock_exchange.last_response_headers = {"x-mbx-used-weight-1m": weight}
+            if symbol == "BTC/USDT":
+                # 另一个线程在本线程读取响应头之前收到了自己的响应
+                responded.set()
+                other_done.wait(5)
+            return [[0, 1.0, 2.0, 0.5, 1.5, 1.0]]
+
+        mock_exchange.fetch_ohlcv.side_effect = fetch
+        first = threading.Thread(target=client.get_klines, args=("BTC/USDT", "1h", 1), name="btc")
+        first.start()
+        responded.wait(5)
+        second = threading.Thread(target=client.get_klines, args=("ETH/USDT", "1h", 1), name="eth")
+        second.start()
+        second.join(5)
+        other_done.set()
+        first.join(5)
+        self.assertEqual(observed["btc"], {"x-mbx-used-weight-1m": "100"})
+        self.assertEqual(observed["eth"], {"x-mbx-used-weight-1m": "900"})
+
+class TestResilience(unittest.TestCase):
+    def make(self, **kwargs):
+        from binance_monitor.api.resilience import Resilience
+        from binance_monitor.config import ResilienceConfig
+        kwargs.setdefault("retry_base_delay_seconds", 0.001)
+        return Resilience(ResilienceConfig(**kwargs))
+
+    def test_transient_errors_are_retried(self):
+        import ccxt
+        send = MagicMock(side_effect=[ccxt.RequestTimeout("slow"), ccxt.NetworkError("reset"), "ok"])
+        self.assertEqual(self.make(max_retries=2).call("klines", "BTC/USDT", send), "ok")
+        self.assertEqual(send.call_count, 3)
+
+        # 业务错误和限流不重试
+        for error in (ccxt.BadSymbol("delisted"), ccxt.DDoSProtection("429")):
+            send = MagicMock(side_effect=error)
+            with self.assertRaises(type(error)):
+                self.make().call("klines", "BTC/USDT", send)
+            self.assertEqual(send.call_count, 1)
+
+    def test_circuit_breaker_opens_and_half_opens(self):
+        import ccxt
+        from binance_monitor.api.resilience import CircuitOpenError
+        resilience = self.make(max_retries=0, breaker_failures=2, breaker_reset_seconds=0.05)
+        failing = MagicMock(side_effect=ccxt.BadSymbol("delisted"))
+        for _ in range(2):
+            with self.assertRaises(ccxt.BadSymbol):
+                resilience.call("klines", "LUNA/USDT", failing)
+        with self.assertRaises(CircuitOpenError):
+            resilience.call("klines", "LUNA/USDT", failing)
+        self.assertEqual(failing.call_count, 2)
+        self.assertEqual(resilience.open_circuits(), ["symbol:LUNA/USDT"])
+        # 只熔断该交易对，接口和其他交易对不受影响
+        self.assertEqual(resilience.call("klines", "BTC/USDT", lambda: "ok"), "ok")
+
+        time.sleep(0.06)
+        self.assertEqual(resilience.call("klines", "LUNA/USDT", lambda: "back"), "back")
+        self.assertEqual(resilience.open_circuits(), [])
+
+    def test_slow_request_is_hedged(self):
+        resilience = self.make(hedge=True, hedge_min_samples=5, hedge_min_delay_seconds=0)
+        for _ in range(5):
+            resilience.call("klines", "BTC/USDT", lambda: "fast")
+
+        calls = []
+
+        def send():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "hedged"
+
+        start = time.monotonic()
+        self.assertEqual(resilience.call("klines", "BTC/USDT", send), "hedged")
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(len(calls), 2)
+        resilience.close()
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "session.jsonl.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_client(self, mode):
+        return BinanceClient(BinanceConfig(weight_limit_per_minute=0, transport_mode=mode, transport_path=self.path))
+
+    @patch("ccxt.binance")
+    def test_replay_serves_recorded_responses(self, mock_binance):
+        import ccxt
+        rows = [[1000 * i, 1.0, 2.0, 0.5, 1.5 + i / 3, 10.0] for i in range(5)]
+        mock_exchange = MagicMock()
+        mock_exchange.fetch_ohlcv.side_effect = [rows, rows[1:]]
+        mock_exchange.fetch_ticker.side_effect = ccxt.NetworkError("timeout")
+        mock_binance.return_value = mock_exchange
+
+        client = self.make_client("record")
+        first = client.get_klines("BTC/USDT", "1h", limit=5)
+        second = client.get_klines("BTC/USDT", "1h", limit=5)
+        with self.assertRaises(ccxt.NetworkError):
+            client.get_price("BTC/USDT")
+        client.close()
+
+        replay_exchange = MagicMock()
+        mock_binance.return_value = replay_exchange
+        client = self.make_client("replay")
+        self.assertEqual(client.get_klines("BTC/USDT", "1h", limit=5).to_dicts(), first.to_dicts())
+        self.assertEqual(client.get_klines("BTC/USDT", "1h", limit=5).to_dicts(), second.to_dicts())
+        with self.assertRaises(ccxt.NetworkError):
+            client.get_price("BTC/USDT")
+        replay_exchange.fetch_ohlcv.assert_not_called()
+
+    @patch("ccxt.binance")
+    def test_replay_miss_raises(self, mock_binance):
+        from binance_monitor.api.transport import ReplayMissError
+        self.make_client("record").close()
+        client = self.make_client("replay")
+        with self.assertRaises(ReplayMissError):
+            client.get_klines("ETH/USDT", "4h", limit=2)
 
 if __name__ == "__main__":
     unittest.main()
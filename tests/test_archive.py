@@ -0,0 +1,111 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.api import BinanceClient
+from binance_monitor.backtest import discover_datasets, load_ohlcv
+from binance_monitor.config import BinanceConfig
+from binance_monitor.core.archive import HEADER_SIZE, RECORD_DTYPE, ArchiveFile, CandleArchive
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.strategy import StrategyAnalyzer
+
+HOUR_MS = 3600 * 1000
+START = 1_700_000_000_000 // HOUR_MS * HOUR_MS
+
+
+def candles(count, start=START):
+    rng = np.random.default_rng(count)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    return [
+        [start + i * HOUR_MS, c - 0.5, c + abs(rng.normal()), c - 1 - abs(rng.normal()), c, 10.0 + i]
+        for i, c in enumerate(close)
+    ]
+
+
+class TestArchiveFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "BTCUSDT", "1h.bin")
+
+    def test_append_only_with_last_candle_update(self):
+        archive = ArchiveFile(self.path)
+        rows = candles(100)
+        self.assertEqual(archive.append(rows[:60]), 60)
+        # 与最后一根重叠的部分: 更早的忽略，最后一根 (未收盘) 被覆盖
+        updated = list(rows[59])
+        updated[4] = 999.0
+        self.assertEqual(archive.append(rows[30:59] + [updated] + rows[60:]), 40)
+
+        reopened = ArchiveFile(self.path)
+        self.assertEqual(len(reopened), 100)
+        self.assertEqual((reopened.first_ts, reopened.last_ts), (rows[0][0], rows[-1][0]))
+        self.assertEqual(reopened.records["close"][59], 999.0)
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + 100 * RECORD_DTYPE.itemsize)
+
+    def test_range_and_series_are_mmap_views(self):
+        archive = ArchiveFile(self.path)
+        rows = candles(500)
+        archive.append(rows)
+
+        selected = archive.range(START + 100 * HOUR_MS, START + 150 * HOUR_MS + 1)
+        self.assertEqual(len(selected), 51)
+        self.assertEqual(int(selected["timestamp"][0]), START + 100 * HOUR_MS)
+        self.assertTrue(np.shares_memory(selected, archive.records))
+        self.assertEqual(len(archive.last(10)), 10)
+
+        series = archive.series(50, end_ms=START + 200 * HOUR_MS)
+        expected = CandleSeries.from_ohlcv(rows[150:200])
+        self.assertEqual(series.to_dicts(), expected.to_dicts())
+        self.assertTrue(np.shares_memory(series.close, archive.records))
+
+    def test_truncated_tail_is_ignored(self):
+        archive = ArchiveFile(self.path)
+        archive.append(candles(10))
+        with open(self.path, 'ab') as f:
+            f.write(b"\1" * 20)
+        self.assertEqual(len(ArchiveFile(self.path)), 10)
+
+    def test_rejects_foreign_file(self):
+        with open(os.path.join(self.tmpdir.name, "x.bin"), 'wb') as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            ArchiveFile(os.path.join(self.tmpdir.name, "x.bin"))
+
+
+class TestArchiveIntegration(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.root = self.tmpdir.name
+
+    @patch("ccxt.binance")
+    def test_client_appends_and_analyzer_reads(self, mock_binance):
+        rows = candles(80)
+        rows[-2][1:5] = [98.0, 100.0, 80.0, 99.0]
+        mock_binance.return_value.fetch_ohlcv.return_value = rows
+        client = BinanceClient(BinanceConfig(archive_path=self.root, weight_limit_per_minute=0))
+        fetched = client.get_klines("BTC/USDT", "1h", limit=80)
+
+        archive = CandleArchive(self.root)
+        analyzer = StrategyAnalyzer(["pinbar", "engulfing"])
+        [from_archive] = analyzer.analyze_archive(archive, [("BTC/USDT", "1h")])
+        [from_client] = analyzer.analyze_many([("BTC/USDT", "1h", fetched)])
+        self.assertEqual(from_archive, from_client)
+        self.assertTrue(from_archive["is_pinbar"])
+
+        # 回测直接读取同一目录
+        [(symbol, timeframe, paths)] = discover_datasets(self.root)
+        self.assertEqual((symbol, timeframe), ("BTCUSDT", "1h"))
+        np.testing.assert_array_equal(load_ohlcv(paths), np.asarray(rows, dtype=np.float64))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from loguru import logger
+
+from binance_monitor.backtest import Backtester, discover_datasets, load_ohlcv, scan_pinbars
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.strategy import StrategyAnalyzer
+
+
+def random_ohlcv(count, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    open_p = np.concatenate([[100.0], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.01, (2, count))) * close * rng.integers(0, 4, (2, count))
+    high = np.maximum(open_p, close) + spread[0]
+    low = np.minimum(open_p, close) - spread[1]
+    ts = 1_600_000_000_000 + np.arange(count) * 3_600_000
+    return np.column_stack([ts, open_p, high, low, close, np.ones(count)])
+
+
+class TestBacktest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.data_dir = self.tmpdir.name
+
+        self.btc = random_ohlcv(600, seed=1)
+        self.eth = random_ohlcv(400, seed=2)
+        os.makedirs(os.path.join(self.data_dir, "BTCUSDT"))
+        os.makedirs(os.path.join(self.data_dir, "ETHUSDT"))
+        # BTC 拆成两个按月文件，其中一个带表头；ETH 使用 .npy
+        header = "open_time,open,high,low,close,volume"
+        np.savetxt(os.path.join(self.data_dir, "BTCUSDT", "1h-2020-01.csv"), self.btc[:300], delimiter=",", header=header, comments="", fmt="%.10f")
+        np.savetxt(os.path.join(self.data_dir, "BTCUSDT", "1h-2020-02.csv"), self.btc[280:], delimiter=",", fmt="%.10f")
+        np.save(os.path.join(self.data_dir, "ETHUSDT", "1h.npy"), self.eth)
+
+    def test_discover_and_load(self):
+        datasets = discover_datasets(self.data_dir, timeframes=["1h"])
+        self.assertEqual([(s, tf, len(p)) for s, tf, p in datasets], [("BTCUSDT", "1h", 2), ("ETHUSDT", "1h", 1)])
+
+        data = load_ohlcv(datasets[0][2])
+        self.assertEqual(data.shape, (600, 6))
+        self.assertTrue(np.all(np.diff(data[:, 0]) > 0))
+
+    def test_scan_matches_live_analyzer(self):
+        analyzer = StrategyAnalyzer()
+        logger.disable("binance_monitor")
+        self.addCleanup(logger.enable, "binance_monitor")
+
+        index, is_up, is_priority = scan_pinbars(self.eth)
+        series = CandleSeries.from_ohlcv(self.eth)
+        expected = []
+        # 实盘中第 i 根收盘后位于 klines[1]，其后一根为 klines[0]
+        for i in range(40, len(self.eth) - 1):
+            res = analyzer.analyze("ETH/USDT", "1h", series[len(self.eth) - 2 - i:])
+            if res["is_pinbar"]:
+                expected.append((i, res["is_priority"]))
+
+        self.assertGreater(len(expected), 0)
+        got = [(int(i), bool(p)) for i, p in zip(index, is_priority) if i < len(self.eth) - 1]
+        self.assertEqual(got, expected)
+
+    def test_report(self):
+        serial = Backtester(self.data_dir, horizons=[1, 5], workers=1).run()
+        parallel = Backtester(self.data_dir, horizons=[5, 1], workers=2).run()
+
+        self.assertEqual(serial.bars, 1000)
+        btc = load_ohlcv(discover_datasets(self.data_dir, symbols=["BTC/USDT"])[0][2])
+        self.assertEqual(serial.signals, len(scan_pinbars(btc)[0]) + len(scan_pinbars(self.eth)[0]))
+        self.assertEqual(serial.model_dump(exclude={"elapsed_seconds"}), parallel.model_dump(exclude={"elapsed_seconds"}))
+
+        all_stats = {s.horizon: s for s in serial.horizons["all"]}
+        self.assertEqual(sorted(all_stats), [1, 5])
+        self.assertLessEqual(all_stats[5].signals, serial.signals)
+        self.assertTrue(0.0 <= all_stats[1].hit_rate <= 1.0)
+        self.assertLessEqual(serial.horizons["priority"][0].signals, all_stats[1].signals)
+
+
+if __name__ == "__main__":
+    unittest.main()
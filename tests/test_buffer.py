@@ -0,0 +1,109 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.buffer import CandleRing, RingStore
+from binance_monitor.core.candles import CandleSeries
+from test_archive import candles
+
+
+class TestCandleRing(unittest.TestCase):
+    def test_push_overwrites_last_and_ignores_older(self):
+        ring = CandleRing(5)
+        rows = candles(3)
+        self.assertEqual(ring.extend(rows), 3)
+
+        update = [rows[-1][0], 1.0, 2.0, 0.5, 1.5, 3.0]
+        self.assertFalse(ring.push(update))
+        self.assertFalse(ring.push(rows[0]))
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring[-1], update)
+        self.assertEqual(ring[0], rows[0])
+
+    def test_wraps_around_and_keeps_capacity(self):
+        ring = CandleRing(4)
+        rows = candles(11)
+        for row in rows[:6]:
+            ring.push(row)
+        self.assertEqual(ring.extend(rows[6:]), 5)
+
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(list(ring), rows[-4:])
+        with self.assertRaises(IndexError):
+            ring[4]
+
+    def test_window_is_newest_first_view(self):
+        ring = CandleRing(8)
+        rows = candles(20)
+        ring.extend(rows[:13])
+
+        window = ring.window(5)
+        expected = CandleSeries.from_ohlcv(rows[8:13])
+        self.assertEqual(window.to_dicts(), expected.to_dicts())
+        self.assertTrue(np.shares_memory(window.close, ring._buffer))
+
+        # 缓冲区原地更新，不重新分配
+        buffer = ring._buffer
+        ring.extend(rows[13:])
+        self.assertIs(ring._buffer, buffer)
+        self.assertEqual(ring.window().to_dicts(), CandleSeries.from_ohlcv(rows[-8:]).to_dicts())
+
+    def test_extend_with_overlap_and_gap(self):
+        ring = CandleRing(10)
+        rows = candles(30)
+        ring.extend(rows[:10])
+        # 与已有K线重叠: 只追加更新的，最后一根被覆盖
+        self.assertEqual(ring.extend(rows[5:15]), 5)
+        self.assertEqual(list(ring), rows[5:15])
+        # 超过容量的一批只保留最新的 capacity 根
+        self.assertEqual(ring.extend(rows[15:]), 15)
+        self.assertEqual(list(ring), rows[-10:])
+        self.assertEqual(ring.extend([]), 0)
+
+
+class TestRingStore(unittest.TestCase):
+    def test_get_grows_and_retain_releases(self):
+        store = RingStore()
+        rows = candles(10)
+        ring = store.get("BTC/USDT", "1h", 5)
+        ring.extend(rows)
+        self.assertIs(store.get("BTC/USDT", "1h", 3), ring)
+
+        bigger = store.get("BTC/USDT", "1h", 20)
+        self.assertEqual(bigger.capacity, 20)
+        self.assertEqual(list(bigger), rows[-5:])
+
+        store.get("ETH/USDT", "1h", 5)
+        store.get("BTC/USDT", "4h", 5)
+        self.assertEqual(store.nbytes, (20 + 5 + 5) * 2 * 48)
+        store.retain(["BTC/USDT"], ["1h"])
+        self.assertEqual(len(store), 1)
+
+    def test_shared_store_reuses_slots(self):
+        store = RingStore(shared=True)
+        self.addCleanup(store.close)
+        ring = store.get("BTC/USDT", "1h", 5)
+        ring.extend(candles(10))
+        arena = ring.arena
+        self.assertTrue(np.shares_memory(ring.window().close, arena._arrays[0]))
+
+        # 换成更大容量时释放原来的 slot，之后的交易对复用它
+        bigger = store.get("BTC/USDT", "1h", 8)
+        self.assertEqual(list(bigger), candles(10)[-5:])
+        self.assertIsNot(bigger.arena, arena)
+        self.assertEqual(store.get("ETH/USDT", "1h", 5).slot, ring.slot)
+        self.assertIs(store.find("ETH/USDT", "1h").arena, arena)
+        self.assertIsNone(store.find("SOL/USDT", "1h"))
+
+        store.retain(["BTC/USDT"], ["1h"])
+        self.assertEqual(store.get("SOL/USDT", "1h", 5).slot, ring.slot)
+        self.assertEqual(store.nbytes, arena.nbytes + bigger.arena.nbytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
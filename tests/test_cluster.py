@@ -0,0 +1,141 @@
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.cluster import BrokerState, ClusterCoordinator, ClusterWorker, HashRing, connect_broker, serve_broker
+from test_engine import make_config, make_series
+
+SYMBOLS = [f"SYM{i}/USDT" for i in range(20)]
+
+
+def make_cluster_config():
+    config = make_config(symbols=SYMBOLS, timeframes=["1h", "4h"])
+    config.cluster.heartbeat_seconds = 0.05
+    config.cluster.worker_timeout_seconds = 0.3
+    config.cluster.job_timeout_seconds = 10
+    return config
+
+
+class TestHashRing(unittest.TestCase):
+    def test_assignment_is_balanced_and_stable(self):
+        keys = [f"SYM{i}/USDT" for i in range(2000)]
+        ring = HashRing(["a", "b", "c", "d"])
+        before = {key: ring.node_for(key) for key in keys}
+        sizes = [len(v) for v in ring.assign(keys).values()]
+        self.assertEqual(sum(sizes), len(keys))
+        self.assertGreater(min(sizes), len(keys) / 4 * 0.6)
+
+        # 移除一个节点只迁移它自己的 key
+        ring.remove("c")
+        after = {key: ring.node_for(key) for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+        self.assertTrue(all(before[key] == "c" for key in moved))
+        self.assertNotIn("c", after.values())
+
+
+class TestCoordinator(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("ccxt.binance")
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.broker = BrokerState()
+        self.config = make_cluster_config()
+        self.workers = []
+
+    def tearDown(self):
+        for worker, thread in self.workers:
+            worker.stop()
+            thread.join()
+
+    def start_worker(self, worker_id):
+        worker = ClusterWorker(self.config, self.broker, worker_id)
+        worker.engine._fetch_pair = lambda symbol, timeframe, limit: make_series(pinbar=symbol == "SYM3/USDT")
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        self.workers.append((worker, thread))
+        return worker
+
+    def make_coordinator(self):
+        coordinator = ClusterCoordinator(self.config, MagicMock(), self.broker)
+        coordinator._send_consolidated_report = MagicMock()
+        return coordinator
+
+    def test_coordinator_does_not_analyze_locally(self):
+        self.config.monitor.analysis_workers = 2
+        coordinator = self.make_coordinator()
+        self.addCleanup(coordinator.close)
+        self.assertIsNone(coordinator.parallel)
+        self.assertFalse(coordinator.rings.shared)
+        self.assertIsNotNone(ClusterWorker(self.config, self.broker, "w1").engine.parallel)
+
+    def test_local_workers_are_not_daemonic(self):
+        from binance_monitor.cluster import __main__ as cli
+
+        processes = []
+
+        def make_process(**kwargs):
+            process = MagicMock(**kwargs)
+            processes.append(process)
+            return process
+
+        with patch.object(cli, "load_config", return_value=self.config), \
+                patch.object(cli, "serve_broker"), patch.object(cli, "ClusterCoordinator"), \
+                patch.object(cli, "EmailNotifier"), patch.object(cli.metrics, "serve"), \
+                patch.object(cli.multiprocessing, "Process", side_effect=make_process) as process_cls:
+            cli.run_coordinator("config.yaml", workers=2)
+
+        # daemon 进程不能再创建分析进程池
+        self.assertEqual(len(processes), 2)
+        self.assertTrue(all(not call.kwargs.get("daemon") for call in process_cls.call_args_list))
+        for process in processes:
+            process.terminate.assert_called_once_with()
+            process.join.assert_called_once_with()
+
+    def test_results_are_merged_into_one_report(self):
+        self.start_worker("w1")
+        self.start_worker("w2")
+        self.broker.register("w1")
+        self.broker.register("w2")
+        coordinator = self.make_coordinator()
+        coordinator.run_job()
+
+        coordinator._send_consolidated_report.assert_called_once()
+        reported = coordinator._send_consolidated_report.call_args[0][0]
+        self.assertEqual({(r["symbol"], r["timeframe"]) for r in reported}, {("SYM3/USDT", "1h"), ("SYM3/USDT", "4h")})
+
+        pairs = [(s, tf) for s in SYMBOLS for tf in ["1h", "4h"]]
+        self.assertTrue(all(res is not None for res in coordinator._scan_pairs(pairs)))
+
+    def test_dead_worker_is_rebalanced(self):
+        self.start_worker("alive")
+        # 注册后从不领取任务、也不再心跳
+        self.broker.register("alive")
+        self.broker.register("dead")
+        coordinator = self.make_coordinator()
+
+        pairs = [(s, "1h") for s in SYMBOLS]
+        results = coordinator._scan_pairs(pairs)
+        self.assertTrue(all(res is not None for res in results))
+        self.assertNotIn("dead", self.broker.workers())
+
+
+class TestBroker(unittest.TestCase):
+    def test_remote_broker_roundtrip(self):
+        manager = serve_broker(("127.0.0.1", 0), b"secret")
+        self.addCleanup(manager.shutdown)
+        broker = connect_broker(manager.address, b"secret")
+
+        broker.register("w1")
+        broker.put_task("w1", {"job": 1, "pairs": [("BTC/USDT", "4h")]})
+        self.assertEqual(broker.get_task("w1", timeout=1)["job"], 1)
+        self.assertIsNone(broker.get_task("w1", timeout=0.01))
+        self.assertIn("w1", broker.workers())
+
+
+if __name__ == "__main__":
+    unittest.main()
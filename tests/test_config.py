@@ -0,0 +1,90 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import yaml
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.config import AppConfig, ConfigWatcher, diff_config
+
+EMAIL = {
+    "smtp_server": "smtp.test.com",
+    "username": "user",
+    "password": "password",
+    "sender_email": "sender@test.com",
+    "receiver_email": "receiver@test.com",
+}
+
+
+def config_dict(**monitor):
+    monitor.setdefault("symbols", ["BTC/USDT", "ETH/USDT"])
+    monitor.setdefault("timeframes", ["4h"])
+    return {"monitor": monitor, "email": EMAIL}
+
+
+class TestConfigDiff(unittest.TestCase):
+    def test_pairs_and_restart_fields(self):
+        old = AppConfig(**config_dict())
+        new = AppConfig(**config_dict(symbols=["BTC/USDT", "SOL/USDT"], concurrency=8, mode="stream"),
+                        binance={"weight_limit_per_minute": 1200})
+        diff = diff_config(old, new)
+        self.assertEqual(diff["added"], [("SOL/USDT", "4h")])
+        self.assertEqual(diff["removed"], [("ETH/USDT", "4h")])
+        self.assertEqual(diff["monitor"], ["symbols", "concurrency"])
+        self.assertEqual(diff["restart"], ["binance", "monitor.mode"])
+
+
+class TestMonitorConfig(unittest.TestCase):
+    def test_analysis_workers_requires_ring_buffer(self):
+        with self.assertRaises(ValueError):
+            AppConfig(**config_dict(analysis_workers=2, ring_buffer=False))
+        config = AppConfig(**config_dict(analysis_workers=2))
+        self.assertTrue(config.monitor.ring_buffer)
+
+
+class TestConfigWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "config.yaml")
+        self.write(config_dict())
+
+    def write(self, data):
+        with open(self.path, "w", encoding="utf-8") as f:
+            if isinstance(data, str):
+                f.write(data)
+            else:
+                yaml.safe_dump(data, f)
+        # 保证修改时间变化
+        stamp = time.time_ns() + 1_000_000_000
+        os.utime(self.path, ns=(stamp, stamp))
+
+    def test_reload_and_keep_last_good_config(self):
+        on_change = MagicMock()
+        watcher = ConfigWatcher(self.path, on_change)
+        self.assertFalse(watcher.check())
+
+        self.write(config_dict(symbols=["BTC/USDT", "SOL/USDT"]))
+        self.assertTrue(watcher.check())
+        self.assertEqual(on_change.call_args[0][0].monitor.symbols, ["BTC/USDT", "SOL/USDT"])
+
+        # 语法错误和校验失败都不会回调，也不会在文件未再次修改时重复尝试
+        for broken in ("monitor: [unclosed", {"monitor": {"symbols": "BTC/USDT", "concurrency": 0}, "email": EMAIL}):
+            self.write(broken)
+            self.assertFalse(watcher.check())
+            self.assertFalse(watcher.check())
+        self.assertEqual(on_change.call_count, 1)
+
+    def test_rejected_config_is_reported(self):
+        watcher = ConfigWatcher(self.path, MagicMock(side_effect=ValueError("Unknown patterns")))
+        self.write(config_dict(patterns=["nope"]))
+        self.assertFalse(watcher.check())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,350 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.config import AppConfig
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.engine import MonitorEngine
+from binance_monitor.core.signals import SignalIndex
+
+
+def make_config(**monitor):
+    monitor.setdefault("symbols", ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+    return AppConfig(
+        monitor=monitor,
+        email={
+            "smtp_server": "smtp.test.com",
+            "username": "user",
+            "password": "password",
+            "sender_email": "sender@test.com",
+            "receiver_email": "receiver@test.com",
+        },
+    )
+
+
+def make_series(pinbar=False, count=50):
+    """构造 K 线序列，pinbar=True 时最新收盘的 K 线为锤子线"""
+    ohlcv = [[1_700_000_000_000 + i * 3_600_000, 100.0, 105.0, 95.0, 102.0, 1.0] for i in range(count)]
+    if pinbar:
+        ohlcv[-2][1:5] = [98.0, 100.0, 80.0, 99.0]
+    return CandleSeries.from_ohlcv(ohlcv)
+
+
+class TestMonitorEngine(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("ccxt.binance")
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def make_engine(self, **monitor):
+        notifier = MagicMock()
+        # 模拟发送成功
+        notifier.send_all.side_effect = lambda message, on_done=None: on_done and on_done(True)
+        engine = MonitorEngine(make_config(**monitor), notifier)
+        engine.client = MagicMock()
+        engine.client.check_connection.return_value = True
+        engine.client.rate_limit_headroom.return_value = None
+        return engine
+
+    def test_scan_pairs_keeps_order_and_isolates_errors(self):
+        engine = self.make_engine(concurrency=4)
+
+        def fetch(symbol, timeframe, limit):
+            if symbol == "ETH/USDT":
+                raise RuntimeError("boom")
+            return make_series()
+
+        engine._fetch_pair = fetch
+        pairs = [(s, tf) for s in engine.config.monitor.symbols for tf in engine.config.monitor.timeframes]
+        results = engine._scan_pairs(pairs)
+
+        self.assertEqual(len(results), len(pairs))
+        for (symbol, timeframe), res in zip(pairs, results):
+            if symbol == "ETH/USDT":
+                self.assertIsNone(res)
+            else:
+                self.assertEqual((res["symbol"], res["timeframe"]), (symbol, timeframe))
+
+    def test_scan_pairs_runs_concurrently(self):
+        engine = self.make_engine(concurrency=3)
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def fetch(symbol, timeframe, limit):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return make_series()
+
+        engine._fetch_pair = fetch
+        engine._scan_pairs([(s, "4h") for s in ["A", "B", "C", "D", "E", "F"]])
+        self.assertGreater(active["peak"], 1)
+        self.assertLessEqual(active["peak"], 3)
+
+    def test_run_job_reports_pinbars_only(self):
+        engine = self.make_engine(concurrency=2)
+        engine._fetch_pair = lambda symbol, timeframe, limit: make_series(pinbar=symbol == "BTC/USDT")
+        engine._send_consolidated_report = MagicMock()
+        engine.run_job()
+
+        reported = engine._send_consolidated_report.call_args[0][0]
+        self.assertEqual([(r["symbol"], r["timeframe"]) for r in reported], [("BTC/USDT", "4h"), ("BTC/USDT", "1d")])
+
+    def test_reported_signals_are_not_repeated(self):
+        engine = self.make_engine(concurrency=1)
+        engine._fetch_pair = lambda symbol, timeframe, limit: make_series(pinbar=symbol == "BTC/USDT")
+
+        engine.run_job()
+        engine.run_job()
+        self.assertEqual(engine.notifier.send_all.call_count, 1)
+
+        # 第二次扫描在分析之前就被跳过
+        engine.strategy.analyze_many = MagicMock(return_value=[])
+        engine._scan_pairs([("BTC/USDT", "4h")])
+        engine.strategy.analyze_many.assert_called_once_with([])
+
+    def test_undelivered_signals_are_reported_again(self):
+        from binance_monitor.notification import NotificationManager
+        from binance_monitor.notification.manager import DispatchConfig
+
+        engine = self.make_engine(concurrency=1)
+        engine.notifier = NotificationManager(DispatchConfig(async_dispatch=True, max_retries=1, retry_delay_seconds=0))
+        self.addCleanup(engine.notifier.shutdown)
+        channel = MagicMock()
+        channel.name = "Mock"
+        channel.send.return_value = False
+        engine.notifier.add_notifier(channel)
+        engine._fetch_pair = lambda symbol, timeframe, limit: make_series(pinbar=symbol == "BTC/USDT")
+
+        # 重试耗尽后仍未送达，不记入索引
+        engine.run_job()
+        engine.notifier.flush()
+        self.assertEqual(channel.send.call_count, 2)
+        closed_ts = make_series().timestamp[1]
+        self.assertFalse(engine._already_reported("BTC/USDT", "4h", closed_ts))
+
+        channel.send.return_value = True
+        engine.run_job()
+        engine.notifier.flush()
+        self.assertEqual(channel.send.call_count, 3)
+        self.assertTrue(engine._already_reported("BTC/USDT", "4h", closed_ts))
+
+        # 已送达的信号不再发送
+        engine.run_job()
+        engine.notifier.flush()
+        self.assertEqual(channel.send.call_count, 3)
+
+    def test_multiple_patterns_are_reported_together(self):
+        engine = self.make_engine(concurrency=1, patterns=["pinbar", "breakout"])
+
+        def fetch(symbol, timeframe, limit):
+            if symbol != "ETH/USDT":
+                return make_series(pinbar=symbol == "BTC/USDT")
+            # 收盘跌破之前 20 根的最低价
+            series = make_series()
+            series.open[1], series.high[1], series.low[1], series.close[1] = 94.0, 96.0, 89.0, 90.0
+            return series
+
+        engine._fetch_pair = fetch
+        engine.run_job()
+        engine.run_job()
+        engine.notifier.send_all.assert_called_once()
+        message = engine.notifier.send_all.call_args[0][0]
+        self.assertIn("4 个形态信号", message.title)
+        self.assertIn("形态: breakout", message.content)
+
+    def test_metrics_are_recorded_when_enabled(self):
+        from binance_monitor.utils.metrics import metrics
+        metrics.enable()
+        self.addCleanup(metrics.disable)
+
+        engine = self.make_engine(concurrency=1)
+        engine.client.rate_limit_headroom.return_value = {"used_weight": 42, "weight_limit": 5400, "waited_seconds": 0.0}
+
+        def fetch(symbol, timeframe, limit):
+            if symbol == "ETH/USDT":
+                raise RuntimeError("boom")
+            return make_series(pinbar=symbol == "BTC/USDT")
+
+        engine._fetch_pair = fetch
+        engine.run_job(scheduled_at=time.time() - 3)
+
+        sample = metrics.registry.get_sample_value
+        self.assertEqual(sample("binance_monitor_scan_seconds_count"), 1)
+        self.assertEqual(sample("binance_monitor_analysis_seconds_count"), 1)
+        self.assertEqual(sample("binance_monitor_signals_total", {"timeframe": "4h"}), 1)
+        self.assertEqual(sample("binance_monitor_skipped_pairs_total", {"reason": "fetch_failed"}), 2)
+        self.assertEqual(sample("binance_monitor_request_weight_used"), 42)
+        self.assertGreaterEqual(sample("binance_monitor_scan_lag_seconds"), 3)
+
+    def test_run_once_returns_after_first_scan(self):
+        engine = self.make_engine(run_once=True, cron_expression="0 * * * *")
+        engine.run_job = MagicMock()
+        engine.start()
+        engine.run_job.assert_called_once_with()
+        self.assertFalse(engine.running)
+
+
+    def test_failed_pairs_are_retried_within_scan(self):
+        engine = self.make_engine(concurrency=2, timeframes=["4h"])
+        attempts = {}
+
+        def fetch(symbol, timeframe, limit):
+            attempts[symbol] = attempts.get(symbol, 0) + 1
+            if symbol == "ETH/USDT" and attempts[symbol] == 1:
+                raise RuntimeError("proxy timeout")
+            return make_series(pinbar=symbol == "ETH/USDT")
+
+        engine._fetch_pair = fetch
+        engine.run_job()
+
+        self.assertEqual(attempts, {"BTC/USDT": 1, "ETH/USDT": 2, "SOL/USDT": 1})
+        message = engine.notifier.send_all.call_args[0][0]
+        self.assertIn("ETH/USDT", message.content)
+
+    def test_ring_buffers_are_reused_across_scans(self):
+        engine = self.make_engine(concurrency=1, symbols=["BTC/USDT", "ETH/USDT"], timeframes=["1h"])
+        ohlcv = [[1_700_000_000_000 + i * 3_600_000, 100.0, 105.0, 95.0, 102.0, 1.0] for i in range(60)]
+        fetched = {"count": 50}
+        engine.client.get_ohlcv.side_effect = lambda symbol, timeframe, limit: ohlcv[:fetched["count"]][-limit:]
+
+        engine.run_job()
+        ring = engine.rings.get("BTC/USDT", "1h", 50)
+        buffer = ring._buffer
+
+        fetched["count"] = 52
+        engine.run_job()
+        self.assertIs(engine.rings.get("BTC/USDT", "1h", 50)._buffer, buffer)
+        self.assertEqual(ring[-1][0], ohlcv[51][0])
+        self.assertEqual(len(ring), 50)
+
+        # 移出监控的交易对释放缓冲区
+        engine.config.monitor.symbols = ["BTC/USDT"]
+        engine.run_job()
+        self.assertEqual(len(engine.rings), 1)
+
+    def test_shared_rings_are_passed_to_parallel_analysis(self):
+        engine = self.make_engine(concurrency=1, symbols=["BTC/USDT", "ETH/USDT"], timeframes=["1h"], analysis_workers=2)
+        self.addCleanup(engine.close)
+        ohlcv = [[1_700_000_000_000 + i * 3_600_000, 100.0, 105.0, 95.0, 102.0, 1.0] for i in range(50)]
+        engine.client.get_ohlcv.side_effect = lambda symbol, timeframe, limit: ohlcv[-limit:]
+        analyze_many = engine.strategy.analyze_many
+        engine.strategy.analyze_many = MagicMock(side_effect=analyze_many)
+
+        results = engine._scan_pairs([("BTC/USDT", "1h"), ("ETH/USDT", "1h")])
+        items = engine.strategy.analyze_many.call_args[0][0]
+        self.assertEqual([klines for _, _, klines in items], [engine.rings.find(s, "1h") for s in ("BTC/USDT", "ETH/USDT")])
+        self.assertIsNotNone(items[0][2].arena)
+        self.assertEqual([res["timestamp"] for res in results], [ohlcv[-2][0]] * 2)
+        # 两个交易对少于 analysis_min_pairs，不启动进程池
+        self.assertIsNone(engine.parallel._pool)
+
+    def test_parallel_analysis_is_skipped_in_daemon_process(self):
+        with patch("binance_monitor.core.engine.multiprocessing.current_process") as current:
+            current.return_value.daemon = True
+            engine = self.make_engine(analysis_workers=2)
+        self.addCleanup(engine.close)
+        self.assertIsNone(engine.parallel)
+        self.assertFalse(engine.rings.shared)
+
+    def test_apply_config_updates_pairs_and_keeps_state(self):
+        engine = self.make_engine(concurrency=1)
+        client, signal_index = engine.client, engine.signal_index
+        scanned = []
+
+        def fetch(symbol, timeframe, limit):
+            scanned.append(symbol)
+            return make_series()
+
+        engine._fetch_pair = fetch
+        engine.apply_config(make_config(symbols=["BTC/USDT", "DOGE/USDT"], concurrency=1, patterns=["pinbar", "breakout"]))
+        engine.run_job()
+
+        self.assertEqual(sorted(set(scanned)), ["BTC/USDT", "DOGE/USDT"])
+        self.assertIs(engine.client, client)
+        self.assertIs(engine.signal_index, signal_index)
+        self.assertIn("breakout", engine.strategy.engine.names)
+
+    def test_apply_config_waits_for_running_scan(self):
+        engine = self.make_engine(concurrency=1, timeframes=["4h"])
+        fetching, release = threading.Event(), threading.Event()
+        scanned = []
+
+        def fetch(symbol, timeframe, limit):
+            fetching.set()
+            release.wait(5)
+            scanned.append(symbol)
+            return make_series()
+
+        engine._fetch_pair = fetch
+        scan = threading.Thread(target=engine.run_job)
+        scan.start()
+        fetching.wait(5)
+        reload = threading.Thread(target=engine.apply_config, args=(make_config(symbols=["DOGE/USDT"], timeframes=["4h"]),))
+        reload.start()
+        reload.join(0.2)
+        # 扫描进行中，新配置还没有应用
+        self.assertTrue(reload.is_alive())
+        self.assertEqual(engine.config.monitor.symbols, ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+
+        release.set()
+        scan.join(5)
+        reload.join(5)
+        self.assertEqual(sorted(scanned), ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        self.assertEqual(engine.config.monitor.symbols, ["DOGE/USDT"])
+
+    def test_apply_config_rejects_invalid_and_restart_only_changes(self):
+        engine = self.make_engine()
+        old = engine.config
+        with self.assertRaises(ValueError):
+            engine.apply_config(make_config(patterns=["unknown"]))
+        self.assertIs(engine.config, old)
+
+        new = make_config(mode="stream")
+        new.binance.weight_limit_per_minute = 1
+        engine.apply_config(new)
+        self.assertEqual(engine.config.monitor.mode, "poll")
+        self.assertEqual(engine.config.binance.weight_limit_per_minute, old.binance.weight_limit_per_minute)
+
+
+class TestSignalIndex(unittest.TestCase):
+    def test_lru_and_persistence(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "signals.db")
+            index = SignalIndex(path, capacity=2)
+            keys = [("BTC/USDT", "4h", ts, "pinbar") for ts in (1, 2, 3)]
+            index.add_many(keys)
+            self.assertEqual(len(index._lru), 2)
+            # 被挤出 LRU 的记录仍能从磁盘查到
+            self.assertIn(keys[0], index)
+            self.assertNotIn(("BTC/USDT", "1d", 1, "pinbar"), index)
+            index.close()
+
+            reopened = SignalIndex(path, capacity=2)
+            self.assertTrue(all(key in reopened for key in keys))
+            reopened.close()
+
+    def test_old_rows_are_pruned(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hour = 3_600_000
+            now = int(time.time() * 1000) // hour * hour
+            index = SignalIndex(os.path.join(tmpdir, "signals.db"), retention_ms=3 * hour)
+            index.add_many([("BTC/USDT", "1h", now - 5 * hour, "pinbar"), ("BTC/USDT", "1h", now - 2 * hour, "pinbar")])
+            index.add_many([("ETH/USDT", "1h", now - hour, "pinbar")])
+            rows = index._conn.execute("SELECT symbol, timestamp FROM signals ORDER BY timestamp").fetchall()
+            self.assertEqual(rows, [("BTC/USDT", now - 2 * hour), ("ETH/USDT", now - hour)])
+            index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
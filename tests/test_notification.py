@@ -1,5 +1,7 @@
 import sys
 import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -11,10 +13,20 @@ from binance_monitor.notification import (
     EmailNotifier, 
     EmailConfig, 
     NotificationMessage,
-    NotificationLevel
+    NotificationLevel,
+    DispatchConfig
 )
 
 class TestNotification(unittest.TestCase):
+    def email_config(self):
+        return EmailConfig(
+            smtp_server="smtp.test.com",
+            username="user",
+            password="password",
+            sender_email="sender@test.com",
+            receiver_email="receiver@test.com"
+        )
+
     def test_email_notifier(self):
         # Mock SMTP
         with patch("smtplib.SMTP") as mock_smtp:
@@ -40,11 +52,36 @@ class TestNotification(unittest.TestCase):
             
             # Verify
             self.assertTrue(result)
-            mock_smtp.assert_called_with("smtp.test.com", 587)
-            instance = mock_smtp.return_value.__enter__.return_value
+            mock_smtp.assert_called_with("smtp.test.com", 587, timeout=30.0)
+            instance = mock_smtp.return_value
+            instance.starttls.assert_called_once()
             instance.login.assert_called_with("user", "password")
             instance.send_message.assert_called()
 
+            # 第二封邮件复用同一个已登录的会话
+            self.assertTrue(notifier.send(msg))
+            self.assertEqual(mock_smtp.call_count, 1)
+            self.assertEqual(instance.login.call_count, 1)
+            self.assertEqual(instance.send_message.call_count, 2)
+
+    def test_email_notifier_reconnects(self):
+        import smtplib
+        with patch("smtplib.SMTP") as mock_smtp:
+            stale, fresh = MagicMock(), MagicMock()
+            stale.send_message.side_effect = [None, smtplib.SMTPServerDisconnected("closed")]
+            mock_smtp.side_effect = [stale, fresh]
+            notifier = EmailNotifier(self.email_config())
+            msg = NotificationMessage(title="Test", content="Content")
+
+            self.assertTrue(notifier.send(msg))
+            self.assertTrue(notifier.send(msg))
+            self.assertEqual(mock_smtp.call_count, 2)
+            fresh.login.assert_called_once()
+            fresh.send_message.assert_called_once()
+
+            notifier.close()
+            fresh.quit.assert_called_once()
+
     def test_manager(self):
         manager = NotificationManager()
         mock_notifier = MagicMock()
@@ -58,5 +95,89 @@ class TestNotification(unittest.TestCase):
         
         mock_notifier.send.assert_called_with(msg)
 
+    def test_async_dispatch_does_not_block(self):
+        manager = NotificationManager(DispatchConfig(async_dispatch=True))
+        release = threading.Event()
+        slow = MagicMock()
+        slow.name = "Slow"
+        slow.send.side_effect = lambda msg: release.wait(5)
+        manager.add_notifier(slow)
+
+        start = time.monotonic()
+        manager.send_all(NotificationMessage(title="Test", content="Content"))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        release.set()
+        manager.flush()
+        stats = manager.stats()["Slow"]
+        self.assertEqual(stats["sent"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["last_latency"], 0)
+        manager.shutdown()
+        slow.close.assert_called_once()
+
+    def test_bounded_retries(self):
+        manager = NotificationManager(DispatchConfig(max_retries=2, retry_delay_seconds=0))
+        flaky = MagicMock()
+        flaky.name = "Flaky"
+        flaky.send.side_effect = [False, Exception("boom"), True]
+        manager.add_notifier(flaky)
+
+        manager.send_all(NotificationMessage(title="Test", content="Content"))
+        self.assertEqual(flaky.send.call_count, 3)
+        self.assertEqual(manager.stats()["Flaky"]["sent"], 1)
+        self.assertEqual(manager.stats()["Flaky"]["retries"], 2)
+
+        flaky.send.side_effect = None
+        flaky.send.return_value = False
+        manager.send_all(NotificationMessage(title="Test", content="Content"))
+        self.assertEqual(flaky.send.call_count, 6)
+        self.assertEqual(manager.stats()["Flaky"]["failed"], 1)
+
+    def test_on_done_reports_delivery_result(self):
+        manager = NotificationManager(DispatchConfig(async_dispatch=True, max_retries=0, queue_size=1))
+        release = threading.Event()
+        ok, failing = MagicMock(), MagicMock()
+        ok.name, failing.name = "Ok", "Failing"
+        ok.send.side_effect = lambda msg: release.wait(5)
+        failing.send.return_value = False
+        manager.add_notifier(ok)
+        manager.add_notifier(failing)
+
+        results = []
+        manager.send_all(NotificationMessage(title="A", content="A"), on_done=results.append)
+        # 任一渠道成功即视为送达，回调在所有渠道完成后才调用
+        self.assertEqual(results, [])
+        release.set()
+        manager.flush()
+        self.assertEqual(results, [True])
+
+        # 只剩失败的渠道
+        ok.send.side_effect = None
+        ok.send.return_value = False
+        manager.send_all(NotificationMessage(title="B", content="B"), on_done=results.append)
+        manager.flush()
+        self.assertEqual(results, [True, False])
+        manager.shutdown()
+
+    def test_on_done_when_queue_is_full(self):
+        manager = NotificationManager(DispatchConfig(async_dispatch=True, queue_size=1))
+        release = threading.Event()
+        slow = MagicMock()
+        slow.name = "Slow"
+        slow.send.side_effect = lambda msg: release.wait(5)
+        manager.add_notifier(slow)
+
+        results = []
+        for title in ("A", "B", "C"):
+            manager.send_all(NotificationMessage(title=title, content=title), on_done=results.append)
+            time.sleep(0.05)
+        # A 正在发送、B 在队列中，C 被丢弃
+        self.assertEqual(results, [False])
+        release.set()
+        manager.flush()
+        self.assertEqual(results, [False, True, True])
+        manager.shutdown()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.buffer import CandleRing, RingArena, RingStore
+from binance_monitor.core.parallel import ParallelAnalyzer, gather_windows
+from binance_monitor.core.strategy import StrategyAnalyzer
+
+PATTERNS = ["pinbar", "engulfing", "inside_bar", "breakout"]
+
+
+def random_ohlcv(rng, count=60):
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open_p = close + rng.normal(0, 1, count)
+    high = np.maximum(open_p, close) + np.abs(rng.normal(0, 2, count))
+    low = np.minimum(open_p, close) - np.abs(rng.normal(0, 2, count))
+    timestamps = 1_700_000_000_000 + np.arange(count) * 3_600_000
+    return np.column_stack([timestamps, open_p, high, low, close, np.ones(count)])
+
+
+def ring_items(store, count, seed=11, capacity=50):
+    """写入共享内存缓冲区的随机K线，返回 [(symbol, timeframe, ring), ...]"""
+    rng = np.random.default_rng(seed)
+    items = []
+    for n in range(count):
+        ring = store.get(f"SYM{n}/USDT", "1h", capacity)
+        ring.extend(random_ohlcv(rng))
+        items.append((f"SYM{n}/USDT", "1h", ring))
+    return items
+
+
+def as_windows(items):
+    return [(symbol, timeframe, ring.window()) for symbol, timeframe, ring in items]
+
+
+class TestParallelAnalyzer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parallel = ParallelAnalyzer(workers=2, min_pairs=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.parallel.close()
+
+    def setUp(self):
+        self.store = RingStore(shared=True)
+        self.addCleanup(self.store.close)
+
+    def test_matches_in_process_analysis(self):
+        items = ring_items(self.store, 40)
+        # 另一种容量的缓冲区在另一个共享内存区中
+        items += ring_items(self.store, 30, seed=3, capacity=60)[20:]
+        expected = StrategyAnalyzer(PATTERNS).analyze_many(as_windows(items))
+        results = StrategyAnalyzer(PATTERNS, parallel=self.parallel).analyze_many(items)
+        self.assertEqual(results, expected)
+        self.assertIsNotNone(self.parallel._pool)
+        self.assertTrue(any(res["signals"] for res in results))
+
+        self.assertEqual(
+            StrategyAnalyzer(["pinbar"], parallel=self.parallel).analyze_many(items),
+            StrategyAnalyzer(["pinbar"]).analyze_many(as_windows(items)),
+        )
+
+    def test_candles_are_not_read_in_coordinator(self):
+        items = ring_items(self.store, 20)
+        expected = StrategyAnalyzer(PATTERNS).analyze_many(as_windows(items))
+        # 特征和检测都在 worker 进程中计算
+        with patch.object(StrategyAnalyzer, "evaluate_ohlc", side_effect=AssertionError("evaluated in coordinator")):
+            results = StrategyAnalyzer(PATTERNS, parallel=self.parallel).analyze_many(items)
+        self.assertEqual(results, expected)
+
+    def test_small_batches_stay_in_process(self):
+        parallel = ParallelAnalyzer(workers=2, min_pairs=10)
+        self.addCleanup(parallel.close)
+        items = ring_items(self.store, 3)
+        results = StrategyAnalyzer(PATTERNS, parallel=parallel).analyze_many(items)
+        self.assertIsNone(parallel._pool)
+        self.assertEqual(results, StrategyAnalyzer(PATTERNS).analyze_many(as_windows(items)))
+
+    def test_gather_windows_across_chunks(self):
+        arena = RingArena(10, chunk_bytes=3 * 2 * 10 * 48)
+        self.addCleanup(arena.close)
+        rng = np.random.default_rng(5)
+        rings = []
+        for n in range(7):
+            ring = CandleRing(10, arena)
+            ring.extend(random_ohlcv(rng, 13 + n))
+            rings.append(ring)
+        self.assertEqual(len(arena.names), 3)
+
+        slots = np.array([ring.slot for ring in rings])
+        ends = np.array([ring.end for ring in rings])
+        windows = gather_windows(arena._arrays, arena.chunk_slots, slots, ends, 8)
+        for ring, window in zip(rings, windows):
+            np.testing.assert_array_equal(window, ring.records(8)[::-1])
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 4, "needs at least 4 CPU cores")
+    def test_workers_speed_up_large_batches(self):
+        items = ring_items(self.store, 20000)
+        parallel = ParallelAnalyzer(workers=4, min_pairs=1)
+        self.addCleanup(parallel.close)
+
+        def timed(analyzer):
+            # 第一次运行启动进程池，不计入
+            analyzer.analyze_many(items)
+            start = time.perf_counter()
+            analyzer.analyze_many(items)
+            return time.perf_counter() - start
+
+        serial = timed(StrategyAnalyzer(PATTERNS))
+        self.assertLess(timed(StrategyAnalyzer(PATTERNS, parallel=parallel)), serial / 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
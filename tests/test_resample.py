@@ -0,0 +1,99 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.resample import can_resample, resample, verify_resampled
+
+HOUR_MS = 3600 * 1000
+
+
+def hourly(start, count, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = start + np.arange(count) * HOUR_MS
+    open_p = rng.uniform(90, 110, count).round(2)
+    close_p = rng.uniform(90, 110, count).round(2)
+    high_p = (np.maximum(open_p, close_p) + rng.uniform(0, 5, count)).round(2)
+    low_p = (np.minimum(open_p, close_p) - rng.uniform(0, 5, count)).round(2)
+    volume = rng.uniform(1, 10, count).round(3)
+    return np.column_stack([ts, open_p, high_p, low_p, close_p, volume])
+
+
+def utc_ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class TestResample(unittest.TestCase):
+    def test_can_resample(self):
+        self.assertTrue(can_resample("1h", "4h"))
+        self.assertTrue(can_resample("1h", "1d"))
+        self.assertFalse(can_resample("4h", "1h"))
+        self.assertFalse(can_resample("1h", "1M"))
+
+    def test_daily_buckets_align_to_utc_midnight(self):
+        # 从 2024-01-01 05:00 UTC 开始，第一天不完整应当被丢弃
+        ohlcv = hourly(utc_ms(2024, 1, 1, 5), 24 * 3)
+        daily = resample(CandleSeries.from_ohlcv(ohlcv), "1h", "1d")
+
+        self.assertEqual(list(daily.timestamp[::-1]), [utc_ms(2024, 1, 2), utc_ms(2024, 1, 3), utc_ms(2024, 1, 4)])
+        day = ohlcv[19:43]  # 2024-01-02 全天
+        first = daily[len(daily) - 1]
+        self.assertEqual(first['open'], day[0, 1])
+        self.assertEqual(first['high'], day[:, 2].max())
+        self.assertEqual(first['low'], day[:, 3].min())
+        self.assertEqual(first['close'], day[-1, 4])
+        self.assertAlmostEqual(first['volume'], day[:, 5].sum())
+        # 最新一根 (01-04) 只有 5 根小时线，相当于交易所未收盘的当前K线
+        self.assertEqual(daily[0]['close'], ohlcv[-1, 4])
+
+    def test_four_hour_and_weekly_boundaries(self):
+        ohlcv = hourly(utc_ms(2024, 1, 3, 2), 24 * 14)
+        series = CandleSeries.from_ohlcv(ohlcv)
+
+        four_hour = resample(series, "1h", "4h")
+        self.assertTrue(np.all(four_hour.timestamp % (4 * HOUR_MS) == 0))
+        self.assertEqual(four_hour.timestamp[-1], utc_ms(2024, 1, 3, 4))
+
+        weekly = resample(series, "1h", "1w")
+        # 2024-01-08 是周一
+        self.assertEqual(weekly.timestamp[-1], utc_ms(2024, 1, 8))
+
+    def test_verify_resampled(self):
+        series = CandleSeries.from_ohlcv(hourly(utc_ms(2024, 1, 1), 24 * 5))
+        derived = resample(series, "1h", "4h")
+        self.assertEqual(verify_resampled(derived, derived), [])
+
+        tampered = derived[:]
+        tampered.high = derived.high.copy()
+        tampered.high[3] += 1
+        self.assertEqual(verify_resampled(derived, tampered), [int(derived.timestamp[3])])
+
+
+class TestEngineResample(unittest.TestCase):
+    @patch("ccxt.binance")
+    def test_only_base_timeframe_is_fetched(self, mock_binance):
+        from test_engine import make_config
+        from binance_monitor.core.engine import MonitorEngine
+
+        engine = MonitorEngine(make_config(symbols=["BTC/USDT"], timeframes=["1h", "4h", "1d"], resample=True), MagicMock())
+        end = utc_ms(2024, 3, 1)
+        ohlcv = hourly(end - 1300 * HOUR_MS, 1300)
+        engine.client = MagicMock()
+        engine.client.get_ohlcv.side_effect = lambda symbol, timeframe, limit: ohlcv[-limit:]
+
+        results = engine._scan_pairs([("BTC/USDT", "1h"), ("BTC/USDT", "4h"), ("BTC/USDT", "1d")])
+
+        engine.client.get_ohlcv.assert_called_once_with("BTC/USDT", "1h", limit=50 * 24)
+        self.assertEqual([r["timeframe"] for r in results], ["1h", "4h", "1d"])
+        self.assertEqual(results[2]["timestamp"], end - 2 * 24 * HOUR_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.scheduler import CandleCloseScheduler, candle_open_time, next_candle_open_time
+from test_resample import utc_ms
+
+
+class TestCandleCloseScheduler(unittest.TestCase):
+    def test_candle_boundaries(self):
+        ts = utc_ms(2024, 2, 14, 13, 30)
+        self.assertEqual(candle_open_time(ts, "4h"), utc_ms(2024, 2, 14, 12))
+        self.assertEqual(next_candle_open_time(ts, "4h"), utc_ms(2024, 2, 14, 16))
+        self.assertEqual(candle_open_time(ts, "1d"), utc_ms(2024, 2, 14))
+        self.assertEqual(candle_open_time(ts, "1w"), utc_ms(2024, 2, 12))
+        self.assertEqual(candle_open_time(ts, "1M"), utc_ms(2024, 2, 1))
+        self.assertEqual(next_candle_open_time(utc_ms(2024, 12, 20), "1M"), utc_ms(2025, 1, 1))
+
+    def test_daily_runs_once_per_day(self):
+        scheduler = CandleCloseScheduler(["4h", "1d"], settle_seconds=5)
+        start = utc_ms(2024, 2, 14, 0, 1)
+        scheduler.mark_done(scheduler.timeframes, start)
+
+        runs = []
+        now = start
+        while now < utc_ms(2024, 2, 16):
+            now = scheduler.next_run_ms(now)
+            due = scheduler.due(now)
+            self.assertTrue(due)
+            runs.append((now, due))
+            scheduler.mark_done(due, now)
+
+        daily = [t for t, due in runs if "1d" in due]
+        self.assertEqual(daily, [utc_ms(2024, 2, 15, 0, 0, 5), utc_ms(2024, 2, 16, 0, 0, 5)])
+        self.assertEqual(len([t for t, due in runs if "4h" in due]), 12)
+
+    def test_nothing_due_before_settle(self):
+        scheduler = CandleCloseScheduler(["1h"], settle_seconds=10)
+        scheduler.mark_done(["1h"], utc_ms(2024, 1, 1, 0, 30))
+        self.assertEqual(scheduler.due(utc_ms(2024, 1, 1, 1, 0, 5)), [])
+        self.assertEqual(scheduler.due(utc_ms(2024, 1, 1, 1, 0, 10)), ["1h"])
+
+    def test_set_timeframes_keeps_progress(self):
+        scheduler = CandleCloseScheduler(["1h", "4h"], settle_seconds=0)
+        scheduler.mark_done(["1h"], utc_ms(2024, 1, 1, 0, 30))
+        # 4h 尚未处理过，1h 的进度保留；新增的 1d 从下一根收盘开始
+        scheduler.set_timeframes(["1h", "1d"], utc_ms(2024, 1, 1, 3, 30))
+        self.assertEqual(scheduler.timeframes, ["1h", "1d"])
+        self.assertEqual(scheduler.due(utc_ms(2024, 1, 1, 3, 30)), ["1h"])
+        self.assertEqual(scheduler.due(utc_ms(2024, 1, 2)), ["1h", "1d"])
+
+
+class TestEngineTimeframeFilter(unittest.TestCase):
+    @patch("ccxt.binance")
+    def test_run_job_scans_only_due_timeframes(self, mock_binance):
+        from test_engine import make_config
+        from binance_monitor.core.engine import MonitorEngine
+
+        engine = MonitorEngine(make_config(timeframes=["4h", "1d"], schedule="candle_close"), MagicMock())
+        engine.client = MagicMock()
+        engine.client.rate_limit_headroom.return_value = None
+        engine._scan_pairs = MagicMock(return_value=[])
+
+        engine.run_job(timeframes=["1d"])
+        pairs = engine._scan_pairs.call_args[0][0]
+        self.assertEqual({tf for _, tf in pairs}, {"1d"})
+
+    def test_empty_timeframes_are_rejected(self):
+        from pydantic import ValidationError
+        from test_engine import make_config
+
+        # 调度循环依赖至少一个周期，热加载的新配置也经过同样的校验
+        with self.assertRaises(ValidationError):
+            make_config(timeframes=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,11 @@ from datetime import datetime
 # Add src to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from binance_monitor.core.strategy import StrategyAnalyzer
+import numpy as np
+
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.detectors import Detector, DetectionEngine, FeatureSet, create_detectors
+from binance_monitor.core.strategy import StrategyAnalyzer, detected_signals
 
 class TestStrategy(unittest.TestCase):
     def setUp(self):
@@ -70,5 +74,140 @@ class TestStrategy(unittest.TestCase):
             
         self.assertFalse(self.analyzer._check_context(pinbar, prev_klines))
 
+class TestCandleSeries(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = StrategyAnalyzer()
+        rng = np.random.default_rng(7)
+        self.ohlcv = []
+        price = 100.0
+        for i in range(50):
+            open_p = price
+            close_p = price + rng.normal()
+            high_p = max(open_p, close_p) + abs(rng.normal()) * 3
+            low_p = min(open_p, close_p) - abs(rng.normal()) * 3
+            self.ohlcv.append([1_700_000_000_000 + i * 3_600_000, open_p, high_p, low_p, close_p, 1.0])
+            price = close_p
+
+    def test_from_ohlcv_is_newest_first(self):
+        series = CandleSeries.from_ohlcv(self.ohlcv)
+        self.assertEqual(len(series), 50)
+        self.assertEqual(series.timestamp.dtype, np.int64)
+        self.assertEqual(series[0]['timestamp'], self.ohlcv[-1][0])
+        self.assertTrue(series.high.flags['C_CONTIGUOUS'])
+
+        shuffled = CandleSeries.from_ohlcv(self.ohlcv[::-1])
+        np.testing.assert_array_equal(shuffled.timestamp, series.timestamp)
+
+    def test_slice_is_view(self):
+        series = CandleSeries.from_ohlcv(self.ohlcv)
+        window = series[2:42]
+        self.assertEqual(len(window), 40)
+        self.assertTrue(np.shares_memory(window.high, series.high))
+
+    def test_analyze_matches_dict_format(self):
+        series = CandleSeries.from_ohlcv(self.ohlcv)
+        dicts = series.to_dicts()
+        for offset in range(0, 9):
+            window = series[offset:]
+            self.assertEqual(
+                self.analyzer.analyze("BTC/USDT", "1h", window),
+                self.analyzer.analyze("BTC/USDT", "1h", dicts[offset:]),
+            )
+
+    def test_analyze_many_matches_scalar(self):
+        rng = np.random.default_rng(11)
+        items = []
+        for p in range(200):
+            count = 45 if p % 10 else 41
+            base = rng.uniform(10, 1000)
+            opens = base + rng.normal(0, base * 0.01, count)
+            closes = opens + rng.normal(0, base * 0.005, count)
+            highs = np.maximum(opens, closes) + np.abs(rng.normal(0, base * 0.01, count)) * rng.integers(0, 4, count)
+            lows = np.minimum(opens, closes) - np.abs(rng.normal(0, base * 0.01, count)) * rng.integers(0, 4, count)
+            ts = 1_700_000_000_000 + np.arange(count) * 3_600_000
+            ohlcv = np.column_stack([ts, opens, highs, lows, closes, np.ones(count)]).tolist()
+            items.append((f"SYM{p}/USDT", "1h", CandleSeries.from_ohlcv(ohlcv)))
+
+        batch = self.analyzer.analyze_many(items)
+        scalar = [self.analyzer.analyze(s, tf, k) for s, tf, k in items]
+        self.assertEqual(batch, scalar)
+        self.assertTrue(any(r["is_pinbar"] for r in scalar))
+        self.assertTrue(any(r["is_priority"] for r in scalar))
+
+    def test_analyze_batch_structured_result(self):
+        series = CandleSeries.from_ohlcv(self.ohlcv)
+        ohlc = np.stack([series.open, series.high, series.low, series.close], axis=-1)[None, :42]
+        out = self.analyzer.analyze_batch(ohlc)
+        self.assertEqual(out.shape, (1,))
+        self.assertEqual(out[0]["context_high"], series.high[2:42].max())
+        self.assertEqual(out[0]["context_low"], series.low[2:42].min())
+        with self.assertRaises(ValueError):
+            self.analyzer.analyze_batch(ohlc[:, :41])
+
+class TestDetectors(unittest.TestCase):
+    def make_series(self, candles):
+        """candles 按时间正序 (open, high, low, close)，前面补 40 根平稳K线"""
+        flat = [(100.0, 101.0, 99.0, 100.0)] * 40
+        rows = [[1_700_000_000_000 + i * 3_600_000, *c, 1.0] for i, c in enumerate(flat + candles)]
+        return CandleSeries.from_ohlcv(rows)
+
+    def test_multi_pattern_single_pass(self):
+        analyzer = StrategyAnalyzer(["pinbar", "engulfing", "inside_bar", "breakout"])
+        engulfing = self.make_series([(100.5, 101.0, 99.5, 99.8), (99.6, 103.0, 99.4, 102.5), (0, 0, 0, 0)])
+        inside = self.make_series([(100.0, 102.0, 98.0, 101.0), (100.5, 101.0, 99.0, 100.2), (0, 0, 0, 0)])
+        [eng, ins] = analyzer.analyze_many([("A/USDT", "1h", engulfing), ("B/USDT", "1h", inside)])
+
+        self.assertEqual({s["pattern"] for s in detected_signals(eng)}, {"engulfing", "breakout"})
+        self.assertEqual([s["pattern"] for s in detected_signals(ins)], ["inside_bar"])
+        signal = detected_signals(eng)[0]
+        self.assertEqual(signal["timestamp"], engulfing.timestamp[1])
+        self.assertIn("看涨", signal["details"])
+
+    def test_pinbar_only_results_are_unchanged(self):
+        series = self.make_series([(98.0, 100.0, 80.0, 99.0), (0, 0, 0, 0)])
+        [res] = StrategyAnalyzer().analyze_many([("A/USDT", "1h", series)])
+        self.assertNotIn("signals", res)
+        self.assertEqual(detected_signals(res), [res])
+
+        [multi] = StrategyAnalyzer(["pinbar", "inside_bar"]).analyze_many([("A/USDT", "1h", series)])
+        [pinbar] = detected_signals(multi)
+        self.assertEqual(pinbar["details"], res["details"])
+        self.assertEqual(pinbar["is_priority"], res["is_priority"])
+
+    def test_shared_features_are_computed_once(self):
+        calls = []
+
+        class Counting(FeatureSet):
+            def _compute(self, name):
+                calls.append(name)
+                return super()._compute(name)
+
+        class Wide(Detector):
+            name = "wide"
+            lookback = 40
+            features = ("range", "rolling_high_40")
+
+            def detect(self, f):
+                matched = f["range"] > 0
+                return matched, np.zeros(len(matched), dtype=np.int8), matched & (f["high"] >= f["rolling_high_40"])
+
+        series = self.make_series([(0, 0, 0, 0)])
+        ohlc = np.stack([series.open, series.high, series.low, series.close], axis=-1)[None, :41]
+        engine = DetectionEngine(create_detectors(["pinbar", "breakout"]) + [Wide()])
+        engine.evaluate_features(Counting(ohlc))
+        self.assertEqual(len(calls), len(set(calls)))
+        self.assertIn("rolling_high_40", calls)
+
+    def test_detector_must_implement_detect(self):
+        class Incomplete(Detector):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_unknown_pattern(self):
+        with self.assertRaises(ValueError):
+            StrategyAnalyzer(["pinbar", "head_and_shoulders"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,259 @@
+import sys
+import os
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from aiohttp import web
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.candles import CandleSeries
+from binance_monitor.core.strategy import StrategyAnalyzer
+from binance_monitor.core.stream import KlineStream
+
+HOUR_MS = 3600 * 1000
+NORMAL = (100.0, 105.0, 95.0, 102.0)
+HAMMER = (98.0, 100.0, 80.0, 99.0)
+
+
+def kline_frame(ts, ohlc, closed, symbol="BTCUSDT", interval="1h"):
+    """币安组合流的 kline 消息"""
+    o, h, l, c = ohlc
+    return {
+        "stream": f"{symbol.lower()}@kline_{interval}",
+        "data": {
+            "e": "kline", "E": ts + 1, "s": symbol,
+            "k": {
+                "t": ts, "T": ts + HOUR_MS - 1, "s": symbol, "i": interval,
+                "o": str(o), "h": str(h), "l": str(l), "c": str(c), "v": "1.0", "x": closed,
+            },
+        },
+    }
+
+
+class ReplayServer:
+    """本地 WebSocket 替身：记录订阅请求，并按连接依次回放录制好的消息"""
+
+    def __init__(self, sessions):
+        # sessions[i] 为第 i 次连接要回放的消息；最后一次连接回放完后保持连接
+        self.sessions = sessions
+        self.subscriptions = []
+        # 首次订阅之后收到的消息 (增量订阅/退订)
+        self.messages = []
+        self.connections = 0
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        index = self.connections
+        self.connections += 1
+
+        subscribe = await ws.receive_json()
+        self.subscriptions.append(subscribe["params"])
+        await ws.send_json({"result": None, "id": subscribe["id"]})
+
+        for frame in self.sessions[min(index, len(self.sessions) - 1)]:
+            await ws.send_json(frame)
+
+        if index < len(self.sessions) - 1:
+            await ws.close()
+        else:
+            async for msg in ws:
+                self.messages.append(msg.json())
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}/stream"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestKlineStream(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # last_closed 这根 K 线已经收盘 (收盘时间 <= 当前时间)
+        self.last_closed = int(time.time() * 1000) // HOUR_MS * HOUR_MS - HOUR_MS
+        self.history = [[self.last_closed - (49 - i) * HOUR_MS, *NORMAL, 1.0] for i in range(49)]
+        self.client = MagicMock()
+        self.client.get_klines.side_effect = lambda symbol, timeframe, limit: CandleSeries.from_ohlcv(self.history[-limit:])
+        self.signals = []
+
+    async def run_stream(self, server, until, timeout=5.0):
+        url = await server.start()
+        stream = KlineStream(
+            self.client, StrategyAnalyzer(), [("BTC/USDT", "1h")],
+            on_signals=self.signals.extend, url=url,
+            reconnect_delay=0.01, batch_delay=0.01,
+        )
+        task = asyncio.create_task(stream.run())
+        try:
+            deadline = time.monotonic() + timeout
+            while not until() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await stream.stop()
+            await asyncio.wait_for(task, timeout)
+            await server.stop()
+        return stream
+
+    async def test_detects_on_candle_close(self):
+        # 最后一根历史 K 线收盘后推送为锤子线
+        target = self.history.pop()[0]
+        server = ReplayServer([[
+            kline_frame(target, HAMMER, closed=False),
+            kline_frame(target, HAMMER, closed=True),
+        ]])
+
+        await self.run_stream(server, until=lambda: self.signals)
+
+        self.assertEqual(server.subscriptions, [["btcusdt@kline_1h"]])
+        self.assertEqual(len(self.signals), 1)
+        self.assertEqual(self.signals[0]["timestamp"], target)
+        self.assertTrue(self.signals[0]["is_pinbar"])
+
+    async def test_spans_are_flushed_while_streaming(self):
+        import json
+        import tempfile
+        from binance_monitor.utils.tracing import TraceConfig, tracer
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(tracer.configure, TraceConfig())
+        tracer.configure(TraceConfig(enabled=True, trace_dir=tmp.name, format="jsonl", stream_flush_seconds=0.05))
+        target = self.history.pop()[0]
+        server = ReplayServer([[kline_frame(target, HAMMER, closed=True)]])
+
+        # 不等停止: 定时写出的 trace 中已经有收盘检测的 span
+        def flushed():
+            names = []
+            for name in os.listdir(tmp.name):
+                with open(os.path.join(tmp.name, name), encoding="utf-8") as f:
+                    names += [json.loads(line)["name"] for line in f]
+            return "analyze" in names
+
+        await self.run_stream(server, until=lambda: self.signals and flushed())
+        self.assertTrue(flushed())
+
+    async def test_open_candle_is_ignored(self):
+        target = self.history.pop()[0]
+        server = ReplayServer([[kline_frame(target, HAMMER, closed=False)]])
+
+        stream = await self.run_stream(server, until=lambda: False, timeout=0.3)
+
+        self.assertEqual(self.signals, [])
+        self.assertEqual(stream._windows[("BTC/USDT", "1h")][-1][0], self.history[-1][0])
+
+    async def test_reconnect_resubscribes_and_backfills_missed_candle(self):
+        # 第一次连接直接断开；断线期间最后一根 K 线收盘为锤子线，重连后只能通过 REST 回补
+        self.history[-1][1:5] = HAMMER
+        missed = self.history[-1][0]
+        server = ReplayServer([[], []])
+
+        def history(symbol, timeframe, limit):
+            rows = self.history if server.connections > 1 else self.history[:-1]
+            return CandleSeries.from_ohlcv(rows[-limit:])
+
+        self.client.get_klines.side_effect = history
+
+        await self.run_stream(server, until=lambda: self.signals)
+
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(len(server.subscriptions), 2)
+        self.assertEqual(self.client.get_klines.call_count, 2)
+        self.assertEqual([s["timestamp"] for s in self.signals], [missed])
+
+    async def test_gap_triggers_rest_backfill(self):
+        # 初始窗口缺少最后两根，推送的最后一根与窗口之间出现缺口
+        self.history[-1][1:5] = HAMMER
+        target = self.history[-1][0]
+        server = ReplayServer([[kline_frame(target, HAMMER, closed=True)]])
+
+        def history(symbol, timeframe, limit):
+            rows = self.history if self.client.get_klines.call_count > 1 else self.history[:-2]
+            return CandleSeries.from_ohlcv(rows[-limit:])
+
+        self.client.get_klines.side_effect = history
+
+        stream = await self.run_stream(server, until=lambda: self.signals)
+
+        timestamps = [row[0] for row in stream._windows[("BTC/USDT", "1h")]]
+        self.assertEqual(self.client.get_klines.call_count, 2)
+        self.assertEqual(timestamps[-3:], [target - 2 * HOUR_MS, target - HOUR_MS, target])
+        self.assertEqual([s["timestamp"] for s in self.signals], [target])
+
+    async def test_failed_gap_backfill_skips_only_that_pair(self):
+        target = self.history.pop()[0]
+        server = ReplayServer([[
+            # ETH 的窗口与推送之间有缺口，回补失败
+            kline_frame(target + HOUR_MS, NORMAL, closed=True, symbol="ETHUSDT"),
+            kline_frame(target, HAMMER, closed=True),
+        ]])
+        url = await server.start()
+        stream = KlineStream(
+            self.client, StrategyAnalyzer(), [("BTC/USDT", "1h"), ("ETH/USDT", "1h")],
+            on_signals=self.signals.extend, url=url, reconnect_delay=0.01, batch_delay=0.01,
+        )
+
+        def history(symbol, timeframe, limit):
+            if symbol == "ETH/USDT" and len(stream._windows) == 2:
+                raise RuntimeError("circuit open")
+            return CandleSeries.from_ohlcv(self.history[-limit:])
+
+        self.client.get_klines.side_effect = history
+        task = asyncio.create_task(stream.run())
+        try:
+            deadline = time.monotonic() + 5.0
+            while not self.signals and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await stream.stop()
+            await asyncio.wait_for(task, 5.0)
+            await server.stop()
+
+        # 连接没有因为 ETH 回补失败而断开，BTC 照常检测
+        self.assertEqual(server.connections, 1)
+        self.assertEqual([(s["symbol"], s["timestamp"]) for s in self.signals], [("BTC/USDT", target)])
+        self.assertEqual(stream._gap_rows, {})
+        self.assertEqual(stream._windows[("ETH/USDT", "1h")][-1][0], self.history[-1][0])
+
+    async def test_update_pairs_changes_subscriptions_incrementally(self):
+        server = ReplayServer([[]])
+        url = await server.start()
+        stream = KlineStream(
+            self.client, StrategyAnalyzer(), [("BTC/USDT", "1h"), ("ETH/USDT", "1h")],
+            on_signals=self.signals.extend, url=url, batch_delay=0.01,
+        )
+        task = asyncio.create_task(stream.run())
+        try:
+            while len(stream._windows) < 2:
+                await asyncio.sleep(0.01)
+            calls = self.client.get_klines.call_count
+            await stream.update_pairs([("BTC/USDT", "1h"), ("SOL/USDT", "1h")])
+            while len(server.messages) < 2:
+                await asyncio.sleep(0.01)
+        finally:
+            await stream.stop()
+            await asyncio.wait_for(task, 5.0)
+            await server.stop()
+
+        self.assertEqual(
+            [(m["method"], m["params"]) for m in server.messages],
+            [("UNSUBSCRIBE", ["ethusdt@kline_1h"]), ("SUBSCRIBE", ["solusdt@kline_1h"])],
+        )
+        # 只回补新增的交易对，BTC 的窗口保留
+        self.assertEqual(self.client.get_klines.call_count, calls + 1)
+        self.assertEqual(set(stream._windows), {("BTC/USDT", "1h"), ("SOL/USDT", "1h")})
+
+
+if __name__ == "__main__":
+    unittest.main()
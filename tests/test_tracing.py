@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.core.engine import MonitorEngine
+from binance_monitor.utils.tracing import TraceConfig, tracer
+from test_engine import make_config, make_series
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(tracer.configure, TraceConfig())
+        patcher = patch("ccxt.binance")
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+    def make_engine(self):
+        engine = MonitorEngine(make_config(concurrency=2), MagicMock())
+        engine.client = MagicMock()
+        engine.client.check_connection.return_value = True
+        engine.client.rate_limit_headroom.return_value = None
+        engine._fetch_pair = lambda symbol, timeframe, limit: make_series()
+        return engine
+
+    def test_disabled_tracer_writes_nothing(self):
+        tracer.configure(TraceConfig(trace_dir=self.tmp.name))
+        self.make_engine().run_job()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_scan_spans_are_nested(self):
+        tracer.configure(TraceConfig(enabled=True, trace_dir=self.tmp.name, format="jsonl"))
+        self.make_engine().run_job()
+
+        [name] = os.listdir(self.tmp.name)
+        with open(os.path.join(self.tmp.name, name), encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f]
+        by_name = {}
+        for span in spans:
+            by_name.setdefault(span["name"], []).append(span)
+
+        [scan] = by_name["scan"]
+        self.assertIsNone(scan["parent"])
+        # 3 个交易对 x 2 个周期，线程池中的 span 也挂在 scan 下
+        self.assertEqual(len(by_name["pair"]), 6)
+        self.assertTrue(all(span["parent"] == scan["id"] for span in by_name["pair"] + by_name["analyze"]))
+
+    def test_chrome_trace_rotation_and_profile(self):
+        tracer.configure(TraceConfig(enabled=True, trace_dir=self.tmp.name, max_files=2, profile_every=2))
+        engine = self.make_engine()
+        for _ in range(3):
+            engine.run_job()
+
+        files = sorted(os.listdir(self.tmp.name))
+        traces = [f for f in files if f.endswith(".json")]
+        self.assertEqual(len(traces), 2)
+        # 第 1、3 轮采样，第 1 轮已被轮转删除
+        self.assertEqual(len([f for f in files if f.endswith(".prof")]), 1)
+        with open(os.path.join(self.tmp.name, traces[-1]), encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        self.assertIn("scan", {e["name"] for e in events if e["ph"] == "X"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from binance_monitor.config import UniverseConfig
+from binance_monitor.core.universe import Universe, rank_symbols
+
+
+def ticker(quote_volume, high=110.0, low=90.0, last=100.0):
+    return {"quoteVolume": quote_volume, "high": high, "low": low, "last": last}
+
+
+TICKERS = {
+    "BTC/USDT": ticker(5_000_000, high=102, low=98),
+    "ETH/USDT": ticker(3_000_000, high=105, low=95),
+    "PEPE/USDT": ticker(1_000_000, high=150, low=80),
+    "DUST/USDT": ticker(100),
+    "BTCUP/USDT": ticker(9_000_000),
+    "OLD/USDT": ticker(8_000_000),
+    "ETH/BTC": ticker(7_000_000),
+    "USDC/USDT": ticker(6_000_000, high=100.1, low=99.9),
+}
+MARKETS = {symbol: {"active": symbol != "OLD/USDT", "spot": True} for symbol in TICKERS}
+
+
+class TestRankSymbols(unittest.TestCase):
+    def test_filters_and_orders(self):
+        config = UniverseConfig(exclude=["USDC/USDT"], min_quote_volume=1000)
+        self.assertEqual(rank_symbols(TICKERS, MARKETS, config), ["BTC/USDT", "ETH/USDT", "PEPE/USDT"])
+
+        config = UniverseConfig(exclude=["USDC/USDT"], rank_by="volatility", min_quote_volume=1000)
+        self.assertEqual(rank_symbols(TICKERS, MARKETS, config), ["PEPE/USDT", "ETH/USDT", "BTC/USDT"])
+
+        # 没有 markets 时只按计价币过滤
+        self.assertIn("OLD/USDT", rank_symbols(TICKERS, None, UniverseConfig()))
+
+    def test_leveraged_tokens(self):
+        config = UniverseConfig()
+        tickers = {**TICKERS, "ETHBEAR/USDT": ticker(8_500_000), "SYRUP/USDT": ticker(2_000_000)}
+        ranked = rank_symbols(tickers, None, config)
+        self.assertNotIn("BTCUP/USDT", ranked)
+        self.assertNotIn("ETHBEAR/USDT", ranked)
+        # 名字以 UP 结尾的普通代币不受影响
+        self.assertIn("SYRUP/USDT", ranked)
+
+        # 交易所标记的杠杆代币即使标的不在已知列表中也会被排除
+        tickers = {"NEWUP/USDT": ticker(1_000), "JUP/USDT": ticker(1_000)}
+        markets = {
+            "NEWUP/USDT": {"spot": True, "info": {"permissionSets": [["SPOT", "LEVERAGED"]]}},
+            "JUP/USDT": {"spot": True, "info": {"permissionSets": [["SPOT"]]}},
+        }
+        self.assertEqual(rank_symbols(tickers, markets, config), ["JUP/USDT"])
+        self.assertEqual(len(rank_symbols(tickers, markets, UniverseConfig(exclude_leveraged=False))), 2)
+
+
+class TestUniverse(unittest.TestCase):
+    def make(self, **kwargs):
+        client = MagicMock()
+        client.get_tickers.return_value = TICKERS
+        client.exchange.markets = MARKETS
+        kwargs.setdefault("exclude", ["USDC/USDT"])
+        return Universe(client, UniverseConfig(enabled=True, **kwargs)), client
+
+    def test_refresh_cadence_and_failure(self):
+        universe, client = self.make(refresh_minutes=60)
+        self.assertEqual(universe.select(), ["BTC/USDT", "ETH/USDT", "PEPE/USDT", "DUST/USDT"])
+        universe.select()
+        client.get_tickers.assert_called_once()
+
+        client.get_tickers.side_effect = RuntimeError("timeout")
+        self.assertEqual(universe.refresh(force=True), ["BTC/USDT", "ETH/USDT", "PEPE/USDT", "DUST/USDT"])
+
+        # 筛选条件变化后下一轮重新排名
+        client.get_tickers.side_effect = None
+        universe.configure(UniverseConfig(enabled=True, exclude=["USDC/USDT"], top_n=2))
+        self.assertEqual(universe.select(), ["BTC/USDT", "ETH/USDT"])
+        self.assertEqual(client.get_tickers.call_count, 3)
+
+    def test_tiers_scan_top_pairs_more_often(self):
+        universe, _ = self.make(tiers=[{"size": 1, "every": 1}, {"size": 3, "every": 2}])
+        scans = [universe.select(pinned=["XRP/USDT"]) for _ in range(4)]
+        self.assertEqual(scans[0], ["XRP/USDT", "BTC/USDT", "ETH/USDT", "PEPE/USDT"])
+        self.assertEqual(scans[1], ["XRP/USDT", "BTC/USDT"])
+        self.assertEqual(scans[2], scans[0])
+        # 分档之外的交易对不扫描
+        self.assertNotIn("DUST/USDT", sum(scans, []))
+
+
+class TestEngineUniverse(unittest.TestCase):
+    @patch("ccxt.binance")
+    def test_run_job_scans_universe(self, mock_binance):
+        from binance_monitor.config import AppConfig
+        from binance_monitor.core.engine import MonitorEngine
+
+        config = AppConfig(
+            monitor={"symbols": ["XRP/USDT"], "timeframes": ["4h"], "concurrency": 1, "retry_failed_pairs": False},
+            email={
+                "smtp_server": "smtp.test.com", "username": "user", "password": "password",
+                "sender_email": "sender@test.com", "receiver_email": "receiver@test.com",
+            },
+            universe={"enabled": True, "top_n": 2, "exclude": ["USDC/USDT"]},
+        )
+        engine = MonitorEngine(config, MagicMock())
+        engine.client = engine.universe.client = MagicMock()
+        engine.client.get_tickers.return_value = TICKERS
+        engine.client.exchange.markets = MARKETS
+        engine.client.rate_limit_headroom.return_value = None
+        scanned = []
+        engine._safe_fetch_pair = lambda symbol, timeframe, limit: scanned.append(symbol)
+
+        engine.run_job()
+        self.assertEqual(scanned, ["XRP/USDT", "BTC/USDT", "ETH/USDT"])
+
+
+if __name__ == "__main__":
+    unittest.main()